@@ -0,0 +1,8 @@
+# vim: set et ts=4 sw=4 fileencoding=utf-8:
+'''
+benchmarks
+==========
+
+Performance benchmarks for yalp_grok. Run them from the repository root,
+e.g. ``python -m benchmarks.bench_import``.
+'''
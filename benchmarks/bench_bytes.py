@@ -0,0 +1,91 @@
+# vim: set et ts=4 sw=4 fileencoding=utf-8:
+'''
+benchmarks.bench_bytes
+======================
+
+Compare parsing a generated haproxy log as text with grok_iter() and as
+bytes with grok_iter_mmap(), for time and peak memory.
+'''
+from __future__ import print_function
+
+import argparse
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from yalp_grok import compile_pattern, grok_iter, grok_iter_mmap
+
+from .corpus import mixed_lines
+
+PATTERN = '%{HAPROXYHTTP}'
+
+
+def text(path):
+    ''' Decode and search every line '''
+    return grok_iter(path, compile_pattern(PATTERN), encoding='utf-8')
+
+
+def mmap_decoded(path):
+    ''' Search the memory map, decoding captured fields '''
+    return grok_iter_mmap(path, compile_pattern(PATTERN, as_bytes=True))
+
+
+def mmap_raw(path):
+    ''' Search the memory map, keeping captured fields as bytes '''
+    return grok_iter_mmap(path, compile_pattern(PATTERN, as_bytes=True),
+                          encoding=None)
+
+
+def measure(func, path):
+    '''
+    Return the time taken to consume all results of func and the peak
+    memory allocated meanwhile.
+    '''
+    tracemalloc.start()
+    start = time.time()
+    matched = sum(1 for match in func(path) if match is not None)
+    elapsed = time.time() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return matched, elapsed, peak
+
+
+def main(argv=None):
+    ''' Run the benchmark '''
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--lines', type=int, default=50000)
+    parser.add_argument('--miss-ratio', type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmp_dir, 'haproxy.log')
+        with io.open(path, 'w', encoding='utf-8') as lfh:
+            for line in mixed_lines(args.lines, miss_ratio=args.miss_ratio,
+                                    names=['HAPROXYHTTP']):
+                lfh.write(line + u'\n')
+
+        print('{0} lines, {1:.1f} MB'.format(
+            args.lines, os.path.getsize(path) / 1e6))
+        # Time is measured without tracing, which slows allocations down
+        for label, func in (('text', text), ('mmap', mmap_decoded),
+                            ('mmap raw', mmap_raw)):
+            start = time.time()
+            for _ in func(path):
+                pass
+            elapsed = time.time() - start
+            matched, _, peak = measure(func, path)
+            print('{0:>10}: {1:10.0f} lines/s, peak {2:6.0f} kB '
+                  '({3} matched)'.format(label, args.lines / elapsed,
+                                         peak / 1e3, matched))
+    finally:
+        shutil.rmtree(tmp_dir)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,43 @@
+# vim: set et ts=4 sw=4 fileencoding=utf-8:
+'''
+benchmarks.bench_captures
+=========================
+
+Compare searching a haproxy log line with every group of the expanded
+pattern capturing, with only its named groups capturing and with only a
+few fields kept.
+'''
+from __future__ import print_function
+
+import argparse
+import sys
+import timeit
+
+from yalp_grok import compile_pattern, grok_search
+
+from .corpus import SAMPLES
+
+PATTERN = '%{HAPROXYHTTP}'
+
+FIELDS = ['client_ip', 'backend_name', 'http_status_code', 'time_duration']
+
+
+def main(argv=None):
+    ''' Run the benchmark '''
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--number', type=int, default=20000)
+    args = parser.parse_args(argv)
+
+    line = SAMPLES['HAPROXYHTTP']
+    for label, captures in (('all groups', None), ('named', 'named'),
+                            ('{0} fields'.format(len(FIELDS)), FIELDS)):
+        compiled = compile_pattern(PATTERN, captures=captures)
+        best = min(timeit.repeat(lambda: grok_search(line, compiled),
+                                 number=args.number, repeat=3))
+        print('{0:>12}: {1:4d} groups {2:7.2f} us'.format(
+            label, compiled.regex.groups, best / args.number * 1e6))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,62 @@
+# vim: set et ts=4 sw=4 fileencoding=utf-8:
+'''
+benchmarks.bench_convert
+========================
+
+Compare turning matches of a typed apache log pattern into dictionaries
+with groupdict() and _apply_map(), as grok_search() used to, and with the
+converter built by compile_pattern().
+'''
+from __future__ import print_function
+
+import argparse
+import sys
+import timeit
+
+from yalp_grok import compile_pattern, grok_search
+from yalp_grok.yalp_grok import _apply_map
+
+from .corpus import SAMPLES
+
+PATTERN = (
+    '%{IPORHOST:clientip} %{USER:ident} %{USER:auth} '
+    r'\[%{HTTPDATE:timestamp}\] "%{WORD:verb} %{NOTSPACE:request} '
+    'HTTP/%{NUMBER:httpversion:float}" %{NUMBER:response:int} '
+    '(?:%{NUMBER:bytes:int}|-) %{QS:referrer} %{QS:agent}'
+)
+
+
+def main(argv=None):
+    ''' Run the benchmark '''
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--number', type=int, default=100000)
+    args = parser.parse_args(argv)
+
+    compiled = compile_pattern(PATTERN)
+    line = SAMPLES['COMBINEDAPACHELOG']
+    match_obj = compiled.regex.search(line)
+    type_map = compiled.type_map
+    assert compiled.convert(match_obj) == _apply_map(
+        match_obj.groupdict(), type_map)
+
+    def legacy_search():
+        ''' grok_search() before converters '''
+        found = compiled.regex.search(line)
+        return _apply_map(found.groupdict(), type_map)
+
+    cases = (
+        ('groupdict + _apply_map',
+         lambda: _apply_map(match_obj.groupdict(), type_map)),
+        ('converter', lambda: compiled.convert(match_obj)),
+        ('search, before', legacy_search),
+        ('search, after', lambda: grok_search(line, compiled)),
+    )
+    for label, func in cases:
+        best = min(timeit.repeat(func, number=args.number, repeat=3))
+        print('{0:>24}: {1:7.2f} us'.format(
+            label, best / args.number * 1e6))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
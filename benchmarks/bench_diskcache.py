@@ -0,0 +1,48 @@
+# vim: set et ts=4 sw=4 fileencoding=utf-8:
+'''
+benchmarks.bench_diskcache
+==========================
+
+Measure the time a new process takes to import yalp_grok and compile
+large patterns, without and with a warm disk cache.
+'''
+from __future__ import print_function
+
+import argparse
+import shutil
+import sys
+import tempfile
+
+from .bench_import import time_statement
+
+PATTERNS = ['%{HAPROXYHTTP}', '%{CISCOFW106023}', '%{COMBINEDAPACHELOG}']
+
+STATEMENT = ('import yalp_grok\n'
+             'for pattern in {0!r}:\n'
+             '    yalp_grok.compile_pattern(pattern, cache_dir={1!r})')
+
+
+def main(argv=None):
+    ''' Run the benchmark '''
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--runs', type=int, default=9,
+                        help='interpreters started per measurement')
+    args = parser.parse_args(argv)
+
+    cache_dir = tempfile.mkdtemp()
+    try:
+        base = time_statement('import yalp_grok', args.runs)
+        # The warm up run of time_statement() fills the cache
+        for label, directory in (('no cache', None), ('disk cache',
+                                                      cache_dir)):
+            elapsed = time_statement(
+                STATEMENT.format(PATTERNS, directory), args.runs)
+            print('{0:>10}: {1:7.2f} ms to compile {2} patterns'.format(
+                label, elapsed - base, len(PATTERNS)))
+    finally:
+        shutil.rmtree(cache_dir)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,88 @@
+# vim: set et ts=4 sw=4 fileencoding=utf-8:
+'''
+benchmarks.bench_grokset
+========================
+
+Compare a GrokSet with trying compiled patterns one by one until one
+matches, with and without the literal prefilter, on the log formats of
+the bundled pattern files.
+'''
+from __future__ import print_function
+
+import argparse
+import sys
+import timeit
+
+from yalp_grok import compile_pattern, compile_patterns, grok_search
+from yalp_grok.yalp_grok import PREDEFINED_PATTERNS
+
+from .corpus import SAMPLES, mixed_lines
+
+
+def pattern_names():
+    '''
+    Return the log line patterns tried on every line: all sample formats
+    and the Cisco firewall patterns.
+    '''
+    names = sorted(name for name in PREDEFINED_PATTERNS
+                   if name.startswith('CISCOFW'))
+    names.extend(sorted(name for name in SAMPLES if name not in names))
+    return names
+
+
+def sequential(lines, compiled):
+    ''' Try every pattern in turn, the way callers did before GrokSet '''
+    results = []
+    for line in lines:
+        for name, pattern in compiled:
+            match = grok_search(line, pattern)
+            if match is not None:
+                results.append((name, match))
+                break
+        else:
+            results.append(None)
+    return results
+
+
+def combined(lines, grokset):
+    ''' Match every line with the GrokSet '''
+    search = grokset.search
+    return [search(line) for line in lines]
+
+
+def main(argv=None):
+    ''' Run the benchmark '''
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--lines', type=int, default=20000)
+    parser.add_argument('--miss-ratio', type=float, default=0.1)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    names = pattern_names()
+    lines = mixed_lines(args.lines, miss_ratio=args.miss_ratio)
+    compiled = [(name, compile_pattern('%{' + name + '}')) for name in names]
+    unfiltered = [(name, compile_pattern('%{' + name + '}', prefilter=False))
+                  for name in names]
+    grokset = compile_patterns(
+        [(name, '%{' + name + '}') for name in names])
+
+    seq = sequential(lines, compiled)
+    comb = combined(lines, grokset)
+    differ = sum(1 for left, right in zip(seq, comb) if left != right)
+    differ += sum(1 for left, right in zip(seq, sequential(lines, unfiltered))
+                  if left != right)
+
+    print('{0} patterns, {1} lines, {2:.0%} misses'.format(
+        len(names), len(lines), args.miss_ratio))
+    for label, func, arg in (('no prefilter', sequential, unfiltered),
+                             ('sequential', sequential, compiled),
+                             ('grokset', combined, grokset)):
+        best = min(timeit.repeat(lambda: func(lines, arg),
+                                 number=1, repeat=args.repeat))
+        print('{0:>12}: {1:10.0f} lines/s'.format(label, len(lines) / best))
+    print('results differing from sequential: {0}'.format(differ))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,81 @@
+# vim: set et ts=4 sw=4 fileencoding=utf-8:
+'''
+benchmarks.bench_import
+=======================
+
+Measure the time it takes to import yalp_grok in a fresh interpreter.
+
+The cost of importing the regex module is measured separately and
+subtracted, since it does not depend on yalp_grok. The script exits with
+a non zero status if the remaining overhead exceeds TARGET_OVERHEAD_MS.
+'''
+from __future__ import print_function
+
+import argparse
+import os
+import subprocess
+import sys
+import timeit
+
+# Import overhead of yalp_grok on top of regex, in milliseconds
+TARGET_OVERHEAD_MS = 5.0
+
+STATEMENTS = {
+    'regex': 'import regex',
+    'yalp_grok': 'import regex; import yalp_grok',
+    'first_compile': ('import regex; import yalp_grok; '
+                      'yalp_grok.compile_pattern("%{SYSLOGLINE}")'),
+}
+
+
+def time_statement(statement, runs):
+    '''
+    Return the median wall time in milliseconds of running statement in
+    a new interpreter.
+    '''
+    command = [sys.executable, '-c', statement]
+    # Installed packages have their bytecode cached, let the warm up run
+    # write it
+    env = dict(os.environ)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    subprocess.check_call(command, env=env)
+    timings = []
+    for _ in range(runs):
+        start = timeit.default_timer()
+        subprocess.check_call(command, env=env)
+        timings.append((timeit.default_timer() - start) * 1000.0)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+def measure(runs=15):
+    '''
+    Return median timings in milliseconds of the import statements.
+    '''
+    results = dict(
+        (name, time_statement(statement, runs))
+        for name, statement in STATEMENTS.items())
+    results['overhead'] = results['yalp_grok'] - results['regex']
+    results['first_compile'] -= results['yalp_grok']
+    return results
+
+
+def main(argv=None):
+    ''' Run the benchmark '''
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--runs', type=int, default=15,
+                        help='interpreters started per measurement')
+    args = parser.parse_args(argv)
+
+    results = measure(args.runs)
+    print('import regex:          {0:7.2f} ms'.format(results['regex']))
+    print('import yalp_grok:      {0:7.2f} ms'.format(results['yalp_grok']))
+    print('yalp_grok overhead:    {0:7.2f} ms (target {1:.2f} ms)'.format(
+        results['overhead'], TARGET_OVERHEAD_MS))
+    print('first SYSLOGLINE compile: {0:4.2f} ms'.format(
+        results['first_compile']))
+    return 0 if results['overhead'] <= TARGET_OVERHEAD_MS else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
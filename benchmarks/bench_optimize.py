@@ -0,0 +1,66 @@
+# vim: set et ts=4 sw=4 fileencoding=utf-8:
+'''
+benchmarks.bench_optimize
+=========================
+
+Compare the search throughput of patterns compiled with and without the
+optimize option of compile_pattern(), on the generated lines of every
+format, a quarter of them not matching.
+'''
+from __future__ import print_function
+
+import argparse
+import sys
+import timeit
+
+from yalp_grok import compile_pattern, grok_search
+
+from .corpus import FORMATS, format_lines
+
+# Patterns made of large literal alternations, with lines exercising them
+KEYWORDS = {
+    'cisco_action': (
+        '%{CISCO_ACTION:action} %{WORD:protocol}',
+        ['Teardown TCP', 'denied by ACL', 'est-allowed UDP', 'created TCP',
+         'Dropping ICMP', 'unknown keyword']),
+    'syslog_month': (
+        '%{MONTH:month} +%{MONTHDAY:day} %{TIME:time}',
+        ['December  1 22:14:15', 'Sep 12 01:02:03', 'Sept 12 01:02:03',
+         'May 30 12:00:00', 'Octo 1 00:00:00']),
+}
+
+
+def throughput(lines, compiled, repeat):
+    ''' Lines searched per second '''
+    best = min(timeit.repeat(
+        lambda: [grok_search(line, compiled) for line in lines],
+        number=1, repeat=repeat))
+    return len(lines) / best
+
+
+def main(argv=None):
+    ''' Run the benchmark '''
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--lines', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    cases = [(name, FORMATS[name][0],
+              format_lines(name, args.lines, miss_ratio=0.25))
+             for name in sorted(FORMATS)]
+    cases.extend(
+        (name, pattern, samples * (args.lines // len(samples)))
+        for name, (pattern, samples) in sorted(KEYWORDS.items()))
+    print('{0:>14} {1:>12} {2:>12} {3:>8}'.format(
+        'format', 'lines/s', 'optimized', 'speedup'))
+    for name, pattern, lines in cases:
+        plain = throughput(lines, compile_pattern(pattern), args.repeat)
+        optimized = throughput(
+            lines, compile_pattern(pattern, optimize=True), args.repeat)
+        print('{0:>14} {1:12.0f} {2:12.0f} {3:7.2f}x'.format(
+            name, plain, optimized, optimized / plain))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,79 @@
+# vim: set et ts=4 sw=4 fileencoding=utf-8:
+'''
+benchmarks.bench_parallel
+=========================
+
+Compare grok_parse_file_parallel() with a single process grok_search()
+loop over a generated haproxy log.
+'''
+from __future__ import print_function
+
+import argparse
+import io
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from yalp_grok import compile_pattern, grok_parse_file_parallel, grok_search
+
+from .corpus import mixed_lines
+
+PATTERN = '%{HAPROXYHTTP}'
+
+
+def single_process(path):
+    ''' Search every line of the file the way the README shows '''
+    compiled = compile_pattern(PATTERN)
+    with io.open(path, 'r', encoding='utf-8') as lfh:
+        return sum(1 for line in lfh
+                   if grok_search(line, compiled) is not None)
+
+
+def parallel(path, workers):
+    ''' Search every line with a pool of workers '''
+    return sum(1 for match in grok_parse_file_parallel(
+        path, PATTERN, workers=workers, ordered=False)
+        if match is not None)
+
+
+def main(argv=None):
+    ''' Run the benchmark '''
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--lines', type=int, default=200000)
+    parser.add_argument('--miss-ratio', type=float, default=0.1)
+    parser.add_argument('--workers', type=int, nargs='*')
+    args = parser.parse_args(argv)
+
+    cpus = multiprocessing.cpu_count()
+    workers = args.workers or sorted(set([1, 2, cpus // 2 or 1, cpus]))
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmp_dir, 'haproxy.log')
+        with io.open(path, 'w', encoding='utf-8') as lfh:
+            for line in mixed_lines(args.lines, miss_ratio=args.miss_ratio,
+                                    names=['HAPROXYHTTP']):
+                lfh.write(line + u'\n')
+
+        print('{0} lines, {1:.1f} MB, {2} CPUs'.format(
+            args.lines, os.path.getsize(path) / 1e6, cpus))
+        runs = [('single', lambda: single_process(path))]
+        runs.extend(('{0} workers'.format(count),
+                     lambda count=count: parallel(path, count))
+                    for count in workers)
+        for label, func in runs:
+            start = time.time()
+            matched = func()
+            elapsed = time.time() - start
+            print('{0:>10}: {1:10.0f} lines/s ({2} matched)'.format(
+                label, args.lines / elapsed, matched))
+    finally:
+        shutil.rmtree(tmp_dir)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,65 @@
+# vim: set et ts=4 sw=4 fileencoding=utf-8:
+'''
+benchmarks.bench_records
+========================
+
+Compare the memory kept per result and the search throughput of the
+dictionary, record and tuple output modes, with and without interning
+the fields with few distinct values, on haproxy log lines.
+'''
+from __future__ import print_function
+
+import argparse
+import sys
+import timeit
+import tracemalloc
+
+from yalp_grok import compile_pattern, grok_search
+
+from .corpus import format_lines
+
+PATTERN = '%{HAPROXYHTTP}'
+
+
+def retained_bytes(lines, compiled):
+    '''
+    Bytes allocated by the results of searching compiled in lines and
+    still held once they are all kept, per result.
+    '''
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        results = [grok_search(line, compiled) for line in lines]
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return (after - before) / float(len(results))
+
+
+def main(argv=None):
+    ''' Run the benchmark '''
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--lines', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    lines = format_lines('haproxy_http', args.lines)
+    print('{0} fields, {1} lines'.format(
+        len(compile_pattern(PATTERN, captures='named').fields), len(lines)))
+    for output, intern in (('dict', None), ('record', None),
+                           ('tuple', None), ('dict', 'auto'),
+                           ('tuple', 'auto')):
+        compiled = compile_pattern(PATTERN, auto_map=True, captures='named',
+                                   output=output, intern=intern)
+        per_result = retained_bytes(lines, compiled)
+        best = min(timeit.repeat(
+            lambda: [grok_search(line, compiled) for line in lines],
+            number=1, repeat=args.repeat))
+        print('{0:>14}: {1:7.0f} bytes/result {2:10.0f} lines/s'.format(
+            output + (' interned' if intern else ''), per_result,
+            len(lines) / best))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
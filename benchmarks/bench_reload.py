@@ -0,0 +1,92 @@
+# vim: set et ts=4 sw=4 fileencoding=utf-8:
+'''
+benchmarks.bench_reload
+=======================
+
+Compare compiling every pattern again with WatchedPatterns.check()
+recompiling only the patterns depending on an edited pattern file, with
+the log line patterns of the bundled pattern files registered.
+'''
+from __future__ import print_function
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+
+import regex
+
+from yalp_grok import WatchedPatterns, exceptions
+from yalp_grok.yalp_grok import PREDEFINED_PATTERNS
+
+# Pattern edited by the benchmark, overriding the bundled definition
+EDITED = 'SYSLOGPROG'
+
+
+def pattern_names():
+    '''
+    Names of the bundled patterns which compile on their own.
+    '''
+    names = []
+    for name in sorted(PREDEFINED_PATTERNS):
+        try:
+            PREDEFINED_PATTERNS.expand_name(name)
+        except exceptions.GrokError:
+            continue
+        names.append(name)
+    return names
+
+
+def main(argv=None):
+    ''' Run the benchmark '''
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    patterns_dir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(patterns_dir, 'custom')
+        definition = PREDEFINED_PATTERNS[EDITED].regex_str
+
+        def _write(suffix):
+            with open(path, 'w') as pfh:
+                pfh.write('{0} {1}{2}\n'.format(EDITED, definition, suffix))
+            stat = os.stat(path)
+            os.utime(path, (stat.st_atime, stat.st_mtime + 1))
+
+        _write('')
+        names = pattern_names()
+
+        def _compile_all():
+            # Leave the cache of the regex module out of the comparison
+            regex.purge()
+            watched = WatchedPatterns([patterns_dir])
+            for name in names:
+                watched.add(name, '%{' + name + '}')
+            return watched
+
+        watched = _compile_all()
+        edits = []
+
+        def _check():
+            edits.append(None)
+            _write('(?:)' * len(edits))
+            return watched.check()
+
+        recompiled = len(_check())
+        full = min(timeit.repeat(_compile_all, number=1, repeat=args.repeat))
+        partial = min(timeit.repeat(_check, number=1, repeat=args.repeat))
+    finally:
+        shutil.rmtree(patterns_dir)
+
+    print('{0} patterns, {1} depending on {2}'.format(
+        len(names), recompiled, EDITED))
+    print('{0:>12}: {1:8.1f} ms'.format('compile all', full * 1000))
+    print('{0:>12}: {1:8.1f} ms'.format('check', partial * 1000))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,147 @@
+# vim: set et ts=4 sw=4 fileencoding=utf-8:
+'''
+benchmarks.bench_router
+=======================
+
+Compare a Router matching the syslog header once and then the body
+pattern of the program, with trying full line patterns one by one and
+with a GrokSet of the full line patterns, on syslog lines of several
+programs.
+'''
+from __future__ import print_function
+
+import argparse
+import functools
+import random
+import sys
+import timeit
+
+from yalp_grok import compile_pattern, compile_patterns, compile_router
+
+from .bench_grokset import combined, sequential
+from .corpus import HOSTS, WORDS, _ip, _syslog_timestamp
+
+HEADER = '^%{SYSLOGBASE}'
+
+BODIES = [
+    ('sshd', r' Accepted %{WORD:method} for %{USER:user} from %{IP:client} '
+             r'port %{INT:port} ssh2'),
+    ('sshd', r' Failed %{WORD:method} for (?:invalid user )?%{USER:user} '
+             r'from %{IP:client} port %{INT:port} ssh2'),
+    ('cron', r' \(%{USER:user}\) CMD \(%{GREEDYDATA:command}\)'),
+    ('postfix/smtpd', r' connect from %{HOSTNAME:client_host}'
+                      r'\[%{IP:client}\]'),
+    ('postfix/qmgr', r' %{WORD:queue_id}: from=<%{USER:sender}@'
+                     r'%{HOSTNAME:sender_domain}>, '
+                     r'size=%{INT:size}, nrcpt=%{INT:recipients}'),
+    ('dhclient', r' DHCPACK of %{IP:address} from %{IP:server}'),
+    ('ntpd', r' adjusting local clock by %{NUMBER:offset}s'),
+]
+
+FALLBACK = [('other', r' %{GREEDYDATA:message}')]
+
+# Body of the services added with --services, logging through the same
+# library so that their lines share the literals of their pattern
+SERVICE_BODY = (r' %{{LOGLEVEL:level}} {0} %{{WORD:action}} took '
+                r'%{{INT:took_ms}} ms')
+
+
+def service_bodies(services):
+    '''
+    Return (program, body pattern) pairs of services services.
+    '''
+    return [('svc{0}'.format(number),
+             SERVICE_BODY.format('component{0}'.format(number)))
+            for number in range(services)]
+
+
+def syslog_lines(count, services=0, seed=0):
+    '''
+    Return count syslog lines of the programs of BODIES, of services
+    services and of a few others matched by the fallback pattern only.
+    '''
+    rand = random.Random(seed)
+    bodies = [
+        ('sshd', lambda: 'Accepted publickey for {0} from {1} port {2} '
+                         'ssh2'.format(rand.choice(WORDS), _ip(rand),
+                                       rand.randint(1024, 65535))),
+        ('sshd', lambda: 'Failed password for invalid user {0} from {1} '
+                         'port {2} ssh2'.format(rand.choice(WORDS), _ip(rand),
+                                                rand.randint(1024, 65535))),
+        ('cron', lambda: '(root) CMD (run-parts /etc/cron.{0})'.format(
+            rand.choice(['hourly', 'daily']))),
+        ('postfix/smtpd', lambda: 'connect from mail{0}.example.com'
+                                  '[{1}]'.format(rand.randint(1, 9),
+                                                 _ip(rand))),
+        ('postfix/qmgr', lambda: '{0:X}: from=<{1}@example.com>, size={2}, '
+                                 'nrcpt=1'.format(rand.getrandbits(40),
+                                                  rand.choice(WORDS),
+                                                  rand.randint(100, 99999))),
+        ('dhclient', lambda: 'DHCPACK of {0} from {1}'.format(_ip(rand),
+                                                              _ip(rand))),
+        ('ntpd', lambda: 'adjusting local clock by {0:.6f}s'.format(
+            rand.uniform(-1, 1))),
+        ('kernel', lambda: ' '.join(rand.choice(WORDS) for _ in range(6))),
+    ]
+    for number in range(services):
+        bodies.append(('svc{0}'.format(number), functools.partial(
+            lambda number: 'INFO component{0} {1} took {2} ms'.format(
+                number, rand.choice(WORDS), rand.randint(1, 999)), number)))
+    lines = []
+    for _ in range(count):
+        program, body = rand.choice(bodies)
+        lines.append('{0} {1} {2}[{3}]: {4}'.format(
+            _syslog_timestamp(rand), rand.choice(HOSTS), program,
+            rand.randint(100, 65535), body()))
+    return lines
+
+
+def routed(lines, router):
+    ''' Match every line with the Router '''
+    search = router.search
+    return [search(line) for line in lines]
+
+
+def main(argv=None):
+    ''' Run the benchmark '''
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--lines', type=int, default=20000)
+    parser.add_argument('--services', type=int, default=50,
+                        help='programs sharing one log format to add')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    lines = syslog_lines(args.lines, args.services)
+    bodies = BODIES + service_bodies(args.services)
+    full = [(program, HEADER + body) for program, body in bodies + FALLBACK]
+    compiled = [(program, compile_pattern(pattern))
+                for program, pattern in full]
+    grokset = compile_patterns(full)
+    routes = {}
+    for program, body in bodies:
+        routes.setdefault(program, []).append(body)
+    router = compile_router(
+        HEADER, 'program',
+        dict((program, '(?:{0})'.format('|'.join(bodies)))
+             for program, bodies in routes.items()),
+        FALLBACK)
+
+    seq = sequential(lines, compiled)
+    differ = sum(1 for left, right in zip(seq, routed(lines, router))
+                 if left != right)
+    differ += sum(1 for left, right in zip(seq, combined(lines, grokset))
+                  if left != right)
+
+    print('{0} body patterns, {1} lines'.format(len(bodies), len(lines)))
+    for label, func, arg in (('sequential', sequential, compiled),
+                             ('grokset', combined, grokset),
+                             ('router', routed, router)):
+        best = min(timeit.repeat(lambda: func(lines, arg),
+                                 number=1, repeat=args.repeat))
+        print('{0:>12}: {1:10.0f} lines/s'.format(label, len(lines) / best))
+    print('results differing from sequential: {0}'.format(differ))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,61 @@
+# vim: set et ts=4 sw=4 fileencoding=utf-8:
+'''
+benchmarks.bench_threads
+========================
+
+Compare searching generated haproxy lines with a grok_search() loop and
+with grok_search_batch() on pools of 1 to --max-threads threads, which
+search without holding the GIL. Speedups are bounded by the number of
+CPUs of the machine.
+'''
+from __future__ import print_function
+
+import argparse
+import multiprocessing
+import sys
+import timeit
+from multiprocessing.pool import ThreadPool
+
+from yalp_grok import compile_pattern, grok_search, grok_search_batch
+
+from .corpus import format_lines
+
+
+def main(argv=None):
+    ''' Run the benchmark '''
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--lines', type=int, default=20000)
+    parser.add_argument('--miss-ratio', type=float, default=0.1)
+    parser.add_argument('--max-threads', type=int, default=8)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    compiled = compile_pattern('%{HAPROXYHTTP}')
+    lines = format_lines('haproxy_http', args.lines,
+                         miss_ratio=args.miss_ratio)
+    print('{0} lines, {1} CPUs'.format(len(lines),
+                                       multiprocessing.cpu_count()))
+
+    loop = min(timeit.repeat(
+        lambda: [grok_search(line, compiled) for line in lines],
+        number=1, repeat=args.repeat))
+    print('{0:>10}: {1:10.0f} lines/s'.format('loop', len(lines) / loop))
+
+    threads = 1
+    while threads <= args.max_threads:
+        pool = ThreadPool(threads)
+        try:
+            elapsed = min(timeit.repeat(
+                lambda: grok_search_batch(lines, compiled, threads, pool),
+                number=1, repeat=args.repeat))
+        finally:
+            pool.close()
+            pool.join()
+        print('{0:>2} threads: {1:10.0f} lines/s, {2:4.2f}x the loop'.format(
+            threads, len(lines) / elapsed, loop / elapsed))
+        threads *= 2
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,67 @@
+# vim: set et ts=4 sw=4 fileencoding=utf-8:
+'''
+benchmarks.bench_timestamps
+===========================
+
+Compare converting the HTTPDATE timestamps of a dense log, where several
+lines share each second, with datetime.strptime() and with the datetime
+conversion of yalp_grok, with and without its parse cache.
+'''
+from __future__ import print_function
+
+import argparse
+import datetime
+import sys
+import timeit
+
+from yalp_grok import timestamps
+from yalp_grok.timestamps import to_datetime
+
+HTTPDATE_FORMAT = '%d/%b/%Y:%H:%M:%S %z'
+
+
+def dense_timestamps(count, per_second):
+    '''
+    count HTTPDATE timestamps, each second logged per_second times.
+    '''
+    start = datetime.datetime(2016, 3, 25, 5, 55, 32)
+    return [(start + datetime.timedelta(seconds=number // per_second))
+            .strftime('%d/%b/%Y:%H:%M:%S -0700') for number in range(count)]
+
+
+def main(argv=None):
+    ''' Run the benchmark '''
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--lines', type=int, default=50000)
+    parser.add_argument('--per-second', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    values = dense_timestamps(args.lines, args.per_second)
+    strptime = datetime.datetime.strptime
+    parse = timestamps._datetime.__wrapped__
+    assert to_datetime(values[0]) == strptime(values[0], HTTPDATE_FORMAT)
+
+    def cached():
+        ''' Conversions starting from an empty cache '''
+        timestamps._datetime.cache_clear()
+        return [to_datetime(value) for value in values]
+
+    cases = (
+        ('strptime', lambda: [strptime(value, HTTPDATE_FORMAT)
+                              for value in values]),
+        ('to_datetime, no cache', lambda: [parse(value, None)
+                                           for value in values]),
+        ('to_datetime', cached),
+    )
+    print('{0} timestamps, {1} per second'.format(len(values),
+                                                  args.per_second))
+    for label, func in cases:
+        best = min(timeit.repeat(func, number=1, repeat=args.repeat))
+        print('{0:>22}: {1:10.0f} timestamps/s'.format(
+            label, len(values) / best))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
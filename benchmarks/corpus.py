@@ -0,0 +1,250 @@
+# vim: set et ts=4 sw=4 fileencoding=utf-8:
+'''
+benchmarks.corpus
+=================
+
+Sample log lines for the formats of the bundled pattern files.
+
+SAMPLES holds one fixed line per pattern. FORMATS generates varied lines
+for the main log formats from a seeded random generator, so that every
+run of the benchmarks parses the exact same corpus.
+'''
+import random
+
+# Pattern name to a line it matches
+SAMPLES = {
+    'COMBINEDAPACHELOG': (
+        '127.0.0.1 - frank [10/Oct/2000:13:55:36 -0700] "GET /apache_pb.gif '
+        'HTTP/1.0" 200 2326 "http://www.example.com/start.html" '
+        '"Mozilla/4.08 [en] (Win98; I ;Nav)"'),
+    'SYSLOGLINE': (
+        'Mar 25 05:55:32 web01 sshd[4242]: Accepted publickey for deploy '
+        'from 10.0.0.8 port 51234 ssh2'),
+    'HAPROXYHTTP': (
+        'Sep 14 02:01:37 lb haproxy[14387]: 10.0.1.2:33317 '
+        '[06/Feb/2009:12:14:14.655] http-in static/srv1 10/0/30/69/109 200 '
+        '2750 - - ---- 1/1/1/1/0 0/0 {1wt.eu} {} "GET /index.html HTTP/1.1"'),
+    'HAPROXYTCP': (
+        'Sep 14 02:01:37 lb haproxy[14387]: 10.0.1.2:33317 '
+        '[06/Feb/2009:12:14:14.655] tcp-in backend/srv1 0/0/5007 212 -- '
+        '0/0/0/0/3 0/0'),
+    'NAGIOSLOGLINE': (
+        '[1427925600] SERVICE ALERT: web01;HTTP;CRITICAL;HARD;3;CRITICAL - '
+        'Socket timeout after 10 seconds'),
+    'POSTGRESQL': '2015-04-01 12:00:01 UTC dbuser 5520a1b2.1f40 4242',
+    'REDISLOG': (
+        '[4018] 14 Nov 07:01:22.119 * Background saving terminated with '
+        'success'),
+    'RUBY_LOGGER': (
+        'I, [2015-04-01T12:00:01.123456 #4242]  INFO -- app: Completed 200 '
+        'OK in 12ms'),
+    'JAVASTACKTRACEPART': (
+        '  at org.example.service.Handler.process(Handler.java:142)'),
+    'CISCOFW106023': (
+        'Deny tcp src outside:192.0.2.10/51234 dst inside:10.1.1.5/443 by '
+        'access-group "outside_in" [0x0, 0x0]'),
+    'CISCOFW302013_302014_302015_302016': (
+        'Built inbound TCP connection 7324 for outside:192.0.2.10/51234 '
+        '(192.0.2.10/51234) to inside:10.1.1.5/443 (203.0.113.5/443)'),
+    'SYSLOG5424LINE': (
+        '<34>1 2015-04-01T12:00:01.003Z mymachine su - ID47 - su root '
+        'failed on /dev/pts/8'),
+}
+
+# Lines none of the bundled log formats should match
+MISSES = [
+    '--- cut here ---',
+    'Traceback (most recent call last):',
+    '    raise ValueError("unexpected value %r" % (value,))',
+    'connection reset by peer while reading response header',
+]
+
+
+def mixed_lines(count, seed=0, miss_ratio=0.0, names=None):
+    '''
+    Return count lines picked at random from SAMPLES, restricted to names
+    if given, with roughly miss_ratio of them taken from MISSES.
+    '''
+    rand = random.Random(seed)
+    hits = [SAMPLES[name] for name in sorted(names or SAMPLES)]
+    lines = []
+    for _ in range(count):
+        if rand.random() < miss_ratio:
+            lines.append(rand.choice(MISSES))
+        else:
+            lines.append(rand.choice(hits))
+    return lines
+
+
+MONTHS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep',
+          'Oct', 'Nov', 'Dec']
+HOSTS = ['web01', 'web02', 'db01', 'lb01', 'cache-3', 'worker7']
+PATHS = ['/', '/index.html', '/api/v1/users', '/api/v1/orders/1234',
+         '/static/app.js', '/static/img/logo.png', '/login', '/search']
+AGENTS = [
+    'Mozilla/5.0 (X11; Linux x86_64; rv:38.0) Gecko/20100101 Firefox/38.0',
+    'Mozilla/5.0 (Windows NT 6.1; WOW64) AppleWebKit/537.36 (KHTML, like '
+    'Gecko) Chrome/36.0.1985.125 Safari/537.36',
+    'curl/7.43.0',
+    'python-requests/2.7.0',
+]
+WORDS = ['connection', 'accepted', 'closed', 'timeout', 'user', 'session',
+         'opened', 'for', 'from', 'request', 'failed', 'retrying']
+
+
+def _ip(rand):
+    return '{0}.{1}.{2}.{3}'.format(rand.randint(1, 223), rand.randint(0, 255),
+                                    rand.randint(0, 255), rand.randint(1, 254))
+
+
+def _clock(rand):
+    return '{0:02d}:{1:02d}:{2:02d}'.format(
+        rand.randint(0, 23), rand.randint(0, 59), rand.randint(0, 59))
+
+
+def _syslog_timestamp(rand):
+    return '{0} {1:>2} {2}'.format(rand.choice(MONTHS), rand.randint(1, 28),
+                                   _clock(rand))
+
+
+def _http_date(rand):
+    return '{0:02d}/{1}/{2}:{3} {4}'.format(
+        rand.randint(1, 28), rand.choice(MONTHS), rand.randint(2010, 2016),
+        _clock(rand), rand.choice(['-0700', '+0000', '+0200']))
+
+
+def _sentence(rand, words):
+    return ' '.join(rand.choice(WORDS) for _ in range(words))
+
+
+def _combined(rand):
+    return '{0} - {1} [{2}] "{3} {4} HTTP/1.{5}" {6} {7} "{8}" "{9}"'.format(
+        _ip(rand), rand.choice(['-', 'frank', 'alice']), _http_date(rand),
+        rand.choice(['GET', 'GET', 'GET', 'POST', 'HEAD']),
+        rand.choice(PATHS), rand.randint(0, 1),
+        rand.choice([200, 200, 200, 301, 304, 404, 500]),
+        rand.randint(0, 100000),
+        rand.choice(['-', 'http://www.example.com/start.html']),
+        rand.choice(AGENTS))
+
+
+def _nginx(rand):
+    # nginx writes the same combined format, with a dash for empty bodies
+    line = _combined(rand)
+    if rand.random() < 0.2:
+        head, _, tail = line.partition('" ')
+        status, _, rest = tail.partition(' ')
+        line = '{0}" {1} {2}'.format(head, status, '0' + rest[rest.find(' '):])
+    return line
+
+
+def _syslog(rand):
+    return '{0} {1} {2}[{3}]: {4}'.format(
+        _syslog_timestamp(rand), rand.choice(HOSTS),
+        rand.choice(['sshd', 'cron', 'kernel', 'postfix/smtpd']),
+        rand.randint(100, 65535), _sentence(rand, rand.randint(3, 12)))
+
+
+def _haproxy_prefix(rand):
+    return '{0} {1} haproxy[{2}]: {3}:{4} [{5:02d}/{6}/{7}:{8}.{9:03d}]'.format(
+        _syslog_timestamp(rand), rand.choice(HOSTS), rand.randint(100, 65535),
+        _ip(rand), rand.randint(1024, 65535), rand.randint(1, 28),
+        rand.choice(MONTHS), rand.randint(2010, 2016), _clock(rand),
+        rand.randint(0, 999))
+
+
+def _haproxy_http(rand):
+    return ('{0} http-in {1}/srv{2} {3}/0/{4}/{5}/{6} {7} {8} - - ---- '
+            '{9}/{9}/1/1/0 0/0 {{{10}}} {{}} "{11} {12} HTTP/1.1"').format(
+                _haproxy_prefix(rand), rand.choice(['static', 'app', 'api']),
+                rand.randint(1, 9), rand.randint(0, 50), rand.randint(0, 10),
+                rand.randint(1, 500), rand.randint(10, 1000),
+                rand.choice([200, 200, 302, 404, 503]),
+                rand.randint(100, 50000), rand.randint(1, 300),
+                rand.choice(['1wt.eu', 'example.com', '']),
+                rand.choice(['GET', 'POST']), rand.choice(PATHS))
+
+
+def _haproxy_tcp(rand):
+    return '{0} tcp-in {1}/srv{2} 0/{3}/{4} {5} -- {6}/{6}/0/0/3 0/0'.format(
+        _haproxy_prefix(rand), rand.choice(['db', 'redis', 'smtp']),
+        rand.randint(1, 9), rand.randint(0, 10), rand.randint(10, 60000),
+        rand.randint(0, 100000), rand.randint(1, 300))
+
+
+def _nagios(rand):
+    state = rand.choice(['OK', 'WARNING', 'CRITICAL'])
+    return '[{0}] SERVICE ALERT: {1};{2};{3};{4};{5};{3} - {6}'.format(
+        rand.randint(1400000000, 1500000000), rand.choice(HOSTS),
+        rand.choice(['HTTP', 'SSH', 'Disk usage', 'Load']), state,
+        rand.choice(['SOFT', 'HARD']), rand.randint(1, 3),
+        _sentence(rand, rand.randint(2, 6)))
+
+
+def _postgresql(rand):
+    return '{0}-{1:02d}-{2:02d} {3} UTC {4} {5:08x}.{6:04x} {7}'.format(
+        rand.randint(2010, 2016), rand.randint(1, 12), rand.randint(1, 28),
+        _clock(rand), rand.choice(['postgres', 'app', 'report']),
+        rand.getrandbits(32), rand.getrandbits(16), rand.randint(100, 65535))
+
+
+def _redis(rand):
+    return '[{0}] {1:02d} {2} {3}.{4:03d} * {5}'.format(
+        rand.randint(100, 65535), rand.randint(1, 28), rand.choice(MONTHS),
+        _clock(rand), rand.randint(0, 999),
+        rand.choice(['Background saving started by pid 4242',
+                     'DB saved on disk', '1 changes in 900 seconds. Saving...',
+                     'Background saving terminated with success']))
+
+
+def _java(rand):
+    package = rand.choice(['org.example.service', 'com.acme.billing',
+                           'net.sample.http.server'])
+    klass = rand.choice(['Handler', 'Dispatcher', 'InvoiceService'])
+    return '  at {0}.{1}.{2}({1}.java:{3})'.format(
+        package, klass, rand.choice(['process', 'run', 'handle', 'invoke']),
+        rand.randint(1, 2000))
+
+
+def _miss(rand):
+    return rand.choice(MISSES) if rand.random() < 0.5 else \
+        _sentence(rand, rand.randint(1, 10))
+
+
+# Format name to the pattern matching it and the generator of its lines
+FORMATS = {
+    'apache': ('%{COMBINEDAPACHELOG}', _combined),
+    'nginx': ('%{COMBINEDAPACHELOG}', _nginx),
+    'syslog': ('%{SYSLOGLINE}', _syslog),
+    'haproxy_http': ('%{HAPROXYHTTP}', _haproxy_http),
+    'haproxy_tcp': ('%{HAPROXYTCP}', _haproxy_tcp),
+    'nagios': ('%{NAGIOSLOGLINE}', _nagios),
+    'postgresql': ('%{POSTGRESQL}', _postgresql),
+    'redis': ('%{REDISLOG}', _redis),
+    'java': ('%{JAVASTACKTRACEPART}', _java),
+}
+
+# Formats whose lines also match the pattern of another format
+CONTAINED = {
+    'syslog': ('haproxy_http', 'haproxy_tcp'),
+}
+
+
+def format_lines(name, count, seed=0, miss_ratio=0.0):
+    '''
+    Return count generated lines of format name, with roughly miss_ratio
+    of them taken from the other formats or from lines matching none.
+    '''
+    rand = random.Random('{0}:{1}'.format(seed, name))
+    generate = FORMATS[name][1]
+    others = [FORMATS[other][1] for other in sorted(FORMATS)
+              if FORMATS[other][0] != FORMATS[name][0] and
+              other not in CONTAINED.get(name, ())]
+    others.append(_miss)
+    lines = []
+    for _ in range(count):
+        if rand.random() < miss_ratio:
+            lines.append(rand.choice(others)(rand))
+        else:
+            lines.append(generate(rand))
+    return lines
@@ -0,0 +1,209 @@
+# vim: set et ts=4 sw=4 fileencoding=utf-8:
+'''
+benchmarks.suite
+================
+
+Measure import time, compile time, matching throughput and peak memory
+on generated corpora of the main bundled log formats, and compare the
+results with a stored baseline. Throughput on lines which do not match
+is also measured with patterns compiled in the 'match' mode.
+
+Results are written as JSON: a "meta" object describing the run and a
+flat "metrics" object. Metrics ending in "_per_s" are better when higher,
+all others when lower. The stored baseline was measured on one machine,
+regenerate it with --write-baseline before comparing on another.
+'''
+from __future__ import print_function
+
+import argparse
+import json
+import os
+import platform
+import sys
+import timeit
+import tracemalloc
+
+import regex as re
+
+from yalp_grok import compile_pattern, grok_search
+from yalp_grok.version import __version__
+from yalp_grok.yalp_grok import PREDEFINED_PATTERNS
+
+from . import bench_import
+from .corpus import FORMATS, format_lines
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             'baseline.json')
+
+# Share of lines matching the pattern of the format in each mix
+MIXES = {'hits': 0.1, 'misses': 0.9}
+
+# Mixes also measured with patterns matched at the start of lines only
+MATCH_MODE_MIXES = ('misses',)
+
+# Relative slowdown tolerated before a metric counts as a regression
+DEFAULT_TOLERANCE = 0.25
+
+
+def compile_time(pattern, repeat):
+    '''
+    Return the best time in milliseconds of compiling pattern from
+    scratch.
+    '''
+    def _compile():
+        # Drop memoized expansions and the regex module cache so that
+        # nothing is reused between runs
+        PREDEFINED_PATTERNS._expanded.clear()  # pylint: disable=W0212
+        re.purge()
+        compile_pattern(pattern)
+
+    return min(timeit.repeat(_compile, number=1, repeat=repeat)) * 1000.0
+
+
+def throughput(lines, compiled, repeat):
+    '''
+    Return the best number of lines searched per second.
+    '''
+    best = min(timeit.repeat(
+        lambda: [grok_search(line, compiled) for line in lines],
+        number=1, repeat=repeat))
+    return len(lines) / best
+
+
+def peak_memory(lines, compiled):
+    '''
+    Return the peak memory in kB allocated while parsing lines into a list
+    of results.
+    '''
+    tracemalloc.start()
+    try:
+        results = [grok_search(line, compiled) for line in lines]
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    del results
+    return peak / 1000.0
+
+
+def run(formats, lines, seed=0, repeat=3, import_runs=15):
+    '''
+    Run the benchmarks on formats and return the results.
+    '''
+    metrics = {}
+    if import_runs:
+        timings = bench_import.measure(import_runs)
+        metrics['import.overhead_ms'] = timings['overhead']
+        metrics['import.first_compile_ms'] = timings['first_compile']
+
+    for name in formats:
+        pattern = FORMATS[name][0]
+        metrics['compile.{0}_ms'.format(name)] = compile_time(pattern,
+                                                              repeat)
+        compiled = compile_pattern(pattern)
+        anchored = compile_pattern(pattern, mode='match')
+        for mix, miss_ratio in sorted(MIXES.items()):
+            corpus = format_lines(name, lines, seed, miss_ratio)
+            metrics['throughput.{0}.{1}_lines_per_s'.format(name, mix)] = \
+                throughput(corpus, compiled, repeat)
+            if mix in MATCH_MODE_MIXES:
+                metrics['throughput.{0}.{1}_match_lines_per_s'.format(
+                    name, mix)] = throughput(corpus, anchored, repeat)
+        metrics['memory.{0}_peak_kb'.format(name)] = peak_memory(
+            format_lines(name, lines, seed), compiled)
+
+    return {
+        'meta': {
+            'yalp_grok': __version__,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'lines': lines,
+            'seed': seed,
+        },
+        'metrics': metrics,
+    }
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    '''
+    Compare the metrics of results with those of baseline.
+
+    Returns (name, baseline value, value, relative change) for every
+    metric of both, the change being positive when the metric got worse,
+    and the names of the metrics worse by more than tolerance.
+    '''
+    rows = []
+    regressions = []
+    for name in sorted(results['metrics']):
+        if name not in baseline['metrics']:
+            continue
+        value = results['metrics'][name]
+        base = baseline['metrics'][name]
+        if not base:
+            continue
+        change = (value - base) / abs(float(base))
+        if name.endswith('_per_s'):
+            change = -change
+        rows.append((name, base, value, change))
+        if change > tolerance:
+            regressions.append(name)
+    return rows, regressions
+
+
+def main(argv=None):
+    ''' Run the benchmark suite '''
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--lines', type=int, default=5000,
+                        help='lines per corpus')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--import-runs', type=int, default=15,
+                        help='interpreters started to time imports, 0 to '
+                             'skip')
+    parser.add_argument('--format', dest='formats', action='append',
+                        choices=sorted(FORMATS),
+                        help='format to benchmark, all by default')
+    parser.add_argument('--output', help='file to write the results to')
+    parser.add_argument('--baseline', default=BASELINE_FILE,
+                        help='results to compare with')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument('--write-baseline', action='store_true',
+                        help='store the results as the new baseline')
+    args = parser.parse_args(argv)
+
+    results = run(args.formats or sorted(FORMATS), args.lines, args.seed,
+                  args.repeat, args.import_runs)
+    if args.output:
+        _write(results, args.output)
+    if args.write_baseline:
+        _write(results, BASELINE_FILE)
+        print('baseline written to {0}'.format(BASELINE_FILE))
+        return 0
+
+    if not os.path.exists(args.baseline):
+        for name, value in sorted(results['metrics'].items()):
+            print('{0:<45} {1:12.2f}'.format(name, value))
+        return 0
+
+    with open(args.baseline) as bfh:
+        baseline = json.load(bfh)
+    rows, regressions = compare(results, baseline, args.tolerance)
+    print('{0:<45} {1:>12} {2:>12} {3:>8}'.format(
+        'metric', 'baseline', 'current', 'worse'))
+    for name, base, value, change in rows:
+        print('{0:<45} {1:12.2f} {2:12.2f} {3:8.1%}{4}'.format(
+            name, base, value, change,
+            ' REGRESSION' if name in regressions else ''))
+    return 1 if regressions else 0
+
+
+def _write(results, path):
+    '''
+    Write results as JSON.
+    '''
+    with open(path, 'w') as rfh:
+        json.dump(results, rfh, indent=2, sort_keys=True)
+        rfh.write('\n')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -45,6 +45,7 @@ SETUP_KWARGS = {
     ],
     'packages': find_packages(exclude=[
         '*.tests*', '*.tests.*', 'tests.*', 'tests',
+        'benchmarks.*', 'benchmarks',
     ]),
     # 'package_data': {
     #     'yalp_gork': [
@@ -59,6 +60,12 @@ SETUP_KWARGS = {
     'include_package_data': True,
     'data_files': [],
     'install_requires': REQUIREMENTS,
+    'extras_require': {
+        'numpy': ['numpy'],
+    },
+    'entry_points': {
+        'console_scripts': ['yalp-grok = yalp_grok.cli:main'],
+    },
 }
 
 if __name__ == '__main__':
@@ -0,0 +1,51 @@
+# vim: set et ts=4 sw=4 fileencoding=utf-8:
+'''
+tests.test_batch
+================
+'''
+import unittest
+from multiprocessing.pool import ThreadPool
+
+from yalp_grok import compile_pattern, grok_search, grok_search_batch
+
+PATTERN = '%{WORD:name} %{INT:age:int}'
+LINES = ['gary 25', 'not a match', 'tim 30', 'ann x', 'bob 41'] * 7
+
+
+class TestGrokSearchBatch(unittest.TestCase):
+    ''' Test searching batches of lines with threads '''
+
+    def setUp(self):
+        self.compiled = compile_pattern(PATTERN)
+        self.expected = [grok_search(line, self.compiled) for line in LINES]
+
+    def test_threads(self):
+        for threads in (1, 2, 3, 8):
+            self.assertEqual(
+                grok_search_batch(LINES, self.compiled, threads=threads),
+                self.expected)
+
+    def test_pool(self):
+        pool = ThreadPool(2)
+        self.addCleanup(pool.join)
+        self.addCleanup(pool.close)
+        for _ in range(2):
+            self.assertEqual(
+                grok_search_batch(iter(LINES), self.compiled, 2, pool),
+                self.expected)
+
+    def test_plain_tuple_and_empty(self):
+        self.assertEqual(
+            grok_search_batch(LINES, (self.compiled.regex,
+                                      self.compiled.type_map), threads=2),
+            self.expected)
+        self.assertEqual(grok_search_batch([], self.compiled, threads=2), [])
+
+    def test_instrumented(self):
+        compiled = compile_pattern(PATTERN, instrument=True)
+        grok_search_batch(LINES, compiled, threads=2)
+        self.assertEqual(compiled.stats.snapshot().searches, len(LINES))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+# vim: set et ts=4 sw=4 fileencoding=utf-8:
+'''
+tests.test_benchmarks
+=====================
+'''
+import unittest
+
+from benchmarks.corpus import FORMATS, format_lines
+from benchmarks.suite import compare
+from yalp_grok import compile_pattern, grok_search
+
+
+class TestCorpus(unittest.TestCase):
+    ''' Test the generated benchmark corpora '''
+
+    def test_deterministic(self):
+        self.assertEqual(format_lines('apache', 50, seed=1),
+                         format_lines('apache', 50, seed=1))
+        self.assertNotEqual(format_lines('apache', 50, seed=1),
+                            format_lines('apache', 50, seed=2))
+
+    def test_hits_and_misses(self):
+        for name, (pattern, _) in FORMATS.items():
+            compiled = compile_pattern(pattern)
+            for line in format_lines(name, 200):
+                self.assertIsNotNone(grok_search(line, compiled), line)
+            for line in format_lines(name, 200, miss_ratio=1.0):
+                self.assertIsNone(grok_search(line, compiled), line)
+
+
+class TestCompare(unittest.TestCase):
+    ''' Test comparing results with a baseline '''
+
+    def test_regressions(self):
+        baseline = {'metrics': {'compile.a_ms': 10.0,
+                                'throughput.a.hits_lines_per_s': 1000.0,
+                                'memory.a_peak_kb': 100.0}}
+        results = {'metrics': {'compile.a_ms': 20.0,
+                               'throughput.a.hits_lines_per_s': 2000.0,
+                               'memory.a_peak_kb': 110.0,
+                               'compile.b_ms': 1.0}}
+        rows, regressions = compare(results, baseline, tolerance=0.25)
+        self.assertEqual(regressions, ['compile.a_ms'])
+        self.assertEqual(dict((row[0], row[3]) for row in rows), {
+            'compile.a_ms': 1.0,
+            'memory.a_peak_kb': 0.1,
+            'throughput.a.hits_lines_per_s': -1.0,
+        })
@@ -0,0 +1,97 @@
+# vim: set et ts=4 sw=4 fileencoding=utf-8:
+'''
+tests.test_cache
+================
+'''
+import unittest
+
+from yalp_grok import (
+    grok_match,
+    clear_pattern_cache,
+    pattern_cache_info,
+    set_pattern_cache_size,
+)
+from yalp_grok.cache import LRUCache
+from yalp_grok.yalp_grok import DEFAULT_PATTERN_CACHE_SIZE
+
+
+class TestLRUCache(unittest.TestCase):
+    ''' Test the generic LRU cache '''
+
+    def test_hits_and_misses(self):
+        cache = LRUCache(2)
+        self.assertIsNone(cache.get('a'))
+        cache.put('a', 1)
+        self.assertEqual(cache.get('a'), 1)
+        info = cache.info()
+        self.assertEqual(info.hits, 1)
+        self.assertEqual(info.misses, 1)
+        self.assertEqual(info.currsize, 1)
+
+    def test_eviction_order(self):
+        cache = LRUCache(2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache)
+        self.assertIn('c', cache)
+
+    def test_shrink(self):
+        cache = LRUCache(None)
+        for i in range(10):
+            cache.put(i, i)
+        cache.maxsize = 3
+        self.assertEqual(len(cache), 3)
+        self.assertIn(9, cache)
+
+    def test_disabled(self):
+        cache = LRUCache(0)
+        cache.put('a', 1)
+        self.assertEqual(len(cache), 0)
+
+    def test_clear(self):
+        cache = LRUCache()
+        cache.put('a', 1)
+        cache.get('a')
+        cache.clear()
+        self.assertEqual(cache.info(), (0, 0, 128, 0))
+
+
+class TestPatternCache(unittest.TestCase):
+    ''' Test memoization of compiled patterns in grok_match '''
+
+    def setUp(self):
+        set_pattern_cache_size(DEFAULT_PATTERN_CACHE_SIZE)
+        clear_pattern_cache()
+
+    def tearDown(self):
+        set_pattern_cache_size(DEFAULT_PATTERN_CACHE_SIZE)
+        clear_pattern_cache()
+
+    def test_reuse(self):
+        grok_match('1024', '%{INT:test_int}')
+        grok_match('2048', '%{INT:test_int}')
+        info = pattern_cache_info()
+        self.assertEqual(info.misses, 1)
+        self.assertEqual(info.hits, 1)
+        self.assertEqual(info.currsize, 1)
+
+    def test_key_includes_options(self):
+        self.assertEqual(grok_match('1024', '%{INT:num}'), {'num': '1024'})
+        self.assertEqual(grok_match('1024', '%{INT:num}', auto_map=True),
+                         {'num': 1024})
+        match = grok_match('a-1', '%{ID:num}',
+                           custom_patterns={'ID': '%{WORD}-%{INT}'})
+        self.assertEqual(match, {'num': 'a-1'})
+        self.assertEqual(pattern_cache_info().currsize, 3)
+
+    def test_size_limit(self):
+        set_pattern_cache_size(1)
+        grok_match('1024', '%{INT:a}')
+        grok_match('1024', '%{INT:b}')
+        grok_match('1024', '%{INT:a}')
+        info = pattern_cache_info()
+        self.assertEqual(info.misses, 3)
+        self.assertEqual(info.currsize, 1)
@@ -0,0 +1,137 @@
+# vim: set et ts=4 sw=4 fileencoding=utf-8:
+'''
+tests.test_cli
+==============
+'''
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+try:
+    from unittest import mock
+except ImportError:  # pragma: no cover
+    import mock
+
+from yalp_grok.cli import main
+
+PATTERN = '%{WORD:name} %{INT:age:int}'
+LINES = u'gary 25\nnot a match\ntim 30\n'
+
+
+class TestCli(unittest.TestCase):
+    ''' Test the command line tool '''
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        self.log = self._path('access.log')
+        with io.open(self.log, 'w', encoding='utf-8') as lfh:
+            lfh.write(LINES)
+        self.output = self._path('out')
+
+    def _path(self, name):
+        return os.path.join(self.tmp_dir, name)
+
+    def _read(self, path=None):
+        with io.open(path or self.output, encoding='utf-8') as ofh:
+            return ofh.read()
+
+    def _json(self):
+        return [json.loads(line) for line in self._read().splitlines()]
+
+    def test_json_lines(self):
+        self.assertEqual(main([PATTERN, self.log, '-o', self.output]), 0)
+        self.assertEqual(self._json(), [{'name': 'gary', 'age': 25},
+                                        {'name': 'tim', 'age': 30}])
+
+    def test_tsv_and_unmatched(self):
+        unmatched = self._path('unmatched')
+        main([PATTERN, self.log, self.log, '-f', 'tsv', '-o', self.output,
+              '-u', unmatched])
+        self.assertEqual(self._read(),
+                         u'name\tage\ngary\t25\ntim\t30\ngary\t25\ntim\t30\n')
+        self.assertEqual(self._read(unmatched),
+                         u'not a match\nnot a match\n')
+
+    def test_pattern_name_and_dirs(self):
+        patterns_dir = self._path('patterns')
+        os.mkdir(patterns_dir)
+        with open(os.path.join(patterns_dir, 'people'), 'w') as pfh:
+            pfh.write('PERSON %{WORD:name} %{INT:age}\n')
+        main(['-d', patterns_dir, '%{PERSON}', '-a', self.log,
+              '-o', self.output])
+        self.assertEqual(self._json()[1], {'name': 'tim', 'age': 30})
+        # Names of custom patterns are resolved once they are loaded
+        main(['PERSON', self.log, '-d', patterns_dir, '-w', '2',
+              '-o', self.output])
+        self.assertEqual(self._json()[0], {'name': 'gary', 'age': '25'})
+        main(['INT', self.log, '-o', self.output])
+        self.assertEqual(self._json(), [{}, {}])
+
+    def test_datetime_fields(self):
+        with io.open(self.log, 'w', encoding='utf-8') as lfh:
+            lfh.write(u'2016-03-25T05:55:32Z gary\n')
+        main(['%{TIMESTAMP_ISO8601:at:datetime} %{WORD:name}', self.log,
+              '-o', self.output])
+        self.assertEqual(self._json(), [{'at': '2016-03-25T05:55:32+00:00',
+                                         'name': 'gary'}])
+
+    def test_workers(self):
+        main([PATTERN, self.log, '-w', '2', '-o', self.output])
+        self.assertEqual(len(self._json()), 2)
+
+    def test_stdin_and_stats(self):
+        for workers in ('1', '2'):
+            stdin = io.TextIOWrapper(io.BytesIO(LINES.encode('utf-8')))
+            stderr = io.StringIO()
+            with mock.patch('sys.stdin', stdin), \
+                    mock.patch('sys.stderr', stderr):
+                main([PATTERN, '-s', '-w', workers, '-o', self.output])
+            self.assertEqual(len(self._json()), 2)
+            self.assertIn('3 lines, 2 matched, 1 unmatched',
+                          stderr.getvalue())
+
+    def test_unknown_pattern(self):
+        with mock.patch('sys.stderr', io.StringIO()):
+            with self.assertRaises(SystemExit) as raised:
+                main(['%{NOPE}', self.log])
+        self.assertEqual(raised.exception.code, 2)
+
+    def test_bad_regex(self):
+        stderr = io.StringIO()
+        with mock.patch('sys.stderr', stderr):
+            with self.assertRaises(SystemExit) as raised:
+                main(['(%{WORD:a}', self.log])
+        self.assertEqual(raised.exception.code, 2)
+        self.assertIn('missing )', stderr.getvalue())
+
+    def test_missing_files(self):
+        missing = self._path('missing.log')
+        for workers in ('1', '2'):
+            stderr = io.StringIO()
+            with mock.patch('sys.stderr', stderr):
+                status = main([PATTERN, missing, self.log, '-w', workers,
+                               '-o', self.output])
+            self.assertEqual(status, 1)
+            self.assertIn(missing, stderr.getvalue())
+            # Files after the missing one are still parsed
+            self.assertEqual(len(self._json()), 2)
+        with mock.patch('sys.stderr', io.StringIO()):
+            with self.assertRaises(SystemExit) as raised:
+                main([PATTERN, self.log, '-d', missing])
+        self.assertEqual(raised.exception.code, 2)
+
+    def test_module(self):
+        output = subprocess.check_output(
+            [sys.executable, '-m', 'yalp_grok', PATTERN, self.log])
+        self.assertEqual(output.decode('utf-8').splitlines()[0],
+                         '{"name":"gary","age":25}')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+# vim: set et ts=4 sw=4 fileencoding=utf-8:
+'''
+tests.test_columns
+==================
+'''
+import array
+import unittest
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+from yalp_grok import compile_pattern, grok_search_columns
+
+LINES = [
+    'GET /index.html 200 2326 0.25\n',
+    'not a request\n',
+    'POST /login 302 - 1.5\r\n',
+    'GET /big 200 99999999999999999999 x',
+]
+PATTERN = ('%{WORD:verb} %{URIPATH:path} %{INT:status:int} '
+           '(?:%{INT:bytes:int}|-) %{NOTSPACE:took:float}')
+
+
+class TestColumns(unittest.TestCase):
+    ''' Test parsing lines into columns '''
+
+    def setUp(self):
+        self.result = grok_search_columns(LINES, compile_pattern(PATTERN))
+
+    def test_columns(self):
+        columns = self.result.columns
+        self.assertEqual(self.result.rows, 3)
+        self.assertEqual(columns['verb'], ['GET', 'POST', 'GET'])
+        self.assertEqual(columns['status'], array.array('q', [200, 302, 200]))
+        self.assertEqual(columns['took'].typecode, 'd')
+        self.assertEqual(columns['took'][:2].tolist(), [0.25, 1.5])
+
+    def test_masks(self):
+        columns, masks = self.result.columns, self.result.masks
+        self.assertEqual(list(masks['verb']), [1, 1, 1])
+        # Missing, then too large for the array
+        self.assertEqual(columns['bytes'].tolist(), [2326, 0, 0])
+        self.assertEqual(list(masks['bytes']), [1, 0, 0])
+        # Failed conversion
+        self.assertEqual(list(masks['took']), [1, 1, 0])
+
+    def test_misses(self):
+        self.assertEqual(self.result.misses.tolist(), [1])
+
+    def test_no_match(self):
+        result = grok_search_columns(['nothing'], compile_pattern(PATTERN))
+        self.assertEqual(result.rows, 0)
+        self.assertEqual(result.columns['status'], array.array('q'))
+
+    def test_bytes(self):
+        lines = [line.encode('ascii') for line in LINES]
+        result = grok_search_columns(
+            lines, compile_pattern(PATTERN, as_bytes=True))
+        self.assertEqual(result.rows, 3)
+        self.assertEqual(result.columns['verb'], [b'GET', b'POST', b'GET'])
+        # Line endings are excluded, so the float still converts
+        self.assertEqual(result.columns['took'][:2].tolist(), [0.25, 1.5])
+        self.assertEqual(list(result.masks['took']), [1, 1, 0])
+
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    def test_numpy(self):
+        result = grok_search_columns(LINES, compile_pattern(PATTERN),
+                                     as_numpy=True)
+        self.assertEqual(result.columns['status'].dtype, numpy.int64)
+        self.assertEqual(int(result.columns['status'].sum()), 702)
+        self.assertEqual(
+            int(result.columns['bytes'][result.masks['bytes']].sum()), 2326)
+        self.assertEqual(list(result.columns['verb']), ['GET', 'POST', 'GET'])
+        self.assertEqual(result.misses.tolist(), [1])
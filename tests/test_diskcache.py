@@ -0,0 +1,103 @@
+# vim: set et ts=4 sw=4 fileencoding=utf-8:
+'''
+tests.test_diskcache
+====================
+'''
+import os
+import shutil
+import tempfile
+import unittest
+
+try:
+    from unittest import mock
+except ImportError:  # pragma: no cover
+    import mock
+
+from yalp_grok import compile_pattern, grok_search
+from yalp_grok.diskcache import ENTRY_SUFFIX, clear_disk_cache
+
+PATTERN = '%{SYSLOGBASE} %{INT:n:int}'
+TEXT = 'Sep 14 02:01:37 lb haproxy[14387]: 12'
+
+
+class TestDiskCache(unittest.TestCase):
+    ''' Test the persistent cache of compiled patterns '''
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        self.cache_dir = os.path.join(self.tmp_dir, 'cache')
+
+    def _entries(self):
+        return [name for name in os.listdir(self.cache_dir)
+                if name.endswith(ENTRY_SUFFIX)]
+
+    def _compile(self, *args, **kwargs):
+        kwargs['cache_dir'] = self.cache_dir
+        return compile_pattern(*args, **kwargs)
+
+    def test_hit(self):
+        compiled = self._compile(PATTERN, mode='match')
+        self.assertEqual(len(self._entries()), 1)
+        with mock.patch('yalp_grok.yalp_grok._compile') as _compile:
+            cached = self._compile(PATTERN, mode='match')
+        self.assertFalse(_compile.called)
+        self.assertEqual(cached.regex.pattern, compiled.regex.pattern)
+        self.assertEqual((cached.type_map, cached.literals, cached.mode),
+                         (compiled.type_map, compiled.literals, 'match'))
+        self.assertEqual(grok_search(TEXT, cached),
+                         grok_search(TEXT, compiled))
+
+    def test_options_in_key(self):
+        self._compile(PATTERN)
+        compiled = self._compile(PATTERN, as_bytes=True)
+        self._compile(PATTERN, captures=['n'])
+        self._compile(PATTERN, custom_patterns={'X': 'x'})
+        self.assertEqual(len(self._entries()), 4)
+        self.assertIsInstance(compiled.regex.pattern, bytes)
+
+    def test_instrument(self):
+        self._compile(PATTERN)
+        compiled = self._compile(PATTERN, instrument=True)
+        grok_search(TEXT, compiled)
+        self.assertEqual(compiled.stats.snapshot().matches, 1)
+        self.assertEqual(len(self._entries()), 1)
+
+    def test_pattern_file_changes(self):
+        patterns_dir = os.path.join(self.tmp_dir, 'patterns')
+        os.mkdir(patterns_dir)
+        path = os.path.join(patterns_dir, 'custom')
+        with open(path, 'w') as pfh:
+            pfh.write('NAME a+\n')
+        compiled = self._compile('%{NAME:name}',
+                                 custom_patterns_dir=patterns_dir)
+        self.assertEqual(grok_search('bab', compiled), {'name': 'a'})
+
+        with open(path, 'w') as pfh:
+            pfh.write('NAME b+x?\n')
+        compiled = self._compile('%{NAME:name}',
+                                 custom_patterns_dir=patterns_dir)
+        self.assertEqual(grok_search('bab', compiled), {'name': 'b'})
+
+    def test_corrupt_entry(self):
+        self._compile(PATTERN)
+        entry = os.path.join(self.cache_dir, self._entries()[0])
+        with open(entry, 'wb') as efh:
+            efh.write(b'garbage')
+        self.assertEqual(grok_search(TEXT, self._compile(PATTERN))['n'], 12)
+        self.assertEqual(grok_search(TEXT, self._compile(PATTERN))['n'], 12)
+
+    def test_unwritable(self):
+        with open(self.cache_dir, 'w'):
+            pass
+        self.assertEqual(grok_search(TEXT, self._compile(PATTERN))['n'], 12)
+
+    def test_clear(self):
+        self._compile(PATTERN)
+        clear_disk_cache(self.cache_dir)
+        self.assertEqual(self._entries(), [])
+        clear_disk_cache(os.path.join(self.tmp_dir, 'missing'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+# vim: set et ts=4 sw=4 fileencoding=utf-8:
+'''
+tests.test_follow
+=================
+'''
+import os
+import shutil
+import tempfile
+import unittest
+
+from yalp_grok import LogFollower, compile_pattern, grok_follow
+from yalp_grok.follow import Checkpoint, load_checkpoint, save_checkpoint
+
+PATTERN = '^%{WORD:name} %{INT:age:int}$'
+
+
+class TestLogFollower(unittest.TestCase):
+    ''' Test following a growing log file '''
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        self.path = os.path.join(self.tmp_dir, 'app.log')
+        self.checkpoint_path = os.path.join(self.tmp_dir, 'app.checkpoint')
+        self.pattern = compile_pattern(PATTERN)
+
+    def append(self, data, path=None):
+        with open(path or self.path, 'ab') as lfh:
+            lfh.write(data)
+
+    def follower(self, **kwargs):
+        follower = LogFollower(self.path, self.pattern,
+                               self.checkpoint_path, **kwargs)
+        self.addCleanup(follower.close)
+        return follower
+
+    @staticmethod
+    def names(results):
+        return [result and result['name'] for result in results]
+
+    def test_appended_lines(self):
+        follower = self.follower()
+        self.assertEqual(follower.poll(), [])
+        self.append(b'gary 25\nnot a match\r\n')
+        self.assertEqual(follower.poll(), [{'name': 'gary', 'age': 25},
+                                           None])
+        self.assertEqual(follower.poll(), [])
+        self.append(b'tim 30\n')
+        self.assertEqual(self.names(follower.poll()), ['tim'])
+
+    def test_partial_lines(self):
+        follower = self.follower(block_size=4)
+        self.append(b'gary 25\ntim')
+        self.assertEqual(self.names(follower.poll()), ['gary'])
+        self.assertEqual(follower.poll(), [])
+        self.assertEqual(follower.checkpoint.offset, 8)
+        self.append(b' 30\n')
+        self.assertEqual(self.names(follower.poll()), ['tim'])
+
+    def test_on_miss(self):
+        misses = []
+        follower = self.follower(on_miss=lambda *miss: misses.append(miss))
+        self.append(b'gary 25\nnot a match\r\nann 41\n')
+        self.assertEqual(self.names(follower.poll()), ['gary', 'ann'])
+        self.assertEqual(misses, [(2, u'not a match')])
+
+    def test_resume_from_checkpoint(self):
+        self.append(b'gary 25\ntim 30\nann')
+        follower = self.follower()
+        self.assertEqual(self.names(follower.poll()), ['gary', 'tim'])
+        # Lines are checkpointed when the next poll starts
+        inode = os.stat(self.path).st_ino
+        self.assertEqual(load_checkpoint(self.checkpoint_path),
+                         Checkpoint(inode, 0))
+        self.assertEqual(follower.poll(), [])
+        self.assertEqual(load_checkpoint(self.checkpoint_path),
+                         Checkpoint(inode, 15))
+        follower.close()
+
+        self.append(b' 41\nbob 52\n')
+        self.assertEqual(self.names(self.follower().poll()), ['ann', 'bob'])
+
+    def test_checkpoint_of_other_file(self):
+        self.append(b'gary 25\n')
+        save_checkpoint(self.checkpoint_path, Checkpoint(-1, 4))
+        self.assertEqual(self.names(self.follower().poll()), ['gary'])
+
+    def test_from_end(self):
+        self.append(b'gary 25\n')
+        follower = self.follower(from_end=True)
+        self.append(b'tim 30\n')
+        self.assertEqual(self.names(follower.poll()), ['tim'])
+
+    def test_missing_file(self):
+        follower = self.follower()
+        self.assertEqual(follower.poll(), [])
+        self.append(b'gary 25\n')
+        self.assertEqual(self.names(follower.poll()), ['gary'])
+
+    def test_rotation(self):
+        follower = self.follower()
+        self.append(b'gary 25\n')
+        self.assertEqual(self.names(follower.poll()), ['gary'])
+
+        rotated = self.path + '.1'
+        os.rename(self.path, rotated)
+        self.append(b'tim 30\nann 41', rotated)
+        self.assertEqual(self.names(follower.poll()), ['tim'])
+        self.assertEqual(follower.poll(), [])
+        self.append(b'bob 52\n')
+        # The partial last line of the rotated file comes first
+        self.assertEqual(self.names(follower.poll()), ['ann'])
+        self.assertEqual(self.names(follower.poll()), ['bob'])
+        self.assertEqual(follower.checkpoint,
+                         Checkpoint(os.stat(self.path).st_ino, 7))
+
+    def test_truncation(self):
+        follower = self.follower()
+        self.append(b'gary 25\ntim 30\n')
+        self.assertEqual(self.names(follower.poll()), ['gary', 'tim'])
+        with open(self.path, 'wb') as lfh:
+            lfh.write(b'ann 41\n')
+        self.assertEqual(self.names(follower.poll()), ['ann'])
+
+    def test_grok_follow(self):
+        self.append(b'gary 25\ntim 30\n')
+        polls = []
+
+        def _stop():
+            polls.append(None)
+            if len(polls) == 1:
+                self.append(b'ann 41\n')
+            return len(polls) > 1
+
+        results = grok_follow(self.path, self.pattern, self.checkpoint_path,
+                              interval=0, stop=_stop)
+        self.assertEqual(self.names(results), ['gary', 'tim', 'ann'])
+        self.assertEqual(load_checkpoint(self.checkpoint_path).offset, 22)
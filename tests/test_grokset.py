@@ -0,0 +1,114 @@
+# vim: set et ts=4 sw=4 fileencoding=utf-8:
+'''
+tests.test_grokset
+==================
+'''
+import unittest
+
+from yalp_grok import (
+    GrokSet, compile_pattern, compile_patterns, exceptions, grok_search,
+)
+
+APACHE_LINE = (
+    '127.0.0.1 - - [15/Sep/2015:13:41:35 -0400] "GET /index.html '
+    'HTTP/1.1" 502 352 "-" '
+    '"Mozilla/5.0 (X11; Linux x86_64; rv:38.0) Gecko/20100101 Firefox/38.0"'
+)
+SYSLOG_LINE = (
+    'Mar 25 05:55:32 host kernel: [1858.738417] SyS_ioctl+0x81/0xa0'
+)
+
+
+class TestGrokSet(unittest.TestCase):
+    ''' Test matching many patterns at once '''
+
+    def setUp(self):
+        self.patterns = compile_patterns(
+            ['%{SYSLOGLINE}', '%{COMBINEDAPACHELOG}', '%{NAGIOSLOGLINE}'],
+            auto_map=True)
+
+    def test_winner_and_fields(self):
+        pattern_id, match = self.patterns.search(APACHE_LINE)
+        self.assertEqual(pattern_id, '%{COMBINEDAPACHELOG}')
+        self.assertEqual(match, grok_search(
+            APACHE_LINE, compile_pattern('%{COMBINEDAPACHELOG}',
+                                         auto_map=True)))
+        self.assertEqual(match['response'], 502)
+
+        pattern_id, match = self.patterns.search(SYSLOG_LINE)
+        self.assertEqual(pattern_id, '%{SYSLOGLINE}')
+        self.assertEqual(match['program'], 'kernel')
+        self.assertNotIn('clientip', match)
+
+    def test_no_match(self):
+        self.assertIsNone(self.patterns.search('nothing to see here'))
+
+    def test_ids_and_type_maps(self):
+        patterns = compile_patterns([
+            ('num', '%{INT:value:int}$'),
+            ('word', '%{WORD:value}'),
+        ])
+        self.assertEqual(patterns.ids, ['num', 'word'])
+        self.assertEqual(len(patterns), 2)
+        self.assertEqual(patterns.search('42'), ('num', {'value': 42}))
+        self.assertEqual(patterns.search('abc'), ('word', {'value': 'abc'}))
+
+    def test_mapping_of_patterns(self):
+        patterns = compile_patterns({'id': '%{WORD}-%{INT:id}'})
+        self.assertEqual(patterns.search('a-1'), ('id', {'id': '1'}))
+
+    def test_leftmost_then_first_listed(self):
+        patterns = compile_patterns([
+            ('late', 'b%{INT:n}'), ('a', 'a%{INT:n}'), ('b', 'b%{INT:m}')])
+        self.assertEqual(patterns.search('a1 b2'), ('a', {'n': '1'}))
+        self.assertEqual(patterns.search('b2'), ('late', {'n': '2'}))
+
+    def test_scoped_flags_and_refs(self):
+        patterns = GrokSet([
+            ('upper', compile_pattern('(?i)(?P<q>x)(?P=q)')),
+            ('lower', compile_pattern('y')),
+        ])
+        self.assertEqual(patterns.search('xX'), ('upper', {'q': 'x'}))
+        self.assertIsNone(patterns.search('Y'))
+
+    def test_output_and_intern(self):
+        patterns = compile_patterns(
+            [('num', '%{WORD:verb} %{INT:value:int}'),
+             ('word', '%{WORD:verb}')],
+            output='record', intern=['verb'])
+        first = patterns.search('GET 42')[1]
+        self.assertEqual(first.verb, 'GET')
+        self.assertEqual(first.value, 42)
+        second = patterns.search(''.join(['G', 'ET 7']))[1]
+        self.assertIs(second.verb, first.verb)
+        self.assertEqual(patterns.search('abc'), ('word', ('abc',)))
+        patterns = GrokSet([('t', compile_pattern('%{INT:a} %{INT:b:int}',
+                                                  output='tuple'))])
+        self.assertEqual(patterns.search('1 2'), ('t', ('1', 2)))
+
+    def test_numbered_backreference(self):
+        self.assertRaises(exceptions.GrokError,
+                          compile_patterns, [r'(a)\1'])
+
+    def test_prefilter_and_combinations(self):
+        patterns = compile_patterns([
+            ('get', 'GET %{NOTSPACE:path}'), ('put', 'PUT %{NOTSPACE:path}')])
+        self.assertEqual(patterns.search('PUT /x'), ('put', {'path': '/x'}))
+        self.assertEqual(patterns.search('GET /y'), ('get', {'path': '/y'}))
+        self.assertEqual(patterns.search('PUT GET /z'),
+                         ('put', {'path': 'GET'}))
+        self.assertIsNone(patterns.search('POST /x'))
+
+    def test_match_modes(self):
+        patterns = GrokSet([
+            ('start', compile_pattern('a%{INT:n}', mode='match')),
+            ('whole', compile_pattern('b%{INT:n}', mode='fullmatch')),
+            ('any', compile_pattern('c%{INT:n}')),
+        ])
+        self.assertIsNone(patterns.search('xa1'))
+        self.assertEqual(patterns.search('a1 c2'), ('start', {'n': '1'}))
+        self.assertIsNone(patterns.search('b1 '))
+        self.assertEqual(patterns.search('b1'), ('whole', {'n': '1'}))
+        self.assertEqual(patterns.search('b1 c2'), ('any', {'n': '2'}))
+        self.assertIsNone(
+            compile_patterns(['x%{INT:n}'], mode='match').search('yx1'))
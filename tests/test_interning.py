@@ -0,0 +1,98 @@
+# vim: set et ts=4 sw=4 fileencoding=utf-8:
+'''
+tests.test_interning
+====================
+'''
+import pickle
+import unittest
+
+from yalp_grok import compile_pattern, exceptions, grok_search
+from yalp_grok.interning import CardinalitySampler, InternTable
+
+PATTERN = '%{WORD:verb} %{NOTSPACE:request} %{INT:status:int}'
+
+
+def _copy(text):
+    ''' A string equal to text but not the same object '''
+    return ''.join(list(text))
+
+
+class TestInternTable(unittest.TestCase):
+    ''' Test the bounded table of interned values '''
+
+    def test_intern(self):
+        table = InternTable()
+        first = _copy('GET')
+        self.assertIs(table.intern(first), first)
+        self.assertIs(table.intern(_copy('GET')), first)
+        self.assertEqual(len(table), 1)
+        table.clear()
+        self.assertEqual(len(table), 0)
+
+    def test_eviction(self):
+        table = InternTable(maxsize=2)
+        kept = _copy('kept')
+        table.intern(kept)
+        table.intern('a')
+        # Fills the current generation, kept survives in the previous one
+        table.intern('b')
+        self.assertIs(table.intern(_copy('kept')), kept)
+        table.intern('c')
+        table.intern('d')
+        self.assertLessEqual(len(table), 4)
+        self.assertIs(table.intern(_copy('kept')), kept)
+        dropped = _copy('a')
+        self.assertIs(table.intern(dropped), dropped)
+
+
+class TestCardinalitySampler(unittest.TestCase):
+    ''' Test picking the fields to intern '''
+
+    def test_pick(self):
+        sampler = CardinalitySampler((0, 1), sample_size=20, max_ratio=0.2)
+        for number in range(19):
+            self.assertIsNone(sampler.add(['GET', str(number)]))
+        self.assertEqual(sampler.add(['POST', '19']), (0,))
+
+
+class TestInternedFields(unittest.TestCase):
+    ''' Test interning field values of compiled patterns '''
+
+    def test_listed_fields(self):
+        compiled = compile_pattern(PATTERN, intern=['verb', 'status'])
+        first = grok_search(_copy('GET /a 200'), compiled)
+        second = grok_search(_copy('GET /b 200'), compiled)
+        self.assertEqual(second, {'verb': 'GET', 'request': '/b',
+                                  'status': 200})
+        self.assertIs(first['verb'], second['verb'])
+        self.assertEqual(len(compiled.intern_table), 1)
+
+    def test_output_modes(self):
+        for output in ('record', 'tuple'):
+            compiled = compile_pattern(PATTERN, intern=['request'],
+                                       output=output)
+            first = grok_search('GET /a 200', compiled)
+            second = grok_search('HEAD /a 404', compiled)
+            self.assertEqual(tuple(second), ('HEAD', '/a', 404))
+            self.assertIs(first[1], second[1])
+
+    def test_auto(self):
+        compiled = compile_pattern(PATTERN, intern='auto')
+        lines = ['{0} /{1} 200'.format(('GET', 'POST')[number % 2], number)
+                 for number in range(1100)]
+        results = [grok_search(_copy(line), compiled) for line in lines]
+        self.assertIs(results[-2]['verb'], results[-4]['verb'])
+        self.assertEqual(len(compiled.intern_table), 2)
+
+    def test_pickle(self):
+        compiled = compile_pattern(PATTERN, intern=['verb'], instrument=True)
+        compiled = pickle.loads(pickle.dumps(compiled))
+        self.assertEqual(compiled.intern, ('verb',))
+        grok_search('GET /a 200', compiled)
+        self.assertEqual(len(compiled.intern_table), 1)
+
+    def test_errors(self):
+        self.assertRaises(exceptions.GrokError, compile_pattern, PATTERN,
+                          intern=['nope'])
+        self.assertRaises(exceptions.GrokError, compile_pattern, PATTERN,
+                          intern='all')
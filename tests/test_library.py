@@ -0,0 +1,177 @@
+# vim: set et ts=4 sw=4 fileencoding=utf-8:
+'''
+tests.test_library
+==================
+'''
+import os
+import shutil
+import tempfile
+import unittest
+
+try:
+    from unittest import mock
+except ImportError:  # pragma: no cover
+    import mock
+
+from yalp_grok import compile_pattern, exceptions, library, pattern_index
+from yalp_grok.library import PatternLibrary, Pattern
+from yalp_grok.yalp_grok import PREDEFINED_PATTERNS
+
+
+def _library(**patterns):
+    return PatternLibrary(dict(
+        (name, Pattern(name, regex_str))
+        for name, regex_str in patterns.items()))
+
+
+class TestExpansion(unittest.TestCase):
+    ''' Test expanding grok references '''
+
+    def test_nested(self):
+        lib = _library(A='a%{B:b}', B='b%{C}', C='c')
+        expansion = lib.expand('%{A:x}')
+        self.assertEqual(expansion.regex_str, '(?P<x>a(?P<b>b(c)))')
+        self.assertEqual(expansion.deps, frozenset(['A', 'B', 'C']))
+        self.assertEqual([hint.name for hint in expansion.type_hints],
+                         ['x', 'b'])
+
+    def test_memoized(self):
+        lib = _library(A='%{B}%{B}', B='b')
+        self.assertIs(lib.expand_name('A'), lib.expand_name('A'))
+        self.assertIs(lib.expand_name('B'), lib.expand_name('B'))
+
+    def test_defined_type_and_alias(self):
+        lib = _library(NUM='(?:%{DIGITS})', DIGITS='[0-9]+')
+        expansion = lib.expand('%{NUM:n:int} %{DIGITS:d}')
+        self.assertEqual(
+            [tuple(hint) for hint in expansion.type_hints],
+            [('n', ('NUM', 'DIGITS'), 'int'), ('d', ('DIGITS',), '')])
+
+    def test_unknown_syntax_left_alone(self):
+        lib = _library(A='a')
+        expansion = lib.expand('%{A:not-a-key} %%{A}')
+        self.assertEqual(expansion.regex_str, '%{A:not-a-key} %(a)')
+
+    def test_missing(self):
+        lib = _library(A='%{B}')
+        self.assertRaises(exceptions.PatternNotFound, lib.expand, '%{A}')
+        self.assertRaises(exceptions.PatternNotFound, lib.expand, '%{Z:z}')
+
+    def test_cycle(self):
+        lib = _library(A='%{B}', B='x%{C}', C='%{A}')
+        self.assertRaises(exceptions.PatternCycle, lib.expand, '%{A}')
+        self.assertRaises(exceptions.PatternCycle, lib.resolve)
+
+    def test_bundled_patterns_resolve(self):
+        PREDEFINED_PATTERNS.resolve()
+
+
+class TestLayering(unittest.TestCase):
+    ''' Test custom patterns layered over a library '''
+
+    def test_lookup_falls_back(self):
+        base = _library(A='a', B='b')
+        child = base.layer({'B': Pattern('B', 'x')})
+        self.assertEqual(child['A'].regex_str, 'a')
+        self.assertEqual(child['B'].regex_str, 'x')
+        self.assertEqual(sorted(child), ['A', 'B'])
+        self.assertEqual(len(child), 2)
+        self.assertEqual(base['B'].regex_str, 'b')
+
+    def test_reuses_parent_expansion(self):
+        base = _library(A='%{B}', B='b', C='c')
+        child = base.layer({'C': Pattern('C', 'x')})
+        self.assertIs(child.expand_name('A'), base.expand_name('A'))
+
+    def test_override_dependency(self):
+        base = _library(A='%{B}', B='b')
+        child = base.layer({'B': Pattern('B', 'x')})
+        self.assertEqual(child.expand_name('A').regex_str, '(x)')
+        self.assertEqual(base.expand_name('A').regex_str, '(b)')
+
+    def test_child_completes_parent(self):
+        base = _library(A='%{B}')
+        child = base.layer({'B': Pattern('B', 'b')})
+        self.assertEqual(child.expand('%{A}').regex_str, '((b))')
+
+    def test_compile_missing_pattern(self):
+        self.assertRaises(exceptions.PatternNotFound, compile_pattern,
+                          '%{NOT_A_PATTERN:x}')
+        self.assertRaises(exceptions.PatternCycle, compile_pattern,
+                          '%{LOOP}', custom_patterns={'LOOP': '%{LOOP}'})
+
+
+class TestLazyLoading(unittest.TestCase):
+    '''
+    Test reading the bundled pattern files on demand
+    '''
+
+    def test_prebuilt_index_up_to_date(self):
+        index, signatures = library.build_index(
+            library.BUNDLED_PATTERNS_DIR)
+        self.assertEqual(index, pattern_index.INDEX)
+        self.assertEqual(signatures, pattern_index.FILE_SIGNATURES)
+
+    def test_files_read_on_demand(self):
+        lib = PatternLibrary.from_dirs([library.BUNDLED_PATTERNS_DIR])
+        self.assertEqual(lib.expand('%{INT}').regex_str,
+                         '((?:[+-]?(?:[0-9]+)))')
+        nagios = os.path.join(library.BUNDLED_PATTERNS_DIR, 'nagios')
+        self.assertIn(nagios, lib._pending)
+        self.assertIn('NAGIOSTIME', lib)
+        self.assertIn(nagios, lib._pending)
+        lib.expand('%{NAGIOSTIME}')
+        self.assertNotIn(nagios, lib._pending)
+
+    def test_same_as_eager_loading(self):
+        lib = PatternLibrary.from_dirs([library.BUNDLED_PATTERNS_DIR])
+        eager = library.load_patterns([library.BUNDLED_PATTERNS_DIR])
+        self.assertEqual(dict(lib), eager)
+
+    def test_stale_index_ignored(self):
+        size = pattern_index.FILE_SIGNATURES['nagios'][0]
+        for signature in ((0, 0), (size, 0)):
+            with mock.patch.dict(pattern_index.FILE_SIGNATURES,
+                                 {'nagios': signature}):
+                lib = PatternLibrary.from_dirs(
+                    [library.BUNDLED_PATTERNS_DIR])
+            self.assertFalse(lib._pending)
+            self.assertIn('NAGIOSTIME', lib)
+
+    def test_same_size_edit(self):
+        pats_dir = os.path.join(tempfile.mkdtemp(), 'patterns')
+        self.addCleanup(shutil.rmtree, os.path.dirname(pats_dir))
+        shutil.copytree(library.BUNDLED_PATTERNS_DIR, pats_dir)
+        with open(os.path.join(pats_dir, 'java'), 'r+') as pfh:
+            content = pfh.read().replace('JAVACLASS ', 'JAVAKLASS ')
+            pfh.seek(0)
+            pfh.write(content)
+        with mock.patch.object(library, 'BUNDLED_PATTERNS_DIR', pats_dir):
+            lib = PatternLibrary.from_dirs([pats_dir])
+        self.assertIn('JAVAKLASS', lib)
+        self.assertRaises(exceptions.PatternNotFound, lib.expand,
+                          '%{JAVACLASS}')
+
+    def test_name_missing_from_file(self):
+        with mock.patch.dict(pattern_index.INDEX, {'NOPE': 'java'}):
+            lib = PatternLibrary.from_dirs([library.BUNDLED_PATTERNS_DIR])
+        self.assertRaises(KeyError, lib.__getitem__, 'NOPE')
+        self.assertNotIn('NOPE', lib)
+        self.assertRaises(exceptions.PatternNotFound, lib.expand, '%{NOPE}')
+        with mock.patch.dict(pattern_index.INDEX, {'NOPE': 'java'}):
+            lib = PatternLibrary.from_dirs([library.BUNDLED_PATTERNS_DIR],
+                                           parent=_library(NOPE='x'))
+        self.assertEqual(lib['NOPE'].regex_str, 'x')
+
+    def test_later_dirs_override(self):
+        pats_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, pats_dir)
+        with open(os.path.join(pats_dir, 'override'), 'w') as pfh:
+            pfh.write('INT [0-9]\n')
+
+        lib = PatternLibrary.from_dirs(
+            [library.BUNDLED_PATTERNS_DIR, pats_dir])
+        self.assertEqual(lib['INT'].regex_str, '[0-9]')
+        lib = PatternLibrary.from_dirs(
+            [pats_dir, library.BUNDLED_PATTERNS_DIR])
+        self.assertEqual(lib['INT'].regex_str, '(?:[+-]?(?:[0-9]+))')
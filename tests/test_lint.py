@@ -0,0 +1,61 @@
+# vim: set et ts=4 sw=4 fileencoding=utf-8:
+'''
+tests.test_lint
+===============
+'''
+import unittest
+
+from yalp_grok.lint import (
+    ADJACENT_WILDCARDS, NESTED_QUANTIFIER, UNSUPPORTED_SYNTAX,
+    lint_library, lint_pattern, lint_regex,
+)
+
+
+class TestLint(unittest.TestCase):
+    ''' Test the static pattern checks '''
+
+    def _kinds(self, pattern):
+        return [warning.kind for warning in lint_pattern(pattern)]
+
+    def test_nested_quantifiers(self):
+        for pattern in (r'(\w+\s?)+$', '(a+)+', r'(?:\w+_)+', '(?:a+b*)+',
+                        r'(?:%{INT}\s?)+'):
+            self.assertEqual(self._kinds(pattern), [NESTED_QUANTIFIER],
+                             pattern)
+
+    def test_separated_repeats(self):
+        for pattern in (r'(?:[a-z]+\.)+', r'(?:(\b\w+\b)\s*)*', r'(\w+\s)+',
+                        r'(?:%{WORD}\s?)+',
+                        r'(?:\w+,){0,3}'):
+            self.assertEqual(self._kinds(pattern), [], pattern)
+
+    def test_adjacent_wildcards(self):
+        warnings = lint_pattern('%{DATA:a}%{GREEDYDATA:b}')
+        self.assertEqual([warning.kind for warning in warnings],
+                         [ADJACENT_WILDCARDS])
+        self.assertEqual(warnings[0].source, '.*?.*')
+        self.assertEqual(self._kinds(r'.*\s*(?=x).+'), [ADJACENT_WILDCARDS])
+
+    def test_separated_wildcards(self):
+        for pattern in ('%{GREEDYDATA:a} %{GREEDYDATA:b}', '(?:.*|x).*',
+                        '.*.?x.*'):
+            self.assertEqual(self._kinds(pattern), [], pattern)
+
+    def test_no_backtracking(self):
+        for pattern in (r'(?>\w+\s?)+', '(a++)+', '.*+.*'):
+            self.assertEqual(self._kinds(pattern), [], pattern)
+
+    def test_custom_patterns(self):
+        self.assertEqual(
+            lint_pattern('%{LAZY}', custom_patterns={'LAZY': '(.*)(.*)'})[0]
+            .kind, ADJACENT_WILDCARDS)
+
+    def test_unsupported_syntax(self):
+        self.assertEqual(lint_regex('(?(1)a|b)')[0].kind, UNSUPPORTED_SYNTAX)
+
+    def test_bundled_patterns(self):
+        self.assertEqual(lint_library(), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
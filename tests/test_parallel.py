@@ -0,0 +1,80 @@
+# vim: set et ts=4 sw=4 fileencoding=utf-8:
+'''
+tests.test_parallel
+===================
+'''
+import os
+import shutil
+import tempfile
+import unittest
+
+from yalp_grok import (
+    compile_pattern, exceptions, grok_iter, grok_parse_file_parallel,
+)
+from yalp_grok.parallel import chunk_ranges
+
+PATTERN = '^%{WORD:name} %{INT:age:int}$'
+
+
+class TestParallel(unittest.TestCase):
+    ''' Test parsing a file with a pool of processes '''
+
+    def setUp(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        self.path = os.path.join(tmp_dir, 'people.log')
+        self.lines = []
+        for i in range(500):
+            if i % 7 == 0:
+                self.lines.append(u'no match {0}\n'.format(i))
+            else:
+                self.lines.append(u'user{0} {0}\r\n'.format(i))
+        with open(self.path, 'wb') as lfh:
+            lfh.write(u''.join(self.lines).encode('utf-8'))
+
+    def test_chunk_ranges(self):
+        ranges = list(chunk_ranges(self.path, 100))
+        self.assertEqual(ranges[0][0], 0)
+        self.assertEqual(ranges[-1][1], os.path.getsize(self.path))
+        with open(self.path, 'rb') as lfh:
+            data = lfh.read()
+        for (_, end), (start, _) in zip(ranges, ranges[1:]):
+            self.assertEqual(end, start)
+            self.assertEqual(data[end - 1:end], b'\n')
+
+    def test_same_as_grok_iter(self):
+        expected = list(grok_iter(self.lines, compile_pattern(PATTERN)))
+        results = grok_parse_file_parallel(self.path, PATTERN, workers=2,
+                                           chunk_size=256)
+        self.assertEqual(list(results), expected)
+
+    def test_records(self):
+        expected = list(grok_iter(self.lines, compile_pattern(PATTERN)))
+        results = grok_parse_file_parallel(self.path, PATTERN, workers=2,
+                                           chunk_size=256, output='record')
+        self.assertEqual([result and result._asdict() for result in results],
+                         expected)
+
+    def test_unordered(self):
+        expected = list(grok_iter(self.lines, compile_pattern(PATTERN)))
+        results = grok_parse_file_parallel(self.path, PATTERN, workers=2,
+                                           ordered=False, chunk_size=256)
+
+        def key(match):
+            return match['age'] if match else -1
+        self.assertEqual(sorted(results, key=key), sorted(expected, key=key))
+
+    def test_misses(self):
+        misses = []
+        results = list(grok_parse_file_parallel(
+            self.path, PATTERN, workers=2, chunk_size=256,
+            on_miss=lambda offset, line: misses.append((offset, line))))
+        self.assertEqual(len(results) + len(misses), len(self.lines))
+        with open(self.path, 'rb') as lfh:
+            for offset, line in misses:
+                lfh.seek(offset)
+                self.assertEqual(lfh.readline().decode('utf-8'), line + '\n')
+
+    def test_bad_pattern(self):
+        results = grok_parse_file_parallel(self.path, '%{NOT_A_PATTERN}')
+        self.assertRaises(exceptions.PatternNotFound, list, results)
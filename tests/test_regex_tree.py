@@ -0,0 +1,177 @@
+# vim: set et ts=4 sw=4 fileencoding=utf-8:
+'''
+tests.test_regex_tree
+=====================
+'''
+import unittest
+
+import regex
+
+from benchmarks.corpus import FORMATS, SAMPLES, format_lines
+from yalp_grok import compile_pattern
+from yalp_grok.regex_tree import (
+    Group, Repeat, RegexSyntaxError, anchored_start, optimize, parse,
+    prune_captures, required_literals, unparse,
+)
+from yalp_grok.yalp_grok import PREDEFINED_PATTERNS
+
+
+def _literals(pattern):
+    return required_literals(parse(pattern))
+
+
+class TestParse(unittest.TestCase):
+    ''' Test parsing regex sources '''
+
+    def test_round_trip_bundled_patterns(self):
+        for name in PREDEFINED_PATTERNS:
+            source = compile_pattern('%{' + name + '}')[0].pattern
+            self.assertEqual(unparse(parse(source)), source, name)
+
+    def test_structure(self):
+        tree = parse(r'(?P<x>a|b)+?c{2,}')
+        self.assertEqual(len(tree.branches), 1)
+        repeat = tree.branches[0][0]
+        self.assertIsInstance(repeat, Repeat)
+        self.assertEqual((repeat.min, repeat.max, repeat.source),
+                         (1, None, '+?'))
+        self.assertIsInstance(repeat.item, Group)
+        self.assertEqual(repeat.item.name, 'x')
+        self.assertEqual(tree.branches[0][1].min, 2)
+
+    def test_literal_braces(self):
+        tree = parse('%{A:b-c}')
+        self.assertEqual(unparse(tree), '%{A:b-c}')
+        self.assertEqual(_literals('%{A:b-c}'), ('%{A:b-c}',))
+
+    def test_unsupported(self):
+        for source in ('(?(1)a|b)', '(a', 'a)', '*a', r'\N{DASH}', '(?x)a'):
+            self.assertRaises(RegexSyntaxError, parse, source)
+
+    def test_fuzzy_constraints(self):
+        for source in ('(?:foo){e<=1}', 'a{e}', 'a{i,d}', 'a{1<=e<=2}',
+                       'a{2i+2d<=4}', 'a{s<2}', 'a{e:[a-z]}'):
+            self.assertRaises(RegexSyntaxError, parse, source)
+        for source in ('a{x}', 'a{1<2}', 'a{A:b-c}'):
+            self.assertEqual(unparse(parse(source)), source)
+
+
+class TestRequiredLiterals(unittest.TestCase):
+    ''' Test finding literals every match contains '''
+
+    def test_sequences(self):
+        self.assertEqual(_literals(r'x\.y+z'), ('x.y', 'yz'))
+        self.assertEqual(_literals('a{3}b'), ('aaab',))
+        self.assertEqual(_literals(r'GET \d+ HTTP/1\.[01]'),
+                         (' HTTP/1.', 'GET '))
+
+    def test_optional_parts(self):
+        self.assertEqual(_literals('a(?:bc)?d'), ('a', 'd'))
+        self.assertEqual(_literals('a*b'), ('b',))
+
+    def test_alternations(self):
+        self.assertEqual(_literals('abc|abd'), ('ab',))
+        self.assertEqual(_literals('(?:foo|bar)baz'), ('baz',))
+        self.assertEqual(_literals('(?:xfoo|yfoo)'), ('foo',))
+        self.assertEqual(_literals('a|'), ())
+
+    def test_zero_width(self):
+        self.assertEqual(_literals(r'\bab\b(?=c)d'), ('abd',))
+
+    def test_flags(self):
+        self.assertEqual(_literals('(?i)abc'), ())
+        self.assertEqual(_literals('x(?i:abc)y'), ('x', 'y'))
+        self.assertEqual(_literals('(?s)a.b'), ('a', 'b'))
+
+    def test_bundled_pattern(self):
+        self.assertEqual(
+            _literals(compile_pattern('%{COMBINEDAPACHELOG}')[0].pattern),
+            ('] "', ' [', '" ', '/', ':'))
+
+
+class TestPruneCaptures(unittest.TestCase):
+    ''' Test making groups non-capturing '''
+
+    def test_prune(self):
+        tree = parse(r'(a)(?P<x>b(?P<y>c)+)(?:d)(?=(e))|(?P<z>f)')
+        self.assertEqual(
+            unparse(prune_captures(tree, lambda name: name in 'xz')),
+            r'(?:a)(?P<x>b(?:c)+)(?:d)(?=(?:e))|(?P<z>f)')
+
+
+def _optimized(pattern):
+    return unparse(optimize(parse(pattern)))
+
+
+def _matches(pattern, text):
+    return [(match.span(), match.groupdict())
+            for match in regex.finditer(pattern, text, overlapped=True)]
+
+
+class TestOptimize(unittest.TestCase):
+    ''' Test rewriting trees to backtrack less '''
+
+    def test_factor_literals(self):
+        self.assertEqual(_optimized('Jan|January|Feb'), 'Jan(?:uary)??|Feb')
+        self.assertEqual(_optimized('Deny|Denied|denied|Dropping'),
+                         'D(?:en(?:y|ied)|ropping)|denied')
+        self.assertEqual(_optimized('ab|a'), 'ab?')
+
+    def test_keep_order(self):
+        # Branches which can match at the same position are not reordered
+        self.assertEqual(_optimized(r'ab|\w+|ac'), r'ab|\w+|ac')
+        self.assertEqual(_optimized('ab|(?:x|a)|ac'), 'a(?:b||c)|x')
+        self.assertEqual(_optimized('ab|(?P<n>x|y)|ac'),
+                         'a(?:b|c)|(?P<n>x|y)')
+
+    def test_groups(self):
+        self.assertEqual(_optimized('(a)(?P<x>(?:b|c))(?:d)(?:e)+f'),
+                         'a(?P<x>b|c)de+f')
+        # Back references need the numbering of the groups
+        self.assertEqual(_optimized(r'(a)\1|(?:b)'), r'(a)\1|b')
+
+    def test_unchanged(self):
+        for pattern in ('(?i)ab|ac', '(?<=ab|ac)x', '(?|(a)b|(a)c)',
+                        r'\1(?:0)', 'a(?:{)2}'):
+            self.assertEqual(_optimized(pattern), pattern)
+
+    def test_same_matches(self):
+        texts = ('Denied denied by ACL Deny D', 'abc ab a acb', 'xyz xz')
+        for pattern in ('Deny|Denied|denied by ACL|denied', 'a|ab|abc|ac',
+                        'abc|ab|a', '(?:x|xy)z', '(?P<v>a|ab)(?P<w>c|bc)',
+                        'a(?:b|bc)?c?|ac'):
+            for text in texts:
+                self.assertEqual(_matches(_optimized(pattern), text),
+                                 _matches(pattern, text), pattern)
+
+    def test_bundled_patterns(self):
+        lines = list(SAMPLES.values())
+        for name in sorted(FORMATS):
+            lines.extend(format_lines(name, 10))
+        for name in PREDEFINED_PATTERNS:
+            pattern = '%{' + name + ':value}'
+            plain = compile_pattern(pattern).regex
+            optimized = compile_pattern(pattern, optimize=True).regex
+            for line in lines:
+                expected = plain.search(line)
+                found = optimized.search(line)
+                if expected is None:
+                    self.assertIsNone(found, (name, line))
+                else:
+                    self.assertEqual(
+                        (found.span(), found.groupdict()),
+                        (expected.span(), expected.groupdict()), (name, line))
+
+
+class TestAnchoredStart(unittest.TestCase):
+    ''' Test detecting patterns anchored at the start '''
+
+    def test_anchored(self):
+        for pattern in ('^a', r'\Aa', '(?:^a|^b)', r'\b^a', '(?=x)^a',
+                        '(^a)+', '(?i)^a', '(?P<x>^a)b'):
+            self.assertTrue(anchored_start(parse(pattern)), pattern)
+
+    def test_not_anchored(self):
+        for pattern in ('a', '(?:^a|b)', '(^a)*', 'a^', '(?m)^a',
+                        '(?m:x)^a', '(?<=x)a', r'\Z'):
+            self.assertFalse(anchored_start(parse(pattern)), pattern)
@@ -0,0 +1,80 @@
+# vim: set et ts=4 sw=4 fileencoding=utf-8:
+'''
+tests.test_router
+=================
+'''
+import unittest
+
+from yalp_grok import Router, compile_pattern, compile_router, exceptions
+
+HEADER = '%{SYSLOGBASE}'
+ROUTES = {
+    'sshd': r' Accepted %{WORD:method} for %{USER:user} from %{IP:client} '
+            r'port %{INT:port:int}',
+    'cron': r' \(%{USER:user}\) CMD \(%{GREEDYDATA:command}\)',
+}
+FALLBACK = [('other', r' %{GREEDYDATA:message}')]
+
+SSHD = ('Oct 11 22:14:15 web01 sshd[123]: Accepted password for bob from '
+        '10.0.0.1 port 22')
+CRON = 'Oct 11 22:14:16 web02 cron[77]: (root) CMD (run-parts /etc/daily)'
+
+
+class TestRouter(unittest.TestCase):
+    ''' Test matching a header and then a body chosen by a field '''
+
+    def setUp(self):
+        self.router = compile_router(HEADER, 'program', ROUTES, FALLBACK)
+
+    def test_routes(self):
+        route, fields = self.router.search(SSHD)
+        self.assertEqual(route, 'sshd')
+        self.assertEqual(fields['logsource'], 'web01')
+        self.assertEqual(fields['pid'], '123')
+        self.assertEqual(fields['user'], 'bob')
+        self.assertEqual(fields['port'], 22)
+
+        route, fields = self.router.search(CRON)
+        self.assertEqual(route, 'cron')
+        self.assertEqual(fields['program'], 'cron')
+        self.assertEqual(fields['command'], 'run-parts /etc/daily')
+
+    def test_same_as_full_pattern(self):
+        full = compile_pattern(HEADER + ROUTES['sshd'])
+        self.assertEqual(self.router.search(SSHD)[1],
+                         full.convert(full.search(SSHD)))
+
+    def test_fallback(self):
+        line = 'Oct 11 22:14:17 web01 kernel: Out of memory'
+        self.assertEqual(self.router.search(line),
+                         ('other', {'timestamp': 'Oct 11 22:14:17',
+                                    'facility': None, 'priority': None,
+                                    'logsource': 'web01',
+                                    'program': 'kernel', 'pid': None,
+                                    'message': 'Out of memory'}))
+        # A route whose body does not match falls back too
+        line = 'Oct 11 22:14:18 web01 sshd[9]: Connection closed'
+        self.assertEqual(self.router.search(line)[0], 'other')
+
+    def test_no_match(self):
+        self.assertIsNone(self.router.search('not a syslog line'))
+        router = compile_router(HEADER, 'program', ROUTES)
+        self.assertIsNone(router.search(
+            'Oct 11 22:14:17 web01 kernel: Out of memory'))
+        self.assertEqual(len(router), 2)
+
+    def test_body_starts_at_header_end(self):
+        # In match mode the body must follow the header directly
+        router = compile_router(HEADER, 'program', {'sshd': r'%{INT:port}'})
+        self.assertIsNone(router.search(SSHD))
+        router = compile_router(HEADER, 'program', {'sshd': r'%{INT:port}'},
+                                body_mode='search')
+        self.assertEqual(router.search(SSHD)[1]['port'], '10')
+
+    def test_fallback_ids(self):
+        router = compile_router(HEADER, 'program', {}, [FALLBACK[0][1]])
+        self.assertEqual(router.search(CRON)[0], FALLBACK[0][1])
+
+    def test_unknown_field(self):
+        with self.assertRaises(exceptions.GrokError):
+            Router(compile_pattern(HEADER), 'nope', {})
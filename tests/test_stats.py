@@ -0,0 +1,76 @@
+# vim: set et ts=4 sw=4 fileencoding=utf-8:
+'''
+tests.test_stats
+================
+'''
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+from yalp_grok import all_stats, compile_pattern, grok_iter_mmap, grok_search
+from yalp_grok.stats import HISTOGRAM_BUCKETS, PatternStats
+
+PATTERN = '%{WORD:name} %{NOTSPACE:age:int}'
+
+
+class TestStats(unittest.TestCase):
+    ''' Test instrumented patterns '''
+
+    def setUp(self):
+        self.compiled = compile_pattern(PATTERN, instrument=True)
+
+    def test_not_instrumented_by_default(self):
+        self.assertFalse(hasattr(compile_pattern(PATTERN), 'stats'))
+
+    def test_counters(self):
+        for text in ('gary 25', 'tim x', '!!!', 'ann 41'):
+            grok_search(text, self.compiled)
+        snapshot = self.compiled.stats.snapshot()
+        self.assertEqual(snapshot.name, PATTERN)
+        self.assertEqual(snapshot.searches, 4)
+        self.assertEqual(snapshot.matches, 3)
+        self.assertEqual(snapshot.misses, 1)
+        self.assertEqual(snapshot.conversion_failures, {'age': 1})
+        self.assertEqual(sum(snapshot.histogram), 4)
+        self.assertEqual(len(snapshot.histogram), HISTOGRAM_BUCKETS)
+        self.assertGreater(snapshot.search_time, 0)
+
+    def test_slowest(self):
+        stats = PatternStats('test', slowest=2)
+        for elapsed, text in ((0.1, 'a'), (0.3, 'b'), (0.2, 'c'),
+                              (0.3, 'd')):
+            stats.record(text, True, elapsed)
+        stats.record('0123456789', False, 0.5, 2, 4)
+        self.assertEqual(stats.snapshot().slowest, [(0.5, '23'), (0.3, 'd')])
+
+    def test_hook_and_reset(self):
+        calls = []
+        self.compiled.stats.hook = lambda *args: calls.append(args[1:3])
+        grok_search('gary 25', self.compiled)
+        self.assertEqual(calls, [('gary 25', True)])
+        self.compiled.stats.reset()
+        self.assertEqual(self.compiled.stats.snapshot().searches, 0)
+
+    def test_all_stats(self):
+        grok_search('gary 25', self.compiled)
+        names = [snapshot.name for snapshot in all_stats()]
+        self.assertIn(PATTERN, names)
+
+    def test_mmap(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        path = os.path.join(tmp_dir, 'people.log')
+        with open(path, 'wb') as lfh:
+            lfh.write(b'gary 25\ntim x\n!!!\n')
+        compiled = compile_pattern(PATTERN, as_bytes=True, instrument=True)
+        list(grok_iter_mmap(path, compiled))
+        snapshot = compiled.stats.snapshot()
+        self.assertEqual((snapshot.matches, snapshot.misses), (2, 1))
+        self.assertEqual(snapshot.conversion_failures, {'age': 1})
+        self.assertIn(b'gary 25', [text for _, text in snapshot.slowest])
+
+    def test_pickle(self):
+        compiled = pickle.loads(pickle.dumps(self.compiled))
+        self.assertEqual(compiled.stats.name, PATTERN)
@@ -0,0 +1,158 @@
+# vim: set et ts=4 sw=4 fileencoding=utf-8:
+'''
+tests.test_stream
+=================
+'''
+import collections
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from yalp_grok import (
+    compile_pattern, exceptions, grok_iter, grok_iter_mmap, grok_search,
+)
+
+LINES = ['gary 25\n', 'not a match\r\n', 'tim 30\r\n', 'ann 41']
+
+
+class TestGrokIter(unittest.TestCase):
+    ''' Test searching a pattern in a stream of lines '''
+
+    def setUp(self):
+        self.pattern = compile_pattern('^%{WORD:name} %{INT:age:int}$')
+
+    def test_lines(self):
+        self.assertEqual(list(grok_iter(LINES, self.pattern)), [
+            {'name': 'gary', 'age': 25},
+            None,
+            {'name': 'tim', 'age': 30},
+            {'name': 'ann', 'age': 41},
+        ])
+
+    def test_line_endings_not_captured(self):
+        pattern = compile_pattern('%{GREEDYDATA:rest}')
+        self.assertEqual([match['rest'] for match in grok_iter(
+            LINES, pattern)], ['gary 25', 'not a match', 'tim 30', 'ann 41'])
+
+    def test_on_miss(self):
+        misses = collections.deque(maxlen=10)
+        results = grok_iter(LINES, self.pattern,
+                            on_miss=lambda *miss: misses.append(miss))
+        self.assertEqual([match['name'] for match in results],
+                         ['gary', 'tim', 'ann'])
+        self.assertEqual(list(misses), [(2, 'not a match')])
+
+    def test_batches(self):
+        batches = list(grok_iter(LINES, self.pattern, batch_size=3))
+        self.assertEqual([len(batch) for batch in batches], [3, 1])
+        self.assertIsNone(batches[0][1])
+
+    def test_file_object(self):
+        lines = io.StringIO(u''.join(LINES))
+        self.assertEqual(len(list(grok_iter(lines, self.pattern))), 4)
+
+    def test_bytes(self):
+        pattern = compile_pattern('%{WORD:name} %{INT:age:int}$',
+                                  as_bytes=True)
+        raw = ''.join(LINES).encode('utf-8')
+        expected = [{'name': b'gary', 'age': 25}, None,
+                    {'name': b'tim', 'age': 30}, {'name': b'ann', 'age': 41}]
+        self.assertEqual(list(grok_iter(io.BytesIO(raw), pattern)), expected)
+
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        path = os.path.join(tmp_dir, 'access.log')
+        with open(path, 'wb') as lfh:
+            lfh.write(raw)
+        self.assertEqual(list(grok_iter(path, pattern)), expected)
+
+    def test_path(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        path = os.path.join(tmp_dir, 'access.log')
+        with open(path, 'w') as lfh:
+            lfh.write(''.join(LINES))
+
+        batches = grok_iter(path, self.pattern, batch_size=2,
+                            on_miss=lambda number, line: None)
+        self.assertEqual(list(batches), [
+            [{'name': 'gary', 'age': 25}, {'name': 'tim', 'age': 30}],
+            [{'name': 'ann', 'age': 41}],
+        ])
+
+
+class TestGrokIterMmap(unittest.TestCase):
+    ''' Test searching a bytes pattern in a memory mapped file '''
+
+    def setUp(self):
+        self.pattern = compile_pattern('^%{WORD:name} %{INT:age:int}$',
+                                       as_bytes=True)
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        self.path = os.path.join(tmp_dir, 'access.log')
+        with open(self.path, 'wb') as lfh:
+            lfh.write(''.join(LINES).encode('utf-8'))
+
+    def test_same_as_grok_iter(self):
+        self.assertEqual(
+            list(grok_iter_mmap(self.path, self.pattern)),
+            list(grok_iter(LINES, compile_pattern(
+                '^%{WORD:name} %{INT:age:int}$'))))
+
+    def test_raw_bytes(self):
+        results = list(grok_iter_mmap(self.path, self.pattern,
+                                      encoding=None))
+        self.assertEqual(results[0], {'name': b'gary', 'age': 25})
+
+    def test_on_miss_and_batches(self):
+        misses = []
+        batches = grok_iter_mmap(self.path, self.pattern, batch_size=2,
+                                 on_miss=lambda *miss: misses.append(miss))
+        self.assertEqual([len(batch) for batch in batches], [2, 1])
+        self.assertEqual(misses, [(8, 'not a match')])
+
+    def test_empty_file(self):
+        open(self.path, 'w').close()
+        self.assertEqual(list(grok_iter_mmap(self.path, self.pattern)), [])
+
+    def test_needs_bytes_pattern(self):
+        self.assertRaises(exceptions.GrokError, grok_iter_mmap, self.path,
+                          compile_pattern('%{WORD}'))
+
+    def test_fullmatch(self):
+        pattern = compile_pattern('%{WORD:name} %{INT:age:int}',
+                                  as_bytes=True, mode='fullmatch')
+        self.assertEqual(list(grok_iter_mmap(self.path, pattern)),
+                         list(grok_iter_mmap(self.path, self.pattern)))
+
+    def test_anchors(self):
+        for source in (r'\A%{WORD:name} %{INT:age:int}\Z',
+                       r'(?<!\d)%{WORD:name} (?P<age>\d+)(?!.)'):
+            pattern = compile_pattern(source, as_bytes=True)
+            self.assertEqual(
+                list(grok_iter_mmap(self.path, pattern)),
+                list(grok_iter(LINES, compile_pattern(source))), source)
+
+    def test_intern(self):
+        with open(self.path, 'wb') as lfh:
+            lfh.write(b''.join(b'gary 25\ntim 30\n' for _ in range(600)))
+        for intern in (['name'], 'auto'):
+            pattern = compile_pattern('^%{WORD:name} %{INT:age:int}$',
+                                      as_bytes=True, intern=intern)
+            results = list(grok_iter_mmap(self.path, pattern))
+            self.assertEqual(results[-1], {'name': 'tim', 'age': 30})
+            # 'auto' picks the fields to intern after sampling lines
+            self.assertIs(results[-1]['name'], results[-3]['name'])
+            self.assertEqual(len(pattern.intern_table), 2)
+
+    def test_abandoned(self):
+        results = grok_iter_mmap(self.path, self.pattern)
+        self.assertEqual(next(results), {'name': 'gary', 'age': 25})
+        results.close()
+
+    def test_grok_search_bytes(self):
+        self.assertEqual(
+            grok_search(memoryview(b'tim 30'), self.pattern),
+            {'name': b'tim', 'age': 30})
@@ -0,0 +1,160 @@
+# vim: set et ts=4 sw=4 fileencoding=utf-8:
+'''
+tests.test_timestamps
+=====================
+'''
+import datetime
+import time
+import unittest
+
+try:
+    from unittest import mock
+except ImportError:  # pragma: no cover
+    import mock
+
+from yalp_grok import (compile_pattern, exceptions, grok_match, grok_search,
+                       grok_search_columns, timestamps)
+from yalp_grok.timestamps import TIMEZONE, UTC, to_datetime, to_epoch
+
+
+def _zone(hours):
+    return TIMEZONE(datetime.timedelta(hours=hours))
+
+
+class TestToDatetime(unittest.TestCase):
+    ''' Test converting timestamps to datetime objects '''
+
+    def test_httpdate(self):
+        self.assertEqual(
+            to_datetime('10/Oct/2000:13:55:36 -0700'),
+            datetime.datetime(2000, 10, 10, 13, 55, 36, tzinfo=_zone(-7)))
+        self.assertEqual(
+            to_datetime('1/Feb/2016:01:02:03.25 +0200'),
+            datetime.datetime(2016, 2, 1, 1, 2, 3, 250000,
+                              tzinfo=_zone(2)))
+
+    def test_syslog(self):
+        self.assertEqual(
+            to_datetime('Oct  1 22:14:15'),
+            datetime.datetime(time.gmtime().tm_year, 10, 1, 22, 14, 15))
+
+    def test_syslog_year(self):
+        # Cached conversions do not outlive the year
+        for year in (2016, 2015, 2016):
+            start = to_epoch('{0}-01-01T00:00:00Z'.format(year))
+            with mock.patch('time.time', return_value=start + 3600):
+                self.assertEqual(to_datetime('Oct  1 22:14:15').year, year)
+                self.assertEqual(to_epoch('Jan  1 00:00:00'), start)
+
+    def test_iso8601(self):
+        self.assertEqual(to_datetime('2016-03-25T05:55:32Z'),
+                         datetime.datetime(2016, 3, 25, 5, 55, 32,
+                                           tzinfo=UTC))
+        self.assertEqual(to_datetime('2016-03-25 05:55:32.123456+01:00'),
+                         datetime.datetime(2016, 3, 25, 5, 55, 32, 123456,
+                                           tzinfo=_zone(1)))
+        self.assertEqual(to_datetime('2016-3-5T05:55'),
+                         datetime.datetime(2016, 3, 5, 5, 55))
+        self.assertEqual(to_datetime(b'2016-03-25T05:55:32'),
+                         datetime.datetime(2016, 3, 25, 5, 55, 32))
+
+    def test_errors(self):
+        for value in ('', 'yesterday', '10/Foo/2000:13:55:36 -0700',
+                      '2016-03-25', '2016-13-25T05:55:32', None):
+            self.assertRaises((ValueError, TypeError), to_datetime, value)
+
+    def test_years(self):
+        self.assertEqual(to_datetime('0001-01-02T00:00:00Z'),
+                         datetime.datetime(1, 1, 2, tzinfo=UTC))
+        self.assertEqual(to_datetime('0099-01-02T00:00'),
+                         datetime.datetime(99, 1, 2))
+        self.assertEqual(to_datetime('16-01-02T00:00'),
+                         datetime.datetime(2016, 1, 2))
+        self.assertEqual(to_datetime('10/Oct/00:13:55:36 +0000'),
+                         datetime.datetime(2000, 10, 10, 13, 55, 36,
+                                           tzinfo=UTC))
+
+    @unittest.skipUnless(hasattr(timestamps._datetime, 'cache_info'),
+                         'functools.lru_cache is not available')
+    def test_cache(self):
+        timestamps._datetime.cache_clear()
+        first = to_datetime('2016-03-25T05:55:32Z')
+        self.assertIs(to_datetime('2016-03-25T05:55:32Z'), first)
+        self.assertEqual(timestamps._datetime.cache_info().hits, 1)
+
+
+class TestToEpoch(unittest.TestCase):
+    ''' Test converting timestamps to seconds since the epoch '''
+
+    def test_epoch(self):
+        self.assertEqual(to_epoch('10/Oct/2000:13:55:36 -0700'), 971211336.0)
+        self.assertEqual(to_epoch('2000-10-10T20:55:36.5Z'), 971211336.5)
+        # Naive timestamps are taken as UTC
+        self.assertEqual(to_epoch('2000-10-10 20:55:36'), 971211336.0)
+
+    def test_bounds(self):
+        # Valid datetimes whose UTC time is out of range
+        for value in ('9999-12-31T23:59:59-01:00',
+                      '0001-01-01T00:00:00+01:00'):
+            to_datetime(value)
+            self.assertRaises(ValueError, to_epoch, value)
+        self.assertEqual(to_epoch('9999-12-31T23:59:59Z'), 253402300799.0)
+
+
+class TestTimestampTypes(unittest.TestCase):
+    ''' Test the datetime and epoch types of grok patterns '''
+
+    def test_defined_types(self):
+        compiled = compile_pattern(
+            r'\[%{HTTPDATE:ts:datetime}\] %{TIMESTAMP_ISO8601:at:epoch}')
+        self.assertEqual(
+            grok_search('[10/Oct/2000:13:55:36 -0700] 2000-10-10T20:55:36Z',
+                        compiled),
+            {'ts': datetime.datetime(2000, 10, 10, 13, 55, 36,
+                                     tzinfo=_zone(-7)),
+             'at': 971211336.0})
+
+    def test_bad_values_kept(self):
+        compiled = compile_pattern('%{NOTSPACE:ts:epoch}')
+        self.assertEqual(grok_search('soon', compiled), {'ts': 'soon'})
+
+    def test_out_of_range_kept(self):
+        value = '9999-12-31T23:59:59-01:00'
+        compiled = compile_pattern('%{TIMESTAMP_ISO8601:t:epoch}',
+                                   instrument=True)
+        self.assertEqual(grok_search(value, compiled), {'t': value})
+        self.assertEqual(compiled.stats.conversion_failures, {'t': 1})
+        self.assertEqual(grok_match(value, '%{TIMESTAMP_ISO8601:t:epoch}'),
+                         {'t': value})
+
+    def test_auto_map(self):
+        pattern = '%{SYSLOGTIMESTAMP:when} %{INT:pid}'
+        self.assertEqual(grok_match('Oct 11 22:14:15 42', pattern,
+                                    auto_map=True),
+                         {'when': 'Oct 11 22:14:15', 'pid': 42})
+        self.assertEqual(
+            grok_match('Oct 11 22:14:15 42', pattern,
+                       auto_map=('int', 'datetime')),
+            {'when': datetime.datetime(time.gmtime().tm_year, 10, 11, 22,
+                                       14, 15),
+             'pid': 42})
+        self.assertRaises(exceptions.GrokError, compile_pattern, pattern,
+                          auto_map=('int', 'date'))
+
+    def test_columns(self):
+        compiled = compile_pattern(
+            '%{TIMESTAMP_ISO8601:at:epoch} %{NOTSPACE:ts:datetime}')
+        result = grok_search_columns(
+            ['2000-10-10T20:55:36Z 2000-10-10T20:55:36Z',
+             '2000-10-10T20:55:37Z soon'], compiled)
+        self.assertEqual(result.columns['at'].typecode, 'd')
+        self.assertEqual(result.columns['at'].tolist(),
+                         [971211336.0, 971211337.0])
+        self.assertEqual(result.columns['ts'],
+                         [datetime.datetime(2000, 10, 10, 20, 55, 36,
+                                            tzinfo=UTC), None])
+        self.assertEqual(list(result.masks['ts']), [1, 0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+# vim: set et ts=4 sw=4 fileencoding=utf-8:
+'''
+tests.test_watch
+================
+'''
+import os
+import shutil
+import tempfile
+import unittest
+
+from yalp_grok import WatchedPatterns, exceptions, grok_search
+
+
+class TestWatchedPatterns(unittest.TestCase):
+    ''' Test recompiling patterns when pattern files change '''
+
+    def setUp(self):
+        self.patterns_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.patterns_dir)
+        self.write('names', 'NAME [a-z]+\nGREETING hello %{NAME:name}\n')
+        self.write('numbers', 'AGE %{INT}\n')
+        self.watched = WatchedPatterns([self.patterns_dir], auto_map=True)
+        self.watched.add('greeting', '%{GREETING}')
+        self.watched.add('age', '%{NAME:name} is %{AGE:age}')
+        self.watched.add('%{INT:number}')
+
+    def write(self, name, content):
+        path = os.path.join(self.patterns_dir, name)
+        with open(path, 'w') as pfh:
+            pfh.write(content)
+        # Make the change visible on file systems with coarse times
+        stat = os.stat(path)
+        os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+
+    def test_lookup(self):
+        self.assertEqual(len(self.watched), 3)
+        self.assertIn('greeting', self.watched)
+        self.assertEqual(sorted(self.watched),
+                         ['%{INT:number}', 'age', 'greeting'])
+        self.assertEqual(grok_search('hello bob', self.watched['greeting']),
+                         {'name': 'bob'})
+        self.assertEqual(grok_search('tim is 30', self.watched['age']),
+                         {'name': 'tim', 'age': 30})
+
+    def test_unchanged(self):
+        before = dict((key, self.watched[key]) for key in self.watched)
+        self.assertEqual(self.watched.check(), set())
+        self.assertTrue(all(self.watched[key] is before[key]
+                            for key in before))
+
+    def test_recompile_dependents_only(self):
+        number = self.watched['%{INT:number}']
+        self.write('names', 'NAME [A-Z]+\nGREETING hello %{NAME:name}\n')
+        self.assertEqual(self.watched.check(), set(['greeting', 'age']))
+        self.assertIs(self.watched['%{INT:number}'], number)
+        self.assertEqual(grok_search('hello BOB', self.watched['greeting']),
+                         {'name': 'BOB'})
+        self.assertEqual(self.watched.check(), set())
+
+    def test_unrelated_change(self):
+        # GREETING is rewritten identically, only AGE changes
+        self.write('names', 'GREETING hello %{NAME:name}\nNAME [a-z]+\n')
+        self.write('numbers', 'AGE %{INT}s?\n')
+        self.assertEqual(self.watched.check(), set(['age']))
+        self.assertEqual(grok_search('tim is 30s', self.watched['age'])['age'],
+                         '30s')
+
+    def test_new_file_overrides_bundled(self):
+        self.write('more', 'INT x+\n')
+        self.assertEqual(self.watched.check(),
+                         set(['age', '%{INT:number}']))
+        self.assertEqual(grok_search('12 xx', self.watched['%{INT:number}']),
+                         {'number': 'xx'})
+
+        os.unlink(os.path.join(self.patterns_dir, 'more'))
+        self.assertEqual(self.watched.check(),
+                         set(['age', '%{INT:number}']))
+        self.assertEqual(grok_search('12 xx', self.watched['%{INT:number}']),
+                         {'number': 12})
+
+    def test_broken_edit(self):
+        greeting = self.watched['greeting']
+        self.write('names', 'GREETING hello %{NAME:name}\n')
+        with self.assertRaises(exceptions.PatternNotFound):
+            self.watched.check()
+        self.assertIs(self.watched['greeting'], greeting)
+
+        self.write('names', 'NAME \\w+\nGREETING hello %{NAME:name}\n')
+        self.assertEqual(self.watched.check(), set(['greeting', 'age']))
+
+    def test_add_and_remove(self):
+        compiled = self.watched.add('%{NAME:first} %{NAME:last}')
+        self.assertIs(self.watched['%{NAME:first} %{NAME:last}'], compiled)
+        self.watched.remove('greeting')
+        self.assertNotIn('greeting', self.watched)
+        self.write('names', 'NAME [A-Z]+\n')
+        self.assertEqual(self.watched.check(),
+                         set(['age', '%{NAME:first} %{NAME:last}']))
+
+    def test_compile_options(self):
+        watched = WatchedPatterns([self.patterns_dir], output='tuple',
+                                  intern=['name'], optimize=True)
+        compiled = watched.add('greeting', '%{GREETING}')
+        self.assertEqual(grok_search('hello bob', compiled), ('bob',))
+        self.write('names', 'NAME [A-Z]+\nGREETING hello %{NAME:name}\n')
+        watched.check()
+        first = grok_search('hello BOB', watched['greeting'])
+        second = grok_search('hello ' + 'bob'.upper(), watched['greeting'])
+        self.assertEqual(first, ('BOB',))
+        self.assertIs(first[0], second[0])
+        self.assertRaises(exceptions.GrokError, watched.add, '%{NAME:other}')
+        self.assertRaises(TypeError, WatchedPatterns, [self.patterns_dir],
+                          outputs='tuple')
@@ -4,9 +4,17 @@ tests.test_yalp_grok
 ====================
 '''
 import os
+import pickle
 import unittest
 
-from yalp_grok import grok_match
+try:
+    from unittest import mock
+except ImportError:  # pragma: no cover
+    import mock
+
+from yalp_grok import compile_pattern, grok_match, grok_search
+from yalp_grok.exceptions import GrokError, SearchTimeout
+from yalp_grok.yalp_grok import CompiledPattern, _apply_map
 
 
 class TestOnePattern(unittest.TestCase):
@@ -341,3 +349,279 @@ class TestDefinedType(unittest.TestCase):
         self.assertEqual(match['referrer'], '"-"')
         self.assertEqual(match['agent'],
                          '"Mozilla/5.0 (Windows NT 6.1; WOW64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/36.0.1985.125 Safari/537.36"')
+
+
+class TestPrefilter(unittest.TestCase):
+    ''' Test rejecting texts lacking the literals of a pattern '''
+
+    PATTERN = '%{WORD:verb} %{URIPATHPARAM:path} HTTP/%{NUMBER:version}'
+
+    def test_literals(self):
+        self.assertEqual(compile_pattern(self.PATTERN).literals,
+                         (' HTTP/', ' /'))
+        self.assertEqual(compile_pattern(self.PATTERN, as_bytes=True).literals,
+                         (b' HTTP/', b' /'))
+        self.assertEqual(
+            compile_pattern(self.PATTERN, prefilter=False).literals, ())
+
+    def test_regex_skipped(self):
+        compiled = compile_pattern(self.PATTERN)
+        regex = mock.Mock(wraps=compiled.regex,
+                          groupindex=compiled.regex.groupindex)
+        compiled = CompiledPattern(regex, compiled.type_map, (' HTTP/',))
+        self.assertIsNone(grok_search('GET /index.html FTP/1.0', compiled))
+        self.assertFalse(regex.search.called)
+        self.assertEqual(grok_search('GET /index.html HTTP/1.0', compiled),
+                         {'verb': 'GET', 'path': '/index.html',
+                          'version': '1.0'})
+        self.assertTrue(regex.search.called)
+
+    def test_same_results(self):
+        for text in ('GET / HTTP/1.1', 'GET / HTTP', 'HTTP/ GET /'):
+            self.assertEqual(
+                grok_search(text, compile_pattern(self.PATTERN)),
+                grok_search(text, compile_pattern(self.PATTERN,
+                                                  prefilter=False)))
+
+    def test_search_bounds(self):
+        compiled = compile_pattern(self.PATTERN)
+        text = 'GET / HTTP/1.1 GET /'
+        self.assertIsNone(compiled.search(text, 15))
+        self.assertIsNotNone(compiled.search(text, 0, 14))
+        self.assertIsNone(compiled.search(text, 0, 9))
+
+    def test_plain_tuple(self):
+        compiled = compile_pattern(self.PATTERN)
+        self.assertEqual(
+            grok_search('GET / HTTP/1.1', (compiled.regex, compiled.type_map)),
+            grok_search('GET / HTTP/1.1', compiled))
+
+    def test_pickle(self):
+        compiled = pickle.loads(pickle.dumps(compile_pattern(self.PATTERN)))
+        self.assertEqual(compiled.literals, (' HTTP/', ' /'))
+
+    def test_fuzzy_matching(self):
+        compiled = compile_pattern('(?:foo){e<=1} %{INT:x}')
+        self.assertEqual(compiled.literals, ())
+        self.assertEqual(grok_search('fxo 12', compiled), {'x': '12'})
+
+    def test_bytes_escapes(self):
+        compiled = compile_pattern(r'a\xe9b c', as_bytes=True)
+        self.assertEqual(compiled.literals, ())
+        self.assertIsNotNone(compiled.search(b'a\xe9b c'))
+        compiled = compile_pattern(r'a\xe9b %{INT:x} c', as_bytes=True)
+        self.assertEqual(compiled.literals, (b' c',))
+        self.assertEqual(grok_search(b'a\xe9b 1 c', compiled), {'x': b'1'})
+
+
+class TestConverter(unittest.TestCase):
+    ''' Test the match converter built for every compiled pattern '''
+
+    def _legacy(self, text, compiled):
+        match_obj = compiled.regex.search(text)
+        return _apply_map(match_obj.groupdict(), compiled.type_map)
+
+    def test_same_as_apply_map(self):
+        pattern = ('%{WORD:verb} %{NOTSPACE:request}'
+                   '(?: HTTP/%{NUMBER:version:float})? %{NUMBER:status:int}'
+                   ' (?:%{NUMBER:bytes}|-)')
+        compiled = compile_pattern(pattern, auto_map=True)
+        for text in ('GET / HTTP/1.1 200 512', 'GET / 404 -'):
+            self.assertEqual(grok_search(text, compiled),
+                             self._legacy(text, compiled))
+
+    def test_failed_conversion_kept(self):
+        compiled = compile_pattern('%{DATA:num:int}x')
+        self.assertEqual(grok_search('12ax', compiled), {'num': '12a'})
+
+    def test_no_named_groups(self):
+        self.assertEqual(grok_search('12', compile_pattern('%{INT}')), {})
+
+    def test_one_named_group(self):
+        self.assertEqual(grok_search('12', compile_pattern('%{INT:n:int}')),
+                         {'n': 12})
+
+
+class TestTimeout(unittest.TestCase):
+    ''' Test search time budgets '''
+
+    # Backtracks exponentially on lines of words not ending with one
+    SLOW_PATTERN = r'(?:\w+\s?)+$'
+    SLOW_TEXT = 'a' * 5000 + '!'
+
+    def test_compiled(self):
+        compiled = compile_pattern(self.SLOW_PATTERN)
+        self.assertRaises(SearchTimeout, grok_search, self.SLOW_TEXT,
+                          compiled, 0.05)
+
+    def test_plain_tuple(self):
+        compiled = compile_pattern(self.SLOW_PATTERN)
+        self.assertRaises(SearchTimeout, grok_search, self.SLOW_TEXT,
+                          (compiled.regex, compiled.type_map), 0.05)
+
+    def test_grok_match(self):
+        self.assertRaises(SearchTimeout, grok_match, self.SLOW_TEXT,
+                          self.SLOW_PATTERN, timeout=0.05)
+
+    def test_within_budget(self):
+        self.assertEqual(grok_match('gary 25', '%{WORD:name} %{INT:age:int}',
+                                    timeout=1),
+                         {'name': 'gary', 'age': 25})
+
+    def test_instrumented(self):
+        compiled = compile_pattern(self.SLOW_PATTERN, instrument=True)
+        self.assertRaises(SearchTimeout, grok_search, self.SLOW_TEXT,
+                          compiled, 0.05)
+        snapshot = compiled.stats.snapshot()
+        self.assertEqual((snapshot.timeouts, snapshot.misses), (1, 1))
+
+
+class TestMatchMode(unittest.TestCase):
+    ''' Test matching at the start or over the whole text '''
+
+    PATTERN = '%{WORD:name} %{INT:age:int}'
+
+    def test_modes(self):
+        text = 'user gary 25'
+        results = dict(
+            (mode, grok_search(text, compile_pattern(self.PATTERN,
+                                                     mode=mode)))
+            for mode in ('search', 'match', 'fullmatch'))
+        self.assertEqual(results, {'search': {'name': 'gary', 'age': 25},
+                                   'match': None, 'fullmatch': None})
+        self.assertEqual(
+            grok_search('gary 25', compile_pattern(self.PATTERN,
+                                                   mode='fullmatch')),
+            {'name': 'gary', 'age': 25})
+        self.assertIsNone(
+            grok_search('gary 25 years', compile_pattern(self.PATTERN,
+                                                         mode='fullmatch')))
+
+    def test_bounds(self):
+        compiled = compile_pattern(self.PATTERN, mode='fullmatch')
+        self.assertIsNotNone(compiled.search('> gary 25\n', 2, 9))
+
+    def test_auto_detection(self):
+        self.assertEqual(compile_pattern(self.PATTERN).mode, 'search')
+        self.assertEqual(compile_pattern('^' + self.PATTERN).mode, 'match')
+        self.assertEqual(compile_pattern(r'\A%{INT}|\A%{WORD}').mode,
+                         'match')
+        self.assertEqual(compile_pattern('(?m)^' + self.PATTERN).mode,
+                         'search')
+        self.assertEqual(
+            compile_pattern('^' + self.PATTERN, prefilter=False).mode,
+            'match')
+
+    def test_unknown_mode(self):
+        self.assertRaises(GrokError, compile_pattern, self.PATTERN,
+                          mode='scan')
+
+    def test_pickle(self):
+        for instrument in (False, True):
+            compiled = pickle.loads(pickle.dumps(compile_pattern(
+                self.PATTERN, mode='match', instrument=instrument)))
+            self.assertEqual(compiled.mode, 'match')
+            self.assertIsNone(grok_search('user gary 25', compiled))
+
+    def test_timeout(self):
+        compiled = compile_pattern(r'(?:\w+\s?)+$', mode='match')
+        self.assertRaises(SearchTimeout, grok_search, 'a' * 5000 + '!',
+                          compiled, 0.05)
+
+
+class TestCaptures(unittest.TestCase):
+    ''' Test compiling only some groups as capturing '''
+
+    PATTERN = '%{SYSLOGBASE} %{INT:n:int} (?P<rest>%{GREEDYDATA})'
+    TEXT = 'Sep 14 02:01:37 lb haproxy[14387]: 12 done'
+
+    def test_all_by_default(self):
+        compiled = compile_pattern(self.PATTERN)
+        self.assertGreater(compiled.regex.groups,
+                           len(compiled.regex.groupindex))
+
+    def test_named(self):
+        compiled = compile_pattern(self.PATTERN, captures='named')
+        self.assertEqual(compiled.regex.groups,
+                         len(compiled.regex.groupindex))
+        self.assertEqual(grok_search(self.TEXT, compiled),
+                         grok_search(self.TEXT, compile_pattern(self.PATTERN)))
+
+    def test_named_top_level(self):
+        compiled = compile_pattern(self.PATTERN, captures='named-top-level')
+        self.assertEqual(grok_search(self.TEXT, compiled),
+                         {'n': 12, 'rest': 'done'})
+
+    def test_names(self):
+        compiled = compile_pattern(self.PATTERN, auto_map=True,
+                                   captures=['pid', 'program'])
+        self.assertEqual(compiled.regex.groups, 2)
+        self.assertEqual(compiled.type_map, {'pid': 'int'})
+        self.assertEqual(grok_search(self.TEXT, compiled),
+                         {'program': 'haproxy', 'pid': 14387})
+
+    def test_back_references_kept(self):
+        compiled = compile_pattern(r'(%{WORD}) \1 %{INT:n}',
+                                   captures=['n'])
+        self.assertEqual(grok_search('a a 1', compiled), {'n': '1'})
+        self.assertIsNone(grok_search('a b 1', compiled))
+
+    def test_unknown_policy(self):
+        self.assertRaises(GrokError, compile_pattern, self.PATTERN,
+                          captures='top-level')
+
+
+class TestOutput(unittest.TestCase):
+    ''' Test returning records or tuples instead of dictionaries '''
+
+    PATTERN = '%{WORD:verb} %{NOTSPACE:request} %{NUMBER:status:int}'
+    TEXT = 'GET /index.html 200'
+
+    def test_record(self):
+        compiled = compile_pattern(self.PATTERN, output='record')
+        record = grok_search(self.TEXT, compiled)
+        self.assertIsInstance(record, compiled.record)
+        self.assertEqual(record.verb, 'GET')
+        self.assertEqual(record.status, 200)
+        self.assertEqual(record._asdict(),
+                         grok_search(self.TEXT, compile_pattern(self.PATTERN)))
+        self.assertIs(compile_pattern(self.PATTERN, output='record').record,
+                      compiled.record)
+
+    def test_tuple(self):
+        compiled = compile_pattern(self.PATTERN, output='tuple')
+        self.assertEqual(compiled.fields, ('verb', 'request', 'status'))
+        self.assertIsNone(compiled.record)
+        self.assertEqual(grok_search(self.TEXT, compiled),
+                         ('GET', '/index.html', 200))
+
+    def test_one_and_no_named_groups(self):
+        compiled = compile_pattern('%{INT:n:int}', output='tuple')
+        self.assertEqual(grok_search('12', compiled), (12,))
+        compiled = compile_pattern('%{INT}', output='record')
+        self.assertEqual(grok_search('12', compiled), ())
+
+    def test_invalid_field_names(self):
+        compiled = compile_pattern('(?P<class>%{WORD}) (?P<_id>%{INT})',
+                                   output='record')
+        self.assertEqual(compiled.fields, ('class', '_id'))
+        self.assertEqual(grok_search('a 1', compiled), ('a', '1'))
+
+    def test_pickle(self):
+        compiled = compile_pattern(self.PATTERN, output='record',
+                                   instrument=True)
+        record = grok_search(self.TEXT, compiled)
+        self.assertEqual(pickle.loads(pickle.dumps(record)), record)
+        self.assertIsInstance(pickle.loads(pickle.dumps(record)),
+                              compiled.record)
+        compiled = pickle.loads(pickle.dumps(compiled))
+        self.assertEqual(compiled.output, 'record')
+        self.assertEqual(grok_search(self.TEXT, compiled), record)
+
+    def test_unknown_output(self):
+        self.assertRaises(GrokError, compile_pattern, self.PATTERN,
+                          output='list')
+
+    def test_unknown_option(self):
+        self.assertRaises(TypeError, compile_pattern, self.PATTERN,
+                          outputs='tuple')
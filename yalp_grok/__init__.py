@@ -4,3 +4,24 @@ yalp_grok
 =========
 '''
 from .yalp_grok import compile_pattern, grok_search, grok_match  # noqa
+from .yalp_grok import (  # noqa
+    clear_pattern_cache, pattern_cache_info, set_pattern_cache_size,
+)
+from .batch import grok_search_batch  # noqa
+from .columns import grok_search_columns  # noqa
+from .follow import LogFollower, grok_follow  # noqa
+from .grokset import GrokSet, compile_patterns  # noqa
+from .parallel import grok_parse_file_parallel  # noqa
+from .router import Router, compile_router  # noqa
+from .stream import grok_iter, grok_iter_mmap  # noqa
+from .watch import WatchedPatterns  # noqa
+
+
+def all_stats():
+    '''
+    Return snapshots of the statistics of every instrumented pattern, see
+    yalp_grok.stats.all_stats(). The stats module is only imported when
+    used.
+    '''
+    from . import stats
+    return stats.all_stats()
@@ -0,0 +1,12 @@
+# vim: set et ts=4 sw=4 fileencoding=utf-8:
+'''
+yalp_grok.__main__
+==================
+
+Run the command line tool with python -m yalp_grok.
+'''
+import sys
+
+from .cli import main
+
+sys.exit(main())
@@ -0,0 +1,86 @@
+# vim: set et ts=4 sw=4 fileencoding=utf-8:
+'''
+yalp_grok.batch
+===============
+
+Search a pattern in a batch of lines with a pool of threads.
+
+The regex module can run a search without holding the GIL, so threads
+searching at the same time really run in parallel on several cores.
+Only the regex runs without the GIL: the literal prefilter and the
+conversion of matches into dictionaries still take turns, which is why
+they are kept as cheap as possible, see compile_pattern().
+
+Unlike grok_parse_file_parallel(), nothing is pickled or sent to other
+processes, so this suits services parsing lines they already hold in
+memory.
+'''
+from .yalp_grok import CompiledPattern
+
+# Chunks of lines per thread, more balance the work better between
+# threads at the cost of more scheduling
+CHUNKS_PER_THREAD = 4
+
+
+def grok_search_batch(lines, pattern, threads=None, pool=None):
+    '''
+    Search pattern in every line of lines with threads threads, one per
+    CPU by default.
+
+    pattern is a pattern compiled by compile_pattern(). Returns the list
+    of the results of grok_search() for every line, in the order of
+    lines.
+
+    pool is a multiprocessing.pool.ThreadPool to run the searches in,
+    rather than starting threads for this batch only. Reusing one pool
+    for many batches saves starting threads every time. threads should
+    then be the size of the pool, it decides how lines are split.
+    '''
+    if not isinstance(pattern, CompiledPattern):
+        pattern = CompiledPattern(pattern[0], pattern[1])
+    lines = list(lines)
+
+    # multiprocessing takes longer to import than the rest of yalp_grok
+    import multiprocessing
+    from multiprocessing.pool import ThreadPool
+
+    threads = threads or multiprocessing.cpu_count()
+    if pool is not None:
+        return _search(pool, threads, pattern, lines)
+    if threads <= 1 or len(lines) <= 1:
+        return _search_chunk(pattern, lines)
+    pool = ThreadPool(threads)
+    try:
+        return _search(pool, threads, pattern, lines)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def _search(pool, threads, pattern, lines):
+    '''
+    Search pattern in chunks of lines on pool.
+    '''
+    chunk_size = max(1, -(-len(lines) // (threads * CHUNKS_PER_THREAD)))
+    chunks = [lines[start:start + chunk_size]
+              for start in range(0, len(lines), chunk_size)]
+    results = []
+    for chunk_results in pool.map(
+            lambda chunk: _search_chunk(pattern, chunk, True), chunks, 1):
+        results.extend(chunk_results)
+    return results
+
+
+def _search_chunk(pattern, lines, concurrent=None):
+    '''
+    Search pattern in every line, releasing the GIL while the regex runs
+    if concurrent is set.
+    '''
+    search = pattern.search
+    convert = pattern.convert
+    results = []
+    append = results.append
+    for line in lines:
+        match_obj = search(line, 0, None, None, concurrent)
+        append(None if match_obj is None else convert(match_obj))
+    return results
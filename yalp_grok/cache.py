@@ -0,0 +1,100 @@
+# vim: set et ts=4 sw=4 fileencoding=utf-8:
+'''
+yalp_grok.cache
+===============
+
+Bounded least recently used cache used to memoize compiled patterns.
+'''
+import threading
+from collections import OrderedDict, namedtuple
+
+
+CacheInfo = namedtuple('CacheInfo', 'hits misses maxsize currsize')
+
+_MISSING = object()
+
+
+class LRUCache(object):
+    '''
+    Thread safe mapping with a maximum size and least recently used
+    eviction.
+
+    A maxsize of None means the cache is unbounded, a maxsize of 0
+    disables caching altogether. Hits and misses are counted by get().
+    '''
+
+    def __init__(self, maxsize=128):
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def maxsize(self):
+        ''' Maximum number of entries kept in the cache '''
+        return self._maxsize
+
+    @maxsize.setter
+    def maxsize(self, maxsize):
+        with self._lock:
+            self._maxsize = maxsize
+            self._evict()
+
+    def get(self, key, default=None):
+        '''
+        Return the value cached for key, or default if not cached.
+        '''
+        with self._lock:
+            value = self._data.pop(key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self._data[key] = value
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        '''
+        Store value for key, evicting the least recently used entries
+        if the cache is full.
+        '''
+        with self._lock:
+            if self._maxsize == 0:
+                return
+            self._data.pop(key, None)
+            self._data[key] = value
+            self._evict()
+
+    def clear(self):
+        '''
+        Remove all entries and reset the counters.
+        '''
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        '''
+        Return a CacheInfo tuple describing the cache.
+        '''
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self._maxsize,
+                             len(self._data))
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def _evict(self):
+        '''
+        Drop oldest entries until the size limit is respected. Caller
+        must hold the lock.
+        '''
+        if self._maxsize is None:
+            return
+        while len(self._data) > self._maxsize:
+            self._data.popitem(last=False)
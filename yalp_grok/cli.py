@@ -0,0 +1,250 @@
+# vim: set et ts=4 sw=4 fileencoding=utf-8:
+'''
+yalp_grok.cli
+=============
+
+Command line tool parsing log files or standard input with a grok
+pattern and writing one JSON object or tab separated row per matched
+line.
+
+Installed as yalp-grok, also runnable as python -m yalp_grok. Results
+are written in blocks of BATCH_SIZE lines rather than one write per
+line. With several workers, files are parsed by
+grok_parse_file_parallel() and standard input by grok_search_batch().
+'''
+from __future__ import print_function
+
+import argparse
+import functools
+import io
+import itertools
+import json
+import sys
+import timeit
+
+import regex
+
+from . import exceptions, library
+from .batch import grok_search_batch
+from .parallel import grok_parse_file_parallel
+from .stream import _batches, grok_iter
+from .yalp_grok import MATCH_MODES, PREDEFINED_PATTERNS, compile_pattern
+
+# Lines parsed and written at a time
+BATCH_SIZE = 1024
+
+# Characters escaped in TSV fields, backslash first
+TSV_ESCAPES = (('\\', '\\\\'), ('\t', '\\t'), ('\n', '\\n'), ('\r', '\\r'))
+
+
+def main(argv=None):
+    ''' Parse files with a grok pattern '''
+    parser = _argument_parser()
+    # Files may follow options
+    args = getattr(parser, 'parse_intermixed_args', parser.parse_args)(argv)
+
+    try:
+        custom_patterns = dict(
+            (name, definition.regex_str) for name, definition in
+            library.load_patterns(args.patterns_dir).items())
+        pattern = args.pattern
+        if pattern in custom_patterns or pattern in PREDEFINED_PATTERNS:
+            pattern = '%{{{0}}}'.format(pattern)
+        compiled = compile_pattern(pattern, custom_patterns,
+                                   auto_map=args.auto_map, mode=args.mode)
+        output = _open_output(args.output)
+        unmatched = _open_output(args.unmatched) if args.unmatched else None
+    except (exceptions.GrokError, regex.error, IOError, OSError) as exc:
+        parser.error(str(exc))
+    counts = {'matched': 0, 'unmatched': 0}
+
+    def _on_miss(_, line):
+        counts['unmatched'] += 1
+        if unmatched is not None:
+            unmatched.write(line + u'\n')
+
+    encode = _encoder(args.format, compiled, output)
+    start = timeit.default_timer()
+    try:
+        status = _write_sources(
+            parser.prog, args.files or ['-'],
+            functools.partial(_parse_source, pattern, compiled,
+                              custom_patterns, args, _on_miss),
+            encode, output, counts)
+    finally:
+        for stream in (output, unmatched):
+            if stream is sys.stdout:
+                stream.flush()
+            elif stream is not None:
+                stream.close()
+
+    if args.stats:
+        _print_stats(counts, timeit.default_timer() - start)
+    return status
+
+
+def _argument_parser():
+    '''
+    Parser of the command line arguments.
+    '''
+    parser = argparse.ArgumentParser(
+        prog='yalp-grok',
+        description='Parse lines with a grok pattern and write the fields '
+                    'of every matched line as JSON lines or TSV.')
+    parser.add_argument('pattern',
+                        help='grok pattern, or the name of a pattern')
+    parser.add_argument('files', nargs='*', metavar='file',
+                        help='files to parse, standard input if none or -')
+    parser.add_argument('-d', '--patterns-dir', action='append', default=[],
+                        help='directory of custom pattern files, may be '
+                             'repeated')
+    parser.add_argument('-a', '--auto-map', action='store_true',
+                        help='convert fields to int or float from the '
+                             'patterns they match')
+    parser.add_argument('-m', '--mode', choices=MATCH_MODES,
+                        help='match anywhere in lines, at their start or '
+                             'whole lines')
+    parser.add_argument('-f', '--format', choices=('json', 'tsv'),
+                        default='json', help='output format')
+    parser.add_argument('-o', '--output', help='output file, standard '
+                                               'output by default')
+    parser.add_argument('-u', '--unmatched',
+                        help='file to write lines which do not match to')
+    parser.add_argument('-w', '--workers', type=int, default=1,
+                        help='worker processes for files, threads for '
+                             'standard input')
+    parser.add_argument('-e', '--encoding', default='utf-8')
+    parser.add_argument('--errors', default='replace',
+                        help='how to handle undecodable bytes')
+    parser.add_argument('-s', '--stats', action='store_true',
+                        help='print line counts and throughput to '
+                             'standard error')
+    return parser
+
+
+def _encoder(output_format, compiled, output):
+    '''
+    Function encoding a result as a line of output_format, writing the
+    header row of TSV output.
+    '''
+    if output_format == 'json':
+        return json.JSONEncoder(separators=(',', ':'),
+                                default=_json_field).encode
+
+    groupindex = compiled.regex.groupindex
+    names = sorted(groupindex, key=groupindex.get)
+    output.write(u'\t'.join(names) + u'\n')
+
+    def encode(result):
+        return u'\t'.join(_tsv_field(result[name]) for name in names)
+    return encode
+
+
+def _write_sources(prog, sources, parse, encode, output, counts):
+    '''
+    Write the results of parse for every source, returning the exit
+    status: 1 if a source could not be read, which does not stop the
+    others.
+    '''
+    status = 0
+    for source in sources:
+        try:
+            _write(parse(source), encode, output, counts)
+        except (IOError, OSError) as exc:
+            print('{0}: {1}'.format(prog, exc), file=sys.stderr)
+            status = 1
+    return status
+
+
+def _parse_source(pattern, compiled, custom_patterns, args, on_miss,
+                  source):
+    '''
+    Results of the lines of source, a path or - for standard input.
+    '''
+    if source == '-':
+        return _parse_stdin(compiled, args, on_miss)
+    if args.workers > 1:
+        return grok_parse_file_parallel(
+            source, pattern, args.workers, on_miss=on_miss,
+            custom_patterns=custom_patterns, auto_map=args.auto_map,
+            encoding=args.encoding, errors=args.errors, mode=args.mode)
+    return grok_iter(source, compiled, on_miss=on_miss,
+                     encoding=args.encoding, errors=args.errors)
+
+
+def _print_stats(counts, elapsed):
+    '''
+    Print the line counts and throughput to standard error.
+    '''
+    lines = counts['matched'] + counts['unmatched']
+    print('{0} lines, {1} matched, {2} unmatched in {3:.2f} s, '
+          '{4:.0f} lines/s'.format(
+              lines, counts['matched'], counts['unmatched'], elapsed,
+              lines / elapsed if elapsed else 0),
+          file=sys.stderr)
+
+
+def _parse_stdin(compiled, args, on_miss):
+    '''
+    Parse the lines of standard input, in batches on worker threads if
+    there are several workers.
+    '''
+    stdin = io.TextIOWrapper(getattr(sys.stdin, 'buffer', sys.stdin),
+                             encoding=args.encoding, errors=args.errors)
+    if args.workers <= 1:
+        for result in grok_iter(stdin, compiled, on_miss=on_miss):
+            yield result
+        return
+
+    while True:
+        lines = [line.rstrip(u'\r\n')
+                 for line in itertools.islice(stdin, BATCH_SIZE)]
+        if not lines:
+            return
+        results = grok_search_batch(lines, compiled, args.workers)
+        for number, (line, result) in enumerate(zip(lines, results)):
+            if result is None:
+                on_miss(number, line)
+            else:
+                yield result
+
+
+def _write(results, encode, output, counts):
+    '''
+    Write encoded results in blocks of BATCH_SIZE lines, counting them.
+    '''
+    for block in _batches(results, BATCH_SIZE):
+        output.write(u''.join(encode(result) + u'\n' for result in block))
+        counts['matched'] += len(block)
+
+
+def _json_field(value):
+    '''
+    JSON value of the fields json can not encode, ISO 8601 text for
+    datetimes.
+    '''
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    raise TypeError('Can not encode {0!r} as JSON'.format(value))
+
+
+def _tsv_field(value):
+    '''
+    TSV text of a field value, empty for missing values.
+    '''
+    if value is None:
+        return u''
+    value = u'{0}'.format(value)
+    for char, escape in TSV_ESCAPES:
+        if char in value:
+            value = value.replace(char, escape)
+    return value
+
+
+def _open_output(path):
+    '''
+    Text stream writing to path, standard output for None or -.
+    '''
+    if path is None or path == '-':
+        return sys.stdout
+    return io.open(path, 'w', encoding='utf-8')
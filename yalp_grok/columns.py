@@ -0,0 +1,161 @@
+# vim: set et ts=4 sw=4 fileencoding=utf-8:
+'''
+yalp_grok.columns
+=================
+
+Parse lines into one column per named group rather than one dictionary
+per line.
+
+Fields the type map of the pattern converts to int, float or epoch
+seconds are stored in array.array buffers, other fields in lists. Each
+column has a mask telling which rows have a value, since arrays can not
+hold None, and the indexes of the lines which did not match are kept
+apart. With numpy installed the columns can be turned into numpy arrays
+without copying the numeric buffers.
+'''
+import array
+from collections import namedtuple
+
+from . import exceptions
+from .yalp_grok import CONVERSIONS
+
+# array.array typecodes of the numeric types
+try:
+    array.array('q')
+    ARRAY_TYPECODES = {'int': 'q', 'float': 'd', 'epoch': 'd'}
+except ValueError:  # pragma: no cover
+    ARRAY_TYPECODES = {'int': 'l', 'float': 'd', 'epoch': 'd'}
+
+# Parsed lines: the values of every named group, a mask per group set to
+# 1 on rows having a value, the indexes of the lines which did not match
+# and the number of rows
+Columns = namedtuple('Columns', 'columns masks misses rows')
+
+
+def grok_search_columns(lines, pattern, as_numpy=False):
+    '''
+    Search pattern in every line of lines and return a Columns tuple.
+
+    pattern is a pattern compiled by compile_pattern(). Row n of every
+    column holds a field of the n-th line which matched, line endings
+    excluded. Numeric fields which are missing or fail to convert are
+    stored as 0 with their mask unset, other fields failing to convert
+    as None.
+
+    If as_numpy is set, numeric columns and masks are returned as numpy
+    arrays and other columns as numpy object arrays. This needs numpy,
+    which can be installed with the numpy extra of yalp_grok.
+    '''
+    regex = pattern[0]
+    names = sorted(regex.groupindex, key=regex.groupindex.get)
+    columns, masks, appenders = _make_columns(names, pattern[1])
+    misses, rows = _search_rows(lines, pattern, names, appenders)
+    result = Columns(columns, masks, misses, rows)
+    if as_numpy:
+        return to_numpy(result)
+    return result
+
+
+def _search_rows(lines, pattern, names, appenders):
+    '''
+    Search pattern in every line of lines, appending the fields names of
+    the matching lines with appenders, and return the indexes of the
+    lines which did not match and the number of rows.
+    '''
+    regex = pattern[0]
+    search = getattr(pattern, 'search', None) or regex.search
+    group_values = _group_values(tuple(regex.groupindex[name]
+                                       for name in names))
+    newline, crlf = (b'\n', b'\r\n') if isinstance(regex.pattern, bytes) \
+        else ('\n', '\r\n')
+
+    misses = array.array('l')
+    rows = 0
+    for number, line in enumerate(lines):
+        end = len(line)
+        if line.endswith(newline):
+            end -= 2 if line.endswith(crlf) else 1
+        match_obj = search(line, 0, end)
+        if match_obj is None:
+            misses.append(number)
+        else:
+            rows += 1
+            _append_row(group_values(match_obj), appenders)
+    return misses, rows
+
+
+def _make_columns(names, type_map):
+    '''
+    Return the columns and masks of the fields names, and for each field
+    a (append, append_mask, conversion, default) tuple.
+    '''
+    columns = {}
+    masks = {}
+    appenders = []
+    for name in names:
+        typecode = ARRAY_TYPECODES.get(type_map.get(name))
+        if typecode is None:
+            columns[name] = []
+            default = None
+        else:
+            columns[name] = array.array(typecode)
+            default = 0
+        masks[name] = bytearray()
+        appenders.append((columns[name].append, masks[name].append,
+                          CONVERSIONS.get(type_map.get(name)), default))
+    return columns, masks, appenders
+
+
+def _group_values(indexes):
+    '''
+    Return a function reading the groups at indexes of a match as a tuple.
+    '''
+    if len(indexes) > 1:
+        return lambda match_obj: match_obj.group(*indexes)
+    if indexes:
+        index = indexes[0]
+        return lambda match_obj: (match_obj.group(index),)
+    return lambda match_obj: ()
+
+
+def _append_row(values, appenders):
+    '''
+    Append the values of a matching line to their columns and masks.
+    '''
+    for value, (append, append_mask, conversion, default) in zip(
+            values, appenders):
+        if conversion is None:
+            append(value)
+            append_mask(value is not None)
+            continue
+        try:
+            append(conversion(value))
+        except (ValueError, TypeError, OverflowError):
+            append(default)
+            append_mask(0)
+        else:
+            append_mask(1)
+
+
+def to_numpy(result):
+    '''
+    Return a copy of a Columns tuple holding numpy arrays.
+
+    Numeric columns share their buffers with the original arrays.
+    '''
+    try:
+        import numpy
+    except ImportError:
+        raise exceptions.GrokError(
+            'numpy is needed, install yalp_grok[numpy]')
+
+    columns = {}
+    for name, column in result.columns.items():
+        if isinstance(column, array.array):
+            columns[name] = numpy.frombuffer(column, dtype=column.typecode)
+        else:
+            columns[name] = numpy.array(column, dtype=object)
+    masks = dict((name, numpy.frombuffer(mask, dtype=numpy.bool_))
+                 for name, mask in result.masks.items())
+    misses = numpy.frombuffer(result.misses, dtype=result.misses.typecode)
+    return Columns(columns, masks, misses, result.rows)
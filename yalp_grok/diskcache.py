@@ -0,0 +1,156 @@
+# vim: set et ts=4 sw=4 fileencoding=utf-8:
+'''
+yalp_grok.diskcache
+===================
+
+Persistent cache of compiled patterns, shared between processes.
+
+compile_pattern() spends most of its time in the regex module compiler,
+and every new process compiles the same patterns again. Compiled regexes
+of the regex module pickle to their compiled code, so a cache entry
+holds the pickled regex along with the type map, literals and match mode
+of the pattern, and loading it skips both the expansion and the regex
+compiler. Regexes which can not be pickled are stored as their source
+and compiled again on load.
+
+Entries are keyed by a hash of the pattern, the custom patterns, the
+content of every pattern file and the compile options, as well as the
+sources of the modules compiling patterns and the versions of regex and
+Python. Editing a pattern file thus gives new keys rather than stale
+hits. Entries are written to a temporary file first and then renamed,
+so concurrent processes never read a partial entry.
+
+Entries are unpickled, the cache directory must only be writable by
+trusted users.
+'''
+import hashlib
+import os
+import pickle
+import sys
+
+import regex as re
+
+# Bumped when the layout of entries changes
+CACHE_FORMAT = 1
+
+# Sources of the modules whose code decides what a pattern compiles to.
+# yalp_grok.version is not used, it takes far longer to import than
+# loading an entry.
+SOURCE_FILES = tuple(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), name)
+    for name in ('yalp_grok.py', 'library.py', 'regex_tree.py'))
+
+ENTRY_SUFFIX = '.pattern'
+
+# Digests of pattern files by path, along with the size and modification
+# time they were computed for
+_FILE_DIGESTS = {}
+
+_replace = getattr(os, 'replace', os.rename)
+
+
+def cache_key(pattern, custom_patterns, patterns_dirs, options):
+    '''
+    Return the key of the entry of pattern compiled with custom_patterns,
+    the pattern files of patterns_dirs and options, a dictionary of the
+    other arguments of compile_pattern().
+    '''
+    key = hashlib.sha256()
+    for part in (CACHE_FORMAT, re.__version__,
+                 sys.version_info[:3], pattern,
+                 sorted(custom_patterns.items()) if custom_patterns else None,
+                 sorted(options.items())):
+        key.update(repr(part).encode('utf-8'))
+    for path in SOURCE_FILES:
+        if os.path.isfile(path):
+            key.update(_file_digest(path))
+    for patterns_dir in patterns_dirs:
+        for name in sorted(os.listdir(patterns_dir)):
+            path = os.path.join(patterns_dir, name)
+            if os.path.isfile(path):
+                key.update(name.encode('utf-8'))
+                key.update(_file_digest(path))
+    return key.hexdigest()
+
+
+def load(cache_dir, key):
+    '''
+    Return (regex, type map, literals, mode) stored for key in cache_dir,
+    None if there is no usable entry.
+    '''
+    try:
+        with open(_entry_path(cache_dir, key), 'rb') as efh:
+            entry = pickle.load(efh)
+        regex, type_map, literals, mode = entry
+        if isinstance(regex, tuple):
+            regex = re.compile(*regex)
+    except (IOError, OSError, EOFError, ValueError, TypeError,
+            AttributeError, ImportError, pickle.UnpicklingError):
+        return None
+    return regex, type_map, literals, mode
+
+
+def store(cache_dir, key, regex, type_map, literals, mode):
+    '''
+    Write the entry of a compiled pattern for key in cache_dir, creating
+    the directory if needed. Failing to write is not an error.
+    '''
+    try:
+        data = pickle.dumps((regex, type_map, literals, mode),
+                            pickle.HIGHEST_PROTOCOL)
+    except (TypeError, pickle.PicklingError):
+        data = pickle.dumps(((regex.pattern, regex.flags), type_map,
+                             literals, mode), pickle.HIGHEST_PROTOCOL)
+    # Only needed on misses, keep it out of the time to load an entry
+    import tempfile
+
+    try:
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+        tmp_fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(tmp_fd, 'wb') as efh:
+                efh.write(data)
+            _replace(tmp_path, _entry_path(cache_dir, key))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    except (IOError, OSError):
+        pass
+
+
+def clear_disk_cache(cache_dir):
+    '''
+    Remove every entry from cache_dir.
+    '''
+    if not os.path.isdir(cache_dir):
+        return
+    for name in os.listdir(cache_dir):
+        if name.endswith(ENTRY_SUFFIX):
+            try:
+                os.unlink(os.path.join(cache_dir, name))
+            except OSError:
+                pass
+
+
+def _entry_path(cache_dir, key):
+    '''
+    Path of the entry for key.
+    '''
+    return os.path.join(cache_dir, key + ENTRY_SUFFIX)
+
+
+def _file_digest(path):
+    '''
+    Digest of the content of the file at path, computed again only when
+    its size or modification time change.
+    '''
+    stat = os.stat(path)
+    signature = (stat.st_size, getattr(stat, 'st_mtime_ns', stat.st_mtime))
+    cached = _FILE_DIGESTS.get(path)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    with open(path, 'rb') as pfh:
+        digest = hashlib.sha256(pfh.read()).digest()
+    _FILE_DIGESTS[path] = (signature, digest)
+    return digest
@@ -13,3 +13,11 @@ class GrokError(Exception):
 
 class PatternNotFound(GrokError):
     ''' Cannot find pattern '''
+
+
+class PatternCycle(GrokError):
+    ''' Patterns reference each other in a loop '''
+
+
+class SearchTimeout(GrokError):
+    ''' Search took longer than its time budget '''
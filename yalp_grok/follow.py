@@ -0,0 +1,288 @@
+# vim: set et ts=4 sw=4 fileencoding=utf-8:
+'''
+yalp_grok.follow
+================
+
+Search a pattern in the lines appended to a growing log file, like
+tail -F, resuming where a previous run stopped.
+
+The file is read in blocks of BLOCK_SIZE bytes rather than line by
+line, and only the complete lines of a block are decoded and searched:
+a partial last line is kept until the rest of it is written. The inode
+of the file and the offset of the end of the last complete line make up
+a Checkpoint, which can be saved to a file so that a restarted follower
+skips what was already parsed.
+
+Once the end of the file is reached, the path is checked for rotation,
+a new file in its place, and the open file for truncation. The rest of
+a rotated file is read before switching to the new one, a truncated
+file is read again from its start.
+'''
+import errno
+import io
+import os
+import time
+from collections import namedtuple
+
+from .yalp_grok import CompiledPattern
+
+# Bytes read at a time
+BLOCK_SIZE = 1 << 20
+
+# Position in a log file: its inode and the offset of the end of the
+# last line parsed
+Checkpoint = namedtuple('Checkpoint', 'inode offset')
+
+_replace = getattr(os, 'replace', os.rename)
+
+
+def grok_follow(path, pattern, checkpoint_path=None, interval=1.0,
+                stop=None, on_miss=None, encoding='utf-8', errors='replace',
+                from_end=False):
+    '''
+    Search pattern in the lines of the file at path as they are
+    appended, forever or until stop() returns true.
+
+    Yields the results of grok_search() for every line, see LogFollower
+    for the other arguments. When the end of the file is reached, waits
+    interval seconds before reading again. stop is called after every
+    read which found no new lines, and whenever it returns true the
+    checkpoint is saved and the iteration ends.
+    '''
+    follower = LogFollower(path, pattern, checkpoint_path, on_miss,
+                           encoding, errors, from_end=from_end)
+    try:
+        while True:
+            results = follower.poll()
+            if not results:
+                if stop is not None and stop():
+                    follower.save_checkpoint()
+                    return
+                time.sleep(interval)
+            for result in results:
+                yield result
+    finally:
+        follower.close()
+
+
+def load_checkpoint(path):
+    '''
+    Return the Checkpoint saved in the file at path, None if there is
+    none.
+    '''
+    import json
+
+    try:
+        with io.open(path, 'r', encoding='utf-8') as cfh:
+            checkpoint = json.load(cfh)
+        return Checkpoint(int(checkpoint['inode']),
+                          int(checkpoint['offset']))
+    except (IOError, OSError, ValueError, TypeError, KeyError):
+        return None
+
+
+def save_checkpoint(path, checkpoint):
+    '''
+    Write checkpoint to the file at path, through a temporary file
+    renamed in its place so that a crash never leaves a partial one.
+    '''
+    import json
+    import tempfile
+
+    directory = os.path.dirname(os.path.abspath(path))
+    tmp_fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(tmp_fd, 'w') as cfh:
+            json.dump(checkpoint._asdict(), cfh)
+        _replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class LogFollower(object):
+    '''
+    Reader of the lines appended to the file at path, searching pattern,
+    a pattern compiled by compile_pattern(), in them.
+
+    If checkpoint_path is given and holds a checkpoint of the same file,
+    reading starts from its offset. Otherwise it starts from the start
+    of the file, or from its end if from_end is set. The file does not
+    need to exist yet.
+
+    Lines are decoded with encoding and errors. If on_miss is given, it
+    is called with the number of the line, counted from the first line
+    read by this follower, and the text of every line which does not
+    match, and those lines are left out of the results.
+
+    The checkpoint covers the lines returned by poll() up to its
+    previous call, so lines still being handled when a process stops
+    are parsed again after a restart rather than lost.
+    '''
+
+    def __init__(self, path, pattern, checkpoint_path=None, on_miss=None,
+                 encoding='utf-8', errors='replace', block_size=BLOCK_SIZE,
+                 from_end=False):
+        if not isinstance(pattern, CompiledPattern):
+            pattern = CompiledPattern(pattern[0], pattern[1])
+        self.path = path
+        self.pattern = pattern
+        self.checkpoint_path = checkpoint_path
+        self.on_miss = on_miss
+        self.encoding = encoding
+        self.errors = errors
+        self.block_size = block_size
+        self.lines = 0
+        self._file = None
+        self._inode = None
+        self._offset = 0
+        self._pending = b''
+        self._saved = None
+
+        checkpoint = None
+        if checkpoint_path is not None:
+            checkpoint = self._saved = load_checkpoint(checkpoint_path)
+        self._open(checkpoint, from_end)
+
+    @property
+    def checkpoint(self):
+        '''
+        Checkpoint after the last line returned by poll().
+        '''
+        return Checkpoint(self._inode, self._offset)
+
+    def poll(self):
+        '''
+        Read what was appended to the file since the previous call and
+        return the list of the results for the complete lines found,
+        None for lines which do not match unless on_miss is set.
+
+        Saves the checkpoint of the lines returned by the previous call
+        first. Reading stops at the end of the file or after the first
+        block holding results, an empty list means that there is nothing
+        new yet.
+        '''
+        self.save_checkpoint()
+        if self._file is None and not self._open():
+            return []
+        while True:
+            block = self._file.read(self.block_size)
+            if block:
+                results = self._read(block)
+            else:
+                results = self._reopen()
+                if results is None:
+                    return []
+            if results:
+                return results
+
+    def save_checkpoint(self):
+        '''
+        Save the checkpoint to checkpoint_path, if it changed since it
+        was last saved.
+        '''
+        checkpoint = self.checkpoint
+        if self.checkpoint_path is None or self._inode is None or \
+                checkpoint == self._saved:
+            return
+        save_checkpoint(self.checkpoint_path, checkpoint)
+        self._saved = checkpoint
+
+    def close(self):
+        '''
+        Close the file, without saving the checkpoint.
+        '''
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _open(self, checkpoint=None, from_end=False):
+        '''
+        Open the file at path and seek to the offset of checkpoint if it
+        is for the same file. Return whether the file exists.
+        '''
+        try:
+            lfh = io.open(self.path, 'rb', buffering=0)
+        except (IOError, OSError) as exc:
+            if exc.errno != errno.ENOENT:
+                raise
+            return False
+        stat = os.fstat(lfh.fileno())
+        offset = 0
+        if checkpoint is not None:
+            if checkpoint.inode == stat.st_ino and \
+                    checkpoint.offset <= stat.st_size:
+                offset = checkpoint.offset
+        elif from_end:
+            offset = stat.st_size
+        lfh.seek(offset)
+        self._file = lfh
+        self._inode = stat.st_ino
+        self._offset = offset
+        self._pending = b''
+        return True
+
+    def _reopen(self):
+        '''
+        At the end of the file, start over if it was truncated or switch
+        to the new file at path if it was rotated.
+
+        Returns the results for the partial last line of a rotated file,
+        which will never be completed, or None if the file is unchanged.
+        '''
+        if os.fstat(self._file.fileno()).st_size < \
+                self._offset + len(self._pending):
+            self._file.seek(0)
+            self._offset = 0
+            self._pending = b''
+            return []
+        try:
+            inode = os.stat(self.path).st_ino
+        except OSError as exc:
+            if exc.errno != errno.ENOENT:
+                raise
+            # Rotation in progress, the old file may still be written
+            return None
+        if inode == self._inode:
+            return None
+
+        results = []
+        if self._pending:
+            results = self._read(b'\n')
+        self.close()
+        self._open()
+        return results
+
+    def _read(self, block):
+        '''
+        Search pattern in the complete lines of block and of the
+        partial line left from the previous one.
+        '''
+        data = self._pending + block if self._pending else block
+        cut = data.rfind(b'\n') + 1
+        if not cut:
+            self._pending = data
+            return []
+        self._pending = data[cut:]
+        self._offset += cut
+
+        search = self.pattern.search
+        convert = self.pattern.convert
+        on_miss = self.on_miss
+        results = []
+        append = results.append
+        lines = data[:cut].decode(self.encoding, self.errors).split(u'\n')
+        lines.pop()
+        for line in lines:
+            self.lines += 1
+            end = len(line)
+            if line.endswith(u'\r'):
+                end -= 1
+            match_obj = search(line, 0, end)
+            if match_obj is not None:
+                append(convert(match_obj))
+            elif on_miss is None:
+                append(None)
+            else:
+                on_miss(self.lines, line[:end])
+        return results
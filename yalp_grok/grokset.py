@@ -0,0 +1,193 @@
+# vim: set et ts=4 sw=4 fileencoding=utf-8:
+'''
+yalp_grok.grokset
+=================
+
+Match a line against many grok patterns with a single regex.
+
+The compiled patterns of a GrokSet are combined into one alternation, so
+the regex engine tries every pattern at a position before moving to the
+next one instead of scanning the whole line once per pattern. The named
+groups of every pattern are renamed so that patterns using the same
+field names do not interfere, and the results are converted like those
+of the pattern that matched, with its type map, output mode and interned
+fields.
+
+A combined regex can not reject a line as quickly as the individual
+patterns can, since the regex engine only checks the literal text a
+pattern requires before searching when there is a single pattern. So
+every line is first checked for the literals required by each pattern,
+and only the patterns which can match are combined. Combined regexes
+are cached per set of candidate patterns.
+'''
+import re as sre
+from collections import namedtuple
+
+import regex as re
+
+from . import exceptions
+from .cache import LRUCache
+from .yalp_grok import (
+    compile_pattern, make_values_converter, _field_names, _required_literals,
+)
+
+
+# Things in a regex source that matter when renaming its groups: escapes
+# (numbered and named back references among them), named groups, named
+# back references and inline global flags
+SOURCE_TOKEN = sre.compile(
+    r'\\(?:([1-9])|([gk])<|.)'
+    r'|\(\?P?<(\w+)>'
+    r'|\(\?P=(\w+)\)'
+    r'|\(\?([aiLmsux]+)\)',
+    sre.DOTALL)
+
+LEADING_FLAGS = sre.compile(r'\(\?([aiLmsux]+)\)')
+
+GROUP_PREFIX = '_{0}'
+
+# Source of a member of the combined regex, by match mode of its pattern
+MEMBER_SOURCES = {
+    'search': '(?P<{0}>{1})',
+    'match': r'\A(?P<{0}>{1})',
+    'fullmatch': r'\A(?P<{0}>{1})\Z',
+}
+
+# Number of combined regexes kept per GrokSet
+DEFAULT_COMBINATIONS_CACHE_SIZE = 64
+
+Member = namedtuple('Member',
+                    'id pattern source literals names groups convert')
+
+
+def compile_patterns(patterns, custom_patterns=None,
+                     custom_patterns_dir=None, auto_map=False, mode=None,
+                     captures=None, cache_dir=None, output='dict',
+                     intern=None):
+    '''
+    Compile many patterns into a GrokSet.
+
+    patterns is either a mapping of ids to patterns, an iterable of
+    (id, pattern) pairs or an iterable of patterns, in which case every
+    pattern is its own id. The other arguments are the same as for
+    compile_pattern().
+    '''
+    if hasattr(patterns, 'items'):
+        patterns = patterns.items()
+    members = []
+    for item in patterns:
+        if isinstance(item, tuple):
+            pattern_id, pattern = item
+        else:
+            pattern_id, pattern = item, item
+        members.append((pattern_id, compile_pattern(
+            pattern, custom_patterns, custom_patterns_dir,
+            auto_map=auto_map, mode=mode, captures=captures,
+            cache_dir=cache_dir, output=output, intern=intern)))
+    return GrokSet(members)
+
+
+class GrokSet(object):
+    '''
+    Set of compiled patterns matched in one pass.
+
+    Built from (id, compiled pattern) pairs. search() finds the leftmost
+    position where any of the patterns matches and, if several match
+    there, picks the one listed first. For patterns describing a whole
+    line this is the same as trying them in order. The match mode of
+    every pattern is kept: patterns compiled for 'match' or 'fullmatch'
+    only match at the start or over the whole text.
+    '''
+
+    def __init__(self, compiled_patterns,
+                 cache_size=DEFAULT_COMBINATIONS_CACHE_SIZE):
+        self._members = []
+        for number, (pattern_id, pattern) in enumerate(compiled_patterns):
+            prefix = GROUP_PREFIX.format(number)
+            source = pattern[0].pattern
+            names = _field_names(pattern[0])
+            self._members.append(Member(
+                pattern_id, pattern,
+                MEMBER_SOURCES[getattr(pattern, 'mode', 'search')].format(
+                    prefix, _scope_groups(source, prefix)),
+                _required_literals(source), names,
+                tuple('{0}_{1}'.format(prefix, name) for name in names),
+                getattr(pattern, 'convert_values', None) or
+                make_values_converter(names, pattern[1])))
+        self._by_prefix = dict(
+            (GROUP_PREFIX.format(number), member)
+            for number, member in enumerate(self._members))
+        self._combinations = LRUCache(cache_size)
+        self.ids = [member.id for member in self._members]
+        self.regex = self._combine(tuple(range(len(self._members))))
+
+    def __len__(self):
+        return len(self._members)
+
+    def search(self, text):
+        '''
+        Search for the patterns in text.
+
+        Return a (pattern id, result) pair for the pattern that matched,
+        or None if none did. The result is what grok_search() returns
+        for a match of that pattern.
+        '''
+        candidates = tuple(
+            number for number, member in enumerate(self._members)
+            if all(literal in text for literal in member.literals))
+        if not candidates:
+            return None
+
+        match_obj = self._combine(candidates).search(text)
+        if match_obj is None:
+            return None
+
+        member = self._by_prefix[match_obj.lastgroup]
+        if len(member.groups) > 1:
+            values = match_obj.group(*member.groups)
+        elif member.groups:
+            values = (match_obj.group(member.groups[0]),)
+        else:
+            values = ()
+        return member.id, member.convert(values)
+
+    def _combine(self, numbers):
+        '''
+        Return the regex combining the members numbered numbers.
+        '''
+        regex = self._combinations.get(numbers)
+        if regex is None:
+            regex = re.compile('|'.join(
+                self._members[number].source for number in numbers))
+            self._combinations.put(numbers, regex)
+        return regex
+
+
+def _scope_groups(source, prefix):
+    '''
+    Prefix the named groups of a regex source so that they can not clash
+    with those of other patterns.
+    '''
+    def _replace(match):
+        backref, named_ref, name, ref, flags = match.groups()
+        if backref or named_ref:
+            raise exceptions.GrokError(
+                'Back references are not supported in a GrokSet: '
+                '{0}'.format(source))
+        if flags:
+            raise exceptions.GrokError(
+                'Inline flags must start the pattern in a GrokSet: '
+                '{0}'.format(source))
+        if name:
+            return '(?P<{0}_{1}>'.format(prefix, name)
+        if ref:
+            return '(?P={0}_{1})'.format(prefix, ref)
+        return match.group()
+
+    # Global flags would apply to every pattern of the set, scope them
+    flags = LEADING_FLAGS.match(source)
+    if flags is not None:
+        return '(?{0}:{1})'.format(
+            flags.group(1),
+            SOURCE_TOKEN.sub(_replace, source[flags.end():]))
+    return SOURCE_TOKEN.sub(_replace, source)
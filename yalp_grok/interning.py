@@ -0,0 +1,101 @@
+# vim: set et ts=4 sw=4 fileencoding=utf-8:
+'''
+yalp_grok.interning
+===================
+
+Share one string object between the results holding the same value of
+a low cardinality field, such as an HTTP verb or a syslog program.
+
+Every match copies the captured text into new strings. Results kept in
+memory thus hold millions of copies of the same few values. Passing
+values through an InternTable swaps them for the first copy seen, so
+the others are freed as soon as the match is converted.
+
+The table is bounded: it keeps two generations of values, and once the
+current one is full the previous one is dropped. Values seen in the
+previous generation move to the current one when seen again, so the
+values in use stay interned while the rest are evicted. Lookups are
+plain dictionary operations and need no lock: concurrent threads can at
+worst intern the same value twice.
+
+Fields can be listed when compiling a pattern, or picked by sampling:
+a CardinalitySampler counts the distinct values of every field over the
+first results and picks those with few of them.
+'''
+
+# Values kept per generation of an InternTable
+DEFAULT_INTERN_TABLE_SIZE = 4096
+
+# Results sampled before picking the fields to intern, and the largest
+# share of distinct values among them for a field to be picked
+INTERN_SAMPLE_SIZE = 1000
+INTERN_MAX_DISTINCT_RATIO = 0.1
+
+
+class InternTable(object):
+    '''
+    Bounded table of interned values, evicting the values not seen
+    recently.
+    '''
+
+    def __init__(self, maxsize=DEFAULT_INTERN_TABLE_SIZE):
+        self.maxsize = maxsize
+        self._current = {}
+        self._previous = {}
+
+    def __len__(self):
+        return len(self._current) + len(self._previous)
+
+    def intern(self, value):
+        '''
+        Return the interned value equal to value.
+        '''
+        current = self._current
+        interned = current.get(value)
+        if interned is None:
+            interned = self._previous.get(value, value)
+            if len(current) >= self.maxsize:
+                self._previous = current
+                current = self._current = {}
+            current[interned] = interned
+        return interned
+
+    def clear(self):
+        '''
+        Forget every interned value.
+        '''
+        self._current = {}
+        self._previous = {}
+
+
+class CardinalitySampler(object):
+    '''
+    Counter of the distinct values of the fields at positions, deciding
+    which of them to intern after sample_size results.
+    '''
+
+    def __init__(self, positions, sample_size=INTERN_SAMPLE_SIZE,
+                 max_ratio=INTERN_MAX_DISTINCT_RATIO):
+        self.sample_size = sample_size
+        self._max_distinct = int(sample_size * max_ratio)
+        self._seen = dict((position, set()) for position in positions)
+        self._count = 0
+
+    def add(self, values):
+        '''
+        Count the values of a result.
+
+        Returns None until sample_size results were counted, and then
+        the tuple of the positions of the fields with few distinct
+        values.
+        '''
+        for position, seen in self._seen.items():
+            if seen is not None:
+                seen.add(values[position])
+                if len(seen) > self._max_distinct:
+                    self._seen[position] = None
+        self._count += 1
+        if self._count < self.sample_size:
+            return None
+        return tuple(sorted(position for position, seen in self._seen.items()
+                            if seen is not None))
@@ -0,0 +1,429 @@
+# vim: set et ts=4 sw=4 fileencoding=utf-8:
+'''
+yalp_grok.library
+=================
+
+Registry of named grok patterns.
+
+A PatternLibrary holds pattern definitions and expands grok references
+(%{NAME} and %{NAME:key:type}) into plain regular expressions. The
+expansion of every named pattern is computed once, depth first, and then
+reused by every pattern referencing it, so compiling a pattern costs
+time proportional to the size of its expanded regex. Missing references
+and reference cycles are reported before any regex is compiled.
+
+Libraries can be layered: custom patterns are put in a child library
+that falls back to its parent for everything it does not define, without
+copying the parent.
+
+Pattern files are parsed lazily: a name to file index tells which file
+defines a pattern and the file is only read when one of its patterns is
+first needed. The index of the bundled pattern files ships prebuilt in
+yalp_grok.pattern_index and must be regenerated with write_index() after
+editing them, otherwise they are all read up front.
+'''
+import os
+import re
+import threading
+import zlib
+from collections import namedtuple
+
+try:
+    from collections.abc import Mapping
+except ImportError:  # pragma: no cover
+    from collections import Mapping
+
+from . import exceptions
+
+
+# GROK pattern/format data abstracted from logic
+NAMED_PATTERN = {
+    'pattern': r'%{(\w+):(\w+)(:\w+)?}',
+    'format': '(?P<{key}>{regex})'
+}
+
+UNNAMED_PATTERN = {'pattern': r'%{(\w+)}', 'format': '({regex})'}
+PATTERN_FORMATS = (UNNAMED_PATTERN, NAMED_PATTERN)
+
+# Both of the above in one: grok key, optional name and optional type
+GROK_REFERENCE = re.compile(r'%{(\w+)(?::(\w+)(?::(\w+))?)?}')
+
+# Named groups written by hand around a single grok reference, e.g.
+# (?P<num>%{INT}) or (?P<num>(?:%{INT})), which are also used to
+# determine the type of the group
+LITERAL_NAMED_KEY = re.compile(
+    r'\(\?P<(\w+)>(?:\(\?:(%{\w+})\)|(%{\w+}))\)')
+
+# Pattern whose whole definition is a single reference to another one,
+# e.g. NUMBER (?:%{BASE10NUM})
+ALIAS_PATTERN = re.compile(r'^(?:%{(\w+)}|\(\?:%{(\w+)}\))$')
+
+Pattern = namedtuple('Pattern', 'name regex_str')
+
+# Named capture found while expanding a pattern: the group name, the
+# grok keys it was built from (outermost first) and the type explicitly
+# requested in the pattern, if any
+TypeHint = namedtuple('TypeHint', 'name grok_keys defined_type')
+
+# Fully expanded pattern: the regex, the type hints of its named groups
+# in order of appearance and every pattern name it depends upon
+Expansion = namedtuple('Expansion', 'regex_str type_hints deps')
+
+
+class PatternLibrary(Mapping):
+    '''
+    Mapping of pattern names to Pattern tuples that knows how to expand
+    grok references.
+
+    If parent is given, names not defined in this library are looked up
+    in parent.
+    '''
+
+    def __init__(self, patterns=None, parent=None):
+        self._patterns = dict(patterns or {})
+        self._parent = parent
+        self._expanded = {}
+        # Defining file of every pattern known from an index and the
+        # indexed files which have not been read yet
+        self._index = {}
+        self._pending = set()
+        self._load_lock = threading.Lock()
+
+    @classmethod
+    def from_dirs(cls, patterns_dirs, parent=None):
+        '''
+        Create a library from all pattern files found in patterns_dirs.
+
+        Files of later directories override those of earlier ones.
+        '''
+        library = cls(parent=parent)
+        for dir_ in patterns_dirs:
+            library.add_dir(dir_)
+        return library
+
+    def add_dir(self, patterns_dir):
+        '''
+        Add the pattern files of patterns_dir to the library.
+
+        If the directory has an up to date prebuilt index its files are
+        only read when one of their patterns is needed, otherwise they
+        are read immediately.
+        '''
+        index = _prebuilt_index(patterns_dir)
+        if index is None:
+            patterns = load_patterns([patterns_dir])
+            for name in patterns:
+                self._index.pop(name, None)
+            self._patterns.update(patterns)
+            return
+
+        for name, pat_file in index.items():
+            path = os.path.join(patterns_dir, pat_file)
+            self._index[name] = path
+            self._pending.add(path)
+            self._patterns.pop(name, None)
+
+    @property
+    def parent(self):
+        ''' Library used for names not defined in this one '''
+        return self._parent
+
+    def layer(self, patterns):
+        '''
+        Return a child library with patterns defined on top of this one.
+        '''
+        return self.__class__(patterns, parent=self)
+
+    def defines(self, name):
+        '''
+        Return True if name is defined by this library, ignoring its
+        parent.
+        '''
+        return name in self._patterns or name in self._index
+
+    def __getitem__(self, name):
+        try:
+            return self._patterns[name]
+        except KeyError:
+            pass
+        if name in self._index:
+            self._load_file(self._index[name])
+            if name in self._patterns:
+                return self._patterns[name]
+        if self._parent is None:
+            raise KeyError(name)
+        return self._parent[name]
+
+    def __contains__(self, name):
+        return self.defines(name) or (
+            self._parent is not None and name in self._parent)
+
+    def __iter__(self):
+        names = set(self._patterns)
+        names.update(self._index)
+        for name in names:
+            yield name
+        if self._parent is not None:
+            for name in self._parent:
+                if name not in names:
+                    yield name
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def _load_file(self, path):
+        '''
+        Read an indexed pattern file, keeping only the patterns the index
+        attributes to it and forgetting those it does not define.
+        '''
+        with self._load_lock:
+            if path not in self._pending:
+                return
+            patterns = load_patterns_from_file(path)
+            for name, pattern in patterns.items():
+                if self._index.get(name) == path:
+                    self._patterns[name] = pattern
+            for name in [name for name, indexed in self._index.items()
+                         if indexed == path and name not in patterns]:
+                del self._index[name]
+            self._pending.discard(path)
+
+    def expand(self, text):
+        '''
+        Expand all grok references found in text.
+
+        Returns an Expansion. Raises PatternNotFound if a referenced
+        pattern does not exist and PatternCycle if patterns reference
+        each other.
+        '''
+        return self._expand_text(text, ())
+
+    def expand_name(self, name):
+        '''
+        Return the memoized Expansion of the named pattern.
+        '''
+        return self._expansion(name, ())
+
+    def resolve(self):
+        '''
+        Expand every pattern of the library up front.
+        '''
+        for name in self:
+            self._expansion(name, ())
+
+    def _expansion(self, name, stack):
+        '''
+        Expand pattern name, reusing the parent expansion when none of
+        the patterns it depends upon are redefined here.
+        '''
+        expansion = self._expanded.get(name)
+        if expansion is not None:
+            return expansion
+
+        if self._parent is not None and not self.defines(name):
+            try:
+                expansion = self._parent.expand_name(name)
+            except exceptions.GrokError:
+                pass
+            else:
+                if not any(self.defines(dep) for dep in expansion.deps):
+                    return expansion
+
+        if name in stack:
+            raise exceptions.PatternCycle(
+                'Circular pattern reference: ' +
+                ' -> '.join(stack[stack.index(name):] + (name,)))
+        try:
+            pattern = self[name]
+        except KeyError:
+            raise exceptions.PatternNotFound(
+                'Pattern not found: {0}'.format(name))
+
+        expansion = self._expand_text(pattern.regex_str, stack + (name,))
+        self._expanded[name] = expansion
+        return expansion
+
+    def _expand_text(self, text, stack):
+        '''
+        Substitute every grok reference in text with its expansion.
+        '''
+        literal_keys = {}
+        if '(?P<' in text:
+            for match in LITERAL_NAMED_KEY.finditer(text):
+                start = match.start(2) if match.group(2) else match.start(3)
+                literal_keys[start] = match.group(1)
+
+        pieces = []
+        type_hints = []
+        deps = set()
+        last = 0
+        for match in GROK_REFERENCE.finditer(text):
+            grok_key, key, defined_type = match.groups()
+            expansion = self._expansion(grok_key, stack)
+            deps.add(grok_key)
+            deps.update(expansion.deps)
+
+            pieces.append(text[last:match.start()])
+            if key is None:
+                pieces.append(UNNAMED_PATTERN['format'].format(
+                    regex=expansion.regex_str))
+                if match.start() in literal_keys:
+                    type_hints.append(TypeHint(
+                        literal_keys[match.start()], (grok_key,), ''))
+            else:
+                pieces.append(NAMED_PATTERN['format'].format(
+                    key=key, regex=expansion.regex_str))
+                type_hints.append(TypeHint(
+                    key, self._grok_keys(grok_key), defined_type or ''))
+            type_hints.extend(expansion.type_hints)
+            last = match.end()
+        pieces.append(text[last:])
+
+        return Expansion(''.join(pieces), tuple(type_hints), frozenset(deps))
+
+    def _grok_keys(self, grok_key):
+        '''
+        Return grok_key, followed by the pattern it aliases if its whole
+        definition is a single reference.
+        '''
+        alias = ALIAS_PATTERN.match(self[grok_key].regex_str)
+        if alias is None:
+            return (grok_key,)
+        return (grok_key, alias.group(1) or alias.group(2))
+
+
+def load_patterns(patterns_dirs):
+    '''
+    Load patterns from all files in the given directories.
+    '''
+    all_patterns = {}
+    for dir_ in patterns_dirs:
+        for pat_file in os.listdir(dir_):
+            patterns = load_patterns_from_file(os.path.join(dir_, pat_file))
+            all_patterns.update(patterns)
+
+    return all_patterns
+
+
+def load_patterns_from_file(pat_file):
+    '''
+    Load patterns from a text file.
+    '''
+    patterns = {}
+    with open(pat_file, 'r') as pfh:
+        for line in pfh:
+            line = line.strip()
+            if line == '' or line.startswith('#'):
+                continue
+
+            sep = line.find(' ')
+            pat_name = line[:sep]
+            regex_str = line[sep:].strip()
+            pat = Pattern(pat_name, regex_str)
+            patterns[pat.name] = pat
+
+    return patterns
+
+
+def build_index(patterns_dir):
+    '''
+    Return the pattern name to file name index of patterns_dir along with
+    the signature of every file, as used by the prebuilt index.
+    '''
+    index = {}
+    signatures = {}
+    for pat_file in sorted(os.listdir(patterns_dir)):
+        path = os.path.join(patterns_dir, pat_file)
+        signatures[pat_file] = _file_signature(path)
+        for name in load_patterns_from_file(path):
+            index[name] = pat_file
+    return index, signatures
+
+
+def _file_signature(path):
+    '''
+    Size in bytes and CRC-32 of the content of the file at path.
+    '''
+    with open(path, 'rb') as pfh:
+        content = pfh.read()
+    return len(content), zlib.crc32(content) & 0xffffffff
+
+
+def write_index(patterns_dir, index_file):
+    '''
+    Generate the python module holding the prebuilt index of
+    patterns_dir.
+    '''
+    index, signatures = build_index(patterns_dir)
+    with open(index_file, 'w') as ifh:
+        ifh.write(INDEX_TEMPLATE.format(
+            signatures=_format_dict(signatures), index=_format_dict(index)))
+
+
+def _format_dict(dict_):
+    '''
+    Format a dict as python source, one sorted item per line.
+    '''
+    return '{\n' + ''.join(
+        '    {0!r}: {1!r},\n'.format(key, dict_[key])
+        for key in sorted(dict_)) + '}'
+
+
+def _prebuilt_index(patterns_dir):
+    '''
+    Return the prebuilt index of patterns_dir if there is one and it is
+    up to date with the files of the directory, None otherwise.
+    '''
+    if os.path.abspath(patterns_dir) != BUNDLED_PATTERNS_DIR:
+        return None
+    try:
+        from . import pattern_index
+    except ImportError:  # pragma: no cover
+        return None
+
+    try:
+        if _up_to_date(patterns_dir, pattern_index.FILE_SIGNATURES):
+            return pattern_index.INDEX
+    except (IOError, OSError):  # pragma: no cover
+        pass
+    return None
+
+
+def _up_to_date(patterns_dir, signatures):
+    '''
+    Tell if the files of patterns_dir match their recorded signatures.
+    Sizes are compared first, contents are only read if they all match.
+    '''
+    pat_files = os.listdir(patterns_dir)
+    if len(pat_files) != len(signatures):
+        return False
+    paths = [os.path.join(patterns_dir, pat_file) for pat_file in pat_files]
+    if any(signatures.get(pat_file, (None,))[0] != os.path.getsize(path)
+           for pat_file, path in zip(pat_files, paths)):
+        return False
+    return all(signatures[pat_file] == _file_signature(path)
+               for pat_file, path in zip(pat_files, paths))
+
+
+BUNDLED_PATTERNS_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'patterns')
+
+INDEX_FILE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'pattern_index.py')
+
+INDEX_TEMPLATE = '''# vim: set et ts=4 sw=4 fileencoding=utf-8:
+\'\'\'
+yalp_grok.pattern_index
+=======================
+
+Index of the bundled pattern files generated by
+yalp_grok.library.write_index(). Do not edit.
+\'\'\'
+
+# Size in bytes and CRC-32 of the content of every pattern file, used to
+# detect a stale index
+FILE_SIGNATURES = {signatures}
+
+# Name of every pattern to the file defining it
+INDEX = {index}
+'''
@@ -0,0 +1,267 @@
+# vim: set et ts=4 sw=4 fileencoding=utf-8:
+'''
+yalp_grok.lint
+==============
+
+Find the constructs of expanded patterns which make the regex engine
+backtrack for a long time on lines they do not match.
+
+Two constructs are reported:
+
+nested quantifiers
+    An unbounded repeat inside another one, such as (\\w+\\s?)+, with
+    nothing the inner repeat can not match to tell the iterations of
+    the outer repeat apart. The number of ways to split a line between
+    the iterations grows exponentially with its length.
+
+adjacent wildcards
+    Two unbounded repeats of . with nothing required between them, such
+    as %{DATA}%{GREEDYDATA}. Every split of the line between them is
+    tried before giving up.
+
+Patterns are linted after expansion, so constructs spanning several
+grok references are found too. Atomic groups and possessive quantifiers
+do not backtrack and are not reported. This is a heuristic: it can not
+prove a pattern safe, grok_search() timeouts are the safety net.
+'''
+from collections import namedtuple
+
+import regex as re
+
+from . import exceptions, regex_tree
+from .regex_tree import Alternation, Atom, Char, Group, Repeat
+from .yalp_grok import PREDEFINED_PATTERNS, _pattern_library
+
+NESTED_QUANTIFIER = 'nested-quantifier'
+ADJACENT_WILDCARDS = 'adjacent-wildcards'
+UNSUPPORTED_SYNTAX = 'unsupported-syntax'
+
+# A problem found in a pattern: its kind, a description and the part of
+# the expanded regex concerned
+LintWarning = namedtuple('LintWarning', 'kind message source')
+
+# Characters tried to tell whether two single character nodes overlap
+SAMPLE_CHARS = '\t' + ''.join(chr(code) for code in range(32, 127))
+
+WORD_BOUNDARY = Atom('anchor', r'\b')
+WORD_CHAR = Atom('class', r'\w')
+
+# Groups which the regex engine never backtracks into
+NO_BACKTRACK = frozenset(['atomic']) | regex_tree.LOOKAROUNDS
+
+
+def lint_pattern(pattern, custom_patterns=None, custom_patterns_dir=None):
+    '''
+    Expand pattern like compile_pattern() does and return the list of
+    LintWarning found in it.
+    '''
+    library = _pattern_library(custom_patterns, custom_patterns_dir)
+    return lint_regex(library.expand(pattern).regex_str)
+
+
+def lint_regex(regex_str):
+    '''
+    Return the list of LintWarning found in an expanded regex.
+    '''
+    try:
+        tree = regex_tree.parse(regex_str)
+    except regex_tree.RegexSyntaxError as exc:
+        return [LintWarning(UNSUPPORTED_SYNTAX, str(exc), regex_str)]
+
+    warnings = []
+    for node in _walk(tree):
+        if isinstance(node, Repeat):
+            warning = _nested_quantifier(node)
+            if warning is not None:
+                warnings.append(warning)
+        elif isinstance(node, Alternation):
+            for branch in node.branches:
+                warnings.extend(_adjacent_wildcards(branch))
+    return warnings
+
+
+def lint_library(library=None):
+    '''
+    Lint every pattern of a PatternLibrary, the bundled patterns by
+    default.
+
+    Returns a dictionary of the lists of LintWarning of the patterns
+    having any. Patterns which can not be expanded are skipped.
+    '''
+    if library is None:
+        library = PREDEFINED_PATTERNS
+
+    results = {}
+    for name in sorted(library):
+        try:
+            regex_str = library.expand_name(name).regex_str
+        except exceptions.GrokError:
+            continue
+        warnings = lint_regex(regex_str)
+        if warnings:
+            results[name] = warnings
+    return results
+
+
+def _walk(node):
+    '''
+    Yield the nodes below node the regex engine can backtrack into.
+    '''
+    if isinstance(node, Group) and node.kind in NO_BACKTRACK:
+        return
+    if isinstance(node, Repeat) and _possessive(node):
+        return
+    yield node
+    if isinstance(node, Alternation):
+        for branch in node.branches:
+            for item in branch:
+                for child in _walk(item):
+                    yield child
+    elif isinstance(node, Group):
+        for child in _walk(node.body):
+            yield child
+    elif isinstance(node, Repeat):
+        for child in _walk(node.item):
+            yield child
+
+
+def _nested_quantifier(repeat):
+    '''
+    LintWarning if repeat is unbounded and holds an unbounded repeat
+    which its iterations can not be told apart from.
+    '''
+    if repeat.max is not None:
+        return None
+    inner = [node for node in _walk(repeat.item)
+             if isinstance(node, Repeat) and node.max is None]
+    if not inner:
+        return None
+
+    body = repeat.item
+    if isinstance(body, Group):
+        branches = body.body.branches
+    else:
+        branches = ((body,),)
+    for branch in branches:
+        separators = [_required(item) for item in _flatten(branch)]
+        if not all(any(_separates(separator, node.item)
+                       for separator in separators)
+                   for node in inner):
+            source = regex_tree.unparse(repeat)
+            return LintWarning(
+                NESTED_QUANTIFIER,
+                'Nested quantifiers in {0} can match the same text in many '
+                'ways'.format(source),
+                source)
+    return None
+
+
+def _adjacent_wildcards(branch):
+    '''
+    LintWarning for every pair of unbounded repeats of . in branch with
+    nothing required between them.
+    '''
+    items = list(_flatten(branch))
+    previous = None
+    for position, item in enumerate(items):
+        if _wildcard(item):
+            if previous is not None:
+                source = ''.join(regex_tree.unparse(node)
+                                 for node in items[previous:position + 1])
+                yield LintWarning(
+                    ADJACENT_WILDCARDS,
+                    'Adjacent wildcards in {0} can split the same text in '
+                    'many ways'.format(source),
+                    source)
+            previous = position
+        elif _barrier(item):
+            previous = None
+
+
+def _flatten(items):
+    '''
+    Yield items, replacing plain groups with a single branch by their
+    contents.
+    '''
+    for item in items:
+        if isinstance(item, Group) and item.kind in ('capture', 'named',
+                                                     'group') \
+                and len(item.body.branches) == 1:
+            for child in _flatten(item.body.branches[0]):
+                yield child
+        else:
+            yield item
+
+
+def _possessive(repeat):
+    '''
+    Whether repeat is a possessive quantifier such as a++.
+    '''
+    return len(repeat.source) > 1 and repeat.source.endswith('+')
+
+
+def _wildcard(item):
+    '''
+    Whether item is an unbounded repeat of . which can backtrack.
+    '''
+    return isinstance(item, Repeat) and item.max is None and \
+        isinstance(item.item, Atom) and item.item.kind == 'any' and \
+        not _possessive(item)
+
+
+def _barrier(item):
+    '''
+    Whether item must match some text, or is a group the two sides of
+    which can not trade text.
+    '''
+    if isinstance(item, Atom):
+        return item.kind not in regex_tree.ZERO_WIDTH
+    if isinstance(item, Group):
+        return item.kind not in regex_tree.LOOKAROUNDS
+    if isinstance(item, Repeat):
+        return item.min > 0 or _possessive(item)
+    return True
+
+
+def _required(item):
+    '''
+    The node item must match at least once.
+    '''
+    if isinstance(item, Repeat):
+        return item.item if item.min > 0 else None
+    return item
+
+
+def _single_char(node):
+    '''
+    Whether node matches exactly one character, other than any.
+    '''
+    if isinstance(node, Char):
+        return True
+    return isinstance(node, Atom) and node.kind in ('set', 'class')
+
+
+def _separates(separator, node):
+    '''
+    Whether separator tells the end of a repeat of node apart: either a
+    character node can not match, or a word boundary after only word or
+    only non word characters.
+    '''
+    if not (_single_char(node) or
+            isinstance(node, Atom) and node.kind == 'any'):
+        return False
+    if separator == WORD_BOUNDARY:
+        chars = _matched_chars(node)
+        word_chars = _matched_chars(WORD_CHAR)
+        return chars <= word_chars or not chars & word_chars
+    if _single_char(separator):
+        return not _matched_chars(separator) & _matched_chars(node)
+    return False
+
+
+def _matched_chars(node):
+    '''
+    The set of SAMPLE_CHARS a single character node matches.
+    '''
+    regex = re.compile(regex_tree.unparse(node), re.DOTALL)
+    return frozenset(char for char in SAMPLE_CHARS if regex.match(char))
@@ -0,0 +1,197 @@
+# vim: set et ts=4 sw=4 fileencoding=utf-8:
+'''
+yalp_grok.parallel
+==================
+
+Parse a large file with a pool of processes.
+
+The file is split into byte ranges ending on line boundaries, and each
+range is read and searched by a worker process. Workers are only sent
+the pattern source and compile it once when they start, since compiled
+regexes are slow to pickle and would be sent with every range otherwise.
+
+At most a few ranges per worker are in flight at any time, so memory use
+does not depend on the size of the file even if results are consumed
+more slowly than they are produced.
+'''
+import collections
+import itertools
+import os
+
+from .yalp_grok import compile_pattern
+
+
+# Size in bytes of the ranges searched by the workers
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+
+# Ranges submitted ahead per worker
+PENDING_CHUNKS_PER_WORKER = 2
+
+# Seconds to wait for a worker when results are unordered
+POLL_INTERVAL = 0.01
+
+# Pattern compiled by the current worker process
+_WORKER_PATTERN = None
+
+
+def grok_parse_file_parallel(path, pattern, workers=None, ordered=True,
+                             on_miss=None, encoding='utf-8',
+                             errors='strict', chunk_size=DEFAULT_CHUNK_SIZE,
+                             **options):
+    '''
+    Search pattern in every line of the file at path with a pool of
+    workers processes, one per CPU by default.
+
+    pattern is the pattern source, which every worker compiles with the
+    keyword arguments of compile_pattern() given as options, such as
+    custom_patterns, auto_map, mode, captures or output. Giving a
+    cache_dir saves workers from compiling the pattern again, see
+    compile_pattern(). Lines are decoded with encoding and errors.
+
+    Yields the result of grok_search() for every line, None for lines
+    which do not match. If ordered is False, results are yielded as soon
+    as a range of lines is parsed, in no particular order between ranges.
+    If on_miss is given, it is called with the offset in bytes and the
+    text of every line which does not match, and those lines are not
+    yielded.
+    '''
+    # Fail in the caller on bad patterns rather than in every worker
+    compile_pattern(pattern, **options)
+
+    # multiprocessing takes longer to import than the rest of yalp_grok
+    import multiprocessing
+
+    workers = workers or multiprocessing.cpu_count()
+    pool = multiprocessing.Pool(workers, _init_worker, (pattern, options))
+    try:
+        tasks = ((path, start, end, encoding, errors, on_miss is not None)
+                 for start, end in chunk_ranges(path, chunk_size))
+        for result in _results(_run(pool, tasks, ordered,
+                                    workers * PENDING_CHUNKS_PER_WORKER),
+                               on_miss):
+            yield result
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def chunk_ranges(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    '''
+    Split the file at path in (start, end) byte ranges of about
+    chunk_size bytes, each ending after a newline or at the end of the
+    file.
+    '''
+    size = os.path.getsize(path)
+    with open(path, 'rb') as lfh:
+        start = 0
+        while start < size:
+            end = start + chunk_size
+            if end < size:
+                lfh.seek(end - 1)
+                lfh.readline()
+                end = lfh.tell()
+            else:
+                end = size
+            yield start, end
+            start = end
+
+
+def _run(pool, tasks, ordered, max_pending):
+    '''
+    Run _parse_chunk() on the pool for every task, keeping at most
+    max_pending tasks submitted, and yield their results.
+    '''
+    pending = collections.deque()
+
+    def _submit():
+        for task in itertools.islice(tasks, max_pending - len(pending)):
+            pending.append(pool.apply_async(_parse_chunk, task))
+
+    _submit()
+    while pending:
+        if ordered:
+            async_result = pending.popleft()
+        else:
+            async_result = _first_ready(pending)
+        chunk = async_result.get()
+        _submit()
+        yield chunk
+
+
+def _results(chunks, on_miss):
+    '''
+    Yield the results of the parsed chunks, passing their misses to
+    on_miss.
+    '''
+    for results, misses in chunks:
+        for offset, line in misses:
+            on_miss(offset, line)
+        for result in results:
+            yield result
+
+
+def _first_ready(pending):
+    '''
+    Remove and return the first finished of the pending results, waiting
+    for one if needed.
+    '''
+    while True:
+        for async_result in pending:
+            if async_result.ready():
+                pending.remove(async_result)
+                return async_result
+        pending[0].wait(POLL_INTERVAL)
+
+
+def _init_worker(pattern, options):
+    '''
+    Compile the pattern searched by this worker with the options of
+    compile_pattern().
+    '''
+    global _WORKER_PATTERN  # pylint: disable=W0603
+    _WORKER_PATTERN = compile_pattern(pattern, **options)
+
+
+def _parse_chunk(path, start, end, encoding, errors, split_misses):
+    '''
+    Search the worker pattern in the lines between start and end.
+
+    Returns the list of results and, if split_misses is set, the list of
+    (offset, line) misses which are then left out of the results.
+    '''
+    search = _WORKER_PATTERN.search
+    convert = _WORKER_PATTERN.convert
+    results = []
+    misses = []
+    for offset, line, line_end in _chunk_lines(path, start, end, encoding,
+                                               errors):
+        match_obj = search(line, 0, line_end)
+        if match_obj is not None:
+            results.append(convert(match_obj))
+        elif split_misses:
+            misses.append((offset, line[:line_end]))
+        else:
+            results.append(None)
+    return results, misses
+
+
+def _chunk_lines(path, start, end, encoding, errors):
+    '''
+    Yield the offset, the decoded text and the end of the text before
+    any line ending of every line between start and end.
+    '''
+    with open(path, 'rb') as lfh:
+        lfh.seek(start)
+        data = lfh.read(end - start)
+
+    offset = start
+    raw_lines = data.split(b'\n')
+    if raw_lines[-1] == b'':
+        raw_lines.pop()
+    for raw_line in raw_lines:
+        line = raw_line.decode(encoding, errors)
+        line_end = len(line)
+        if line.endswith('\r'):
+            line_end -= 1
+        yield offset, line, line_end
+        offset += len(raw_line) + 1
@@ -0,0 +1,206 @@
+# vim: set et ts=4 sw=4 fileencoding=utf-8:
+'''
+yalp_grok.pattern_index
+=======================
+
+Index of the bundled pattern files generated by
+yalp_grok.library.write_index(). Do not edit.
+'''
+
+# Size in bytes and CRC-32 of the content of every pattern file, used to
+# detect a stale index
+FILE_SIGNATURES = {
+    'firewalls': (7518, 799619431),
+    'grok-patterns': (5133, 1359935674),
+    'haproxy': (3142, 2993161010),
+    'java': (165, 1846283364),
+    'junos': (1097, 4162591597),
+    'linux-syslog': (960, 2610481988),
+    'mcollective': (49, 2933479545),
+    'mcollective-patterns': (190, 3093073743),
+    'nagios': (7761, 3138102396),
+    'postgresql': (142, 1797281869),
+    'redis': (104, 706569913),
+    'ruby': (188, 1584558807),
+}
+
+# Name of every pattern to the file defining it
+INDEX = {
+    'BASE10NUM': 'grok-patterns',
+    'BASE16FLOAT': 'grok-patterns',
+    'BASE16NUM': 'grok-patterns',
+    'CISCOFW106001': 'firewalls',
+    'CISCOFW106006_106007_106010': 'firewalls',
+    'CISCOFW106014': 'firewalls',
+    'CISCOFW106015': 'firewalls',
+    'CISCOFW106021': 'firewalls',
+    'CISCOFW106023': 'firewalls',
+    'CISCOFW106100': 'firewalls',
+    'CISCOFW110002': 'firewalls',
+    'CISCOFW302010': 'firewalls',
+    'CISCOFW302013_302014_302015_302016': 'firewalls',
+    'CISCOFW302020_302021': 'firewalls',
+    'CISCOFW305011': 'firewalls',
+    'CISCOFW313001_313004_313008': 'firewalls',
+    'CISCOFW313005': 'firewalls',
+    'CISCOFW402117': 'firewalls',
+    'CISCOFW402119': 'firewalls',
+    'CISCOFW419001': 'firewalls',
+    'CISCOFW419002': 'firewalls',
+    'CISCOFW500004': 'firewalls',
+    'CISCOFW602303_602304': 'firewalls',
+    'CISCOFW710001_710002_710003_710005_710006': 'firewalls',
+    'CISCOFW713172': 'firewalls',
+    'CISCOFW733100': 'firewalls',
+    'CISCOMAC': 'grok-patterns',
+    'CISCOTAG': 'firewalls',
+    'CISCOTIMESTAMP': 'firewalls',
+    'CISCO_ACTION': 'firewalls',
+    'CISCO_DIRECTION': 'firewalls',
+    'CISCO_INTERVAL': 'firewalls',
+    'CISCO_REASON': 'firewalls',
+    'CISCO_TAGGED_SYSLOG': 'firewalls',
+    'CISCO_XLATE_TYPE': 'firewalls',
+    'COMBINEDAPACHELOG': 'grok-patterns',
+    'COMMONAPACHELOG': 'grok-patterns',
+    'COMMONMAC': 'grok-patterns',
+    'CRONLOG': 'linux-syslog',
+    'CRON_ACTION': 'linux-syslog',
+    'DATA': 'grok-patterns',
+    'DATE': 'grok-patterns',
+    'DATESTAMP': 'grok-patterns',
+    'DATESTAMP_OTHER': 'grok-patterns',
+    'DATESTAMP_RFC822': 'grok-patterns',
+    'DATE_EU': 'grok-patterns',
+    'DATE_US': 'grok-patterns',
+    'DAY': 'grok-patterns',
+    'GREEDYDATA': 'grok-patterns',
+    'HAPROXYCAPTUREDREQUESTHEADERS': 'haproxy',
+    'HAPROXYCAPTUREDRESPONSEHEADERS': 'haproxy',
+    'HAPROXYDATE': 'haproxy',
+    'HAPROXYHTTP': 'haproxy',
+    'HAPROXYTCP': 'haproxy',
+    'HAPROXYTIME': 'haproxy',
+    'HOST': 'grok-patterns',
+    'HOSTNAME': 'grok-patterns',
+    'HOSTPORT': 'grok-patterns',
+    'HOUR': 'grok-patterns',
+    'HTTPDATE': 'grok-patterns',
+    'INT': 'grok-patterns',
+    'IP': 'grok-patterns',
+    'IPORHOST': 'grok-patterns',
+    'IPV4': 'grok-patterns',
+    'IPV6': 'grok-patterns',
+    'ISO8601_SECOND': 'grok-patterns',
+    'ISO8601_TIMEZONE': 'grok-patterns',
+    'JAVACLASS': 'java',
+    'JAVAFILE': 'java',
+    'JAVASTACKTRACEPART': 'java',
+    'LOGLEVEL': 'grok-patterns',
+    'MAC': 'grok-patterns',
+    'MCOLLECTIVE': 'mcollective-patterns',
+    'MCOLLECTIVEAUDIT': 'mcollective-patterns',
+    'MINUTE': 'grok-patterns',
+    'MONTH': 'grok-patterns',
+    'MONTHDAY': 'grok-patterns',
+    'MONTHNUM': 'grok-patterns',
+    'NAGIOSLOGLINE': 'nagios',
+    'NAGIOSTIME': 'nagios',
+    'NAGIOS_CURRENT_HOST_STATE': 'nagios',
+    'NAGIOS_CURRENT_SERVICE_STATE': 'nagios',
+    'NAGIOS_EC_DISABLE_HOST_CHECK': 'nagios',
+    'NAGIOS_EC_DISABLE_SVC_CHECK': 'nagios',
+    'NAGIOS_EC_ENABLE_HOST_CHECK': 'nagios',
+    'NAGIOS_EC_ENABLE_SVC_CHECK': 'nagios',
+    'NAGIOS_EC_LINE_DISABLE_HOST_CHECK': 'nagios',
+    'NAGIOS_EC_LINE_DISABLE_SVC_CHECK': 'nagios',
+    'NAGIOS_EC_LINE_ENABLE_HOST_CHECK': 'nagios',
+    'NAGIOS_EC_LINE_ENABLE_SVC_CHECK': 'nagios',
+    'NAGIOS_EC_LINE_PROCESS_HOST_CHECK_RESULT': 'nagios',
+    'NAGIOS_EC_LINE_PROCESS_SERVICE_CHECK_RESULT': 'nagios',
+    'NAGIOS_EC_LINE_SCHEDULE_HOST_DOWNTIME': 'nagios',
+    'NAGIOS_EC_PROCESS_HOST_CHECK_RESULT': 'nagios',
+    'NAGIOS_EC_PROCESS_SERVICE_CHECK_RESULT': 'nagios',
+    'NAGIOS_EC_SCHEDULE_HOST_DOWNTIME': 'nagios',
+    'NAGIOS_EC_SCHEDULE_SERVICE_DOWNTIME': 'nagios',
+    'NAGIOS_HOST_ALERT': 'nagios',
+    'NAGIOS_HOST_DOWNTIME_ALERT': 'nagios',
+    'NAGIOS_HOST_EVENT_HANDLER': 'nagios',
+    'NAGIOS_HOST_FLAPPING_ALERT': 'nagios',
+    'NAGIOS_HOST_NOTIFICATION': 'nagios',
+    'NAGIOS_PASSIVE_HOST_CHECK': 'nagios',
+    'NAGIOS_PASSIVE_SERVICE_CHECK': 'nagios',
+    'NAGIOS_SERVICE_ALERT': 'nagios',
+    'NAGIOS_SERVICE_DOWNTIME_ALERT': 'nagios',
+    'NAGIOS_SERVICE_EVENT_HANDLER': 'nagios',
+    'NAGIOS_SERVICE_FLAPPING_ALERT': 'nagios',
+    'NAGIOS_SERVICE_NOTIFICATION': 'nagios',
+    'NAGIOS_TIMEPERIOD_TRANSITION': 'nagios',
+    'NAGIOS_TYPE_CURRENT_HOST_STATE': 'nagios',
+    'NAGIOS_TYPE_CURRENT_SERVICE_STATE': 'nagios',
+    'NAGIOS_TYPE_EXTERNAL_COMMAND': 'nagios',
+    'NAGIOS_TYPE_HOST_ALERT': 'nagios',
+    'NAGIOS_TYPE_HOST_DOWNTIME_ALERT': 'nagios',
+    'NAGIOS_TYPE_HOST_EVENT_HANDLER': 'nagios',
+    'NAGIOS_TYPE_HOST_FLAPPING_ALERT': 'nagios',
+    'NAGIOS_TYPE_HOST_NOTIFICATION': 'nagios',
+    'NAGIOS_TYPE_PASSIVE_HOST_CHECK': 'nagios',
+    'NAGIOS_TYPE_PASSIVE_SERVICE_CHECK': 'nagios',
+    'NAGIOS_TYPE_SERVICE_ALERT': 'nagios',
+    'NAGIOS_TYPE_SERVICE_DOWNTIME_ALERT': 'nagios',
+    'NAGIOS_TYPE_SERVICE_EVENT_HANDLER': 'nagios',
+    'NAGIOS_TYPE_SERVICE_FLAPPING_ALERT': 'nagios',
+    'NAGIOS_TYPE_SERVICE_NOTIFICATION': 'nagios',
+    'NAGIOS_TYPE_TIMEPERIOD_TRANSITION': 'nagios',
+    'NAGIOS_WARNING': 'nagios',
+    'NETSCREENSESSIONLOG': 'firewalls',
+    'NONNEGINT': 'grok-patterns',
+    'NOTSPACE': 'grok-patterns',
+    'NUMBER': 'grok-patterns',
+    'PATH': 'grok-patterns',
+    'POSINT': 'grok-patterns',
+    'POSTGRESQL': 'postgresql',
+    'PROG': 'grok-patterns',
+    'QS': 'grok-patterns',
+    'QUOTEDSTRING': 'grok-patterns',
+    'REDISLOG': 'redis',
+    'REDISTIMESTAMP': 'redis',
+    'RT_FLOW1': 'junos',
+    'RT_FLOW2': 'junos',
+    'RT_FLOW3': 'junos',
+    'RT_FLOW_EVENT': 'junos',
+    'RUBY_LOGGER': 'ruby',
+    'RUBY_LOGLEVEL': 'ruby',
+    'SECOND': 'grok-patterns',
+    'SPACE': 'grok-patterns',
+    'SYSLOG5424BASE': 'linux-syslog',
+    'SYSLOG5424LINE': 'linux-syslog',
+    'SYSLOG5424PRI': 'linux-syslog',
+    'SYSLOG5424SD': 'linux-syslog',
+    'SYSLOGBASE': 'grok-patterns',
+    'SYSLOGBASE2': 'linux-syslog',
+    'SYSLOGFACILITY': 'grok-patterns',
+    'SYSLOGHOST': 'grok-patterns',
+    'SYSLOGLINE': 'linux-syslog',
+    'SYSLOGPAMSESSION': 'linux-syslog',
+    'SYSLOGPROG': 'grok-patterns',
+    'SYSLOGTIMESTAMP': 'grok-patterns',
+    'TIME': 'grok-patterns',
+    'TIMESTAMP_ISO8601': 'grok-patterns',
+    'TTY': 'grok-patterns',
+    'TZ': 'grok-patterns',
+    'UNIXPATH': 'grok-patterns',
+    'URI': 'grok-patterns',
+    'URIHOST': 'grok-patterns',
+    'URIPARAM': 'grok-patterns',
+    'URIPATH': 'grok-patterns',
+    'URIPATHPARAM': 'grok-patterns',
+    'URIPROTO': 'grok-patterns',
+    'USER': 'grok-patterns',
+    'USERNAME': 'grok-patterns',
+    'UUID': 'grok-patterns',
+    'WINDOWSMAC': 'grok-patterns',
+    'WINPATH': 'grok-patterns',
+    'WORD': 'grok-patterns',
+    'YEAR': 'grok-patterns',
+}
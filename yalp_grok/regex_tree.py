@@ -0,0 +1,764 @@
+# vim: set et ts=4 sw=4 fileencoding=utf-8:
+'''
+yalp_grok.regex_tree
+====================
+
+Minimal parser for the regex syntax found in grok patterns.
+
+parse() turns an expanded pattern into a tree of namedtuples which keeps
+the source text of every node, so that unparse() gives back the exact
+same pattern and tree rewrites only touch what they change. Syntax the
+parser does not know about raises RegexSyntaxError; callers analysing
+patterns treat that as "nothing can be said about this pattern".
+
+optimize() rewrites a tree into one matching the same text faster, see
+its docstring for what it changes.
+'''
+import re
+from collections import namedtuple
+
+from . import exceptions
+
+
+class RegexSyntaxError(exceptions.GrokError):
+    ''' Pattern uses regex syntax the parser does not understand '''
+
+
+# A literal character
+Char = namedtuple('Char', 'char source')
+
+# Anything else matching at most one character: kind is one of 'any',
+# 'set', 'class', 'anchor', 'backref', 'flags' or 'comment'
+Atom = namedtuple('Atom', 'kind source')
+
+# Parenthesised group: kind is one of 'capture', 'named', 'group',
+# 'atomic', 'lookahead', 'neg_lookahead', 'lookbehind', 'neg_lookbehind',
+# 'branch_reset' or 'flags'. source is the opening text, e.g. '(?P<x>'
+Group = namedtuple('Group', 'kind name body source')
+
+# Quantified node, max is None when unbounded. source is the quantifier
+Repeat = namedtuple('Repeat', 'item min max source')
+
+# Branches separated by '|', each a tuple of nodes
+Alternation = namedtuple('Alternation', 'branches')
+
+# Character escapes standing for a literal character
+LITERAL_ESCAPES = {
+    'a': '\a', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t', 'v': '\v',
+}
+CLASS_ESCAPES = frozenset('dDsSwWhX')
+ANCHOR_ESCAPES = frozenset('bBAZzGmMK')
+ZERO_WIDTH = frozenset(['anchor', 'flags', 'comment'])
+LOOKAROUNDS = frozenset(
+    ['lookahead', 'neg_lookahead', 'lookbehind', 'neg_lookbehind'])
+OCTAL = frozenset('01234567')
+
+# Openings of the groups whose kind they tell, lookbehinds before the
+# named groups sharing their (?< start
+GROUP_OPENINGS = (
+    ('(?:', 'group'), ('(?>', 'atomic'), ('(?|', 'branch_reset'),
+    ('(?=', 'lookahead'), ('(?!', 'neg_lookahead'),
+    ('(?<=', 'lookbehind'), ('(?<!', 'neg_lookbehind'),
+)
+
+# Start of a fuzzy matching constraint, such as {e<=1}, {1<=e<=2} or
+# {2i+2d<=4}, which the regex module reads where braces do not form a
+# quantifier
+FUZZY_CONSTRAINT = re.compile(
+    r'\{(?:[deis][<,:}]|\d+<=?[deis]|\d*[dis][+<])')
+
+# Inline flags that do not change which literal text a pattern matches
+LITERAL_SAFE_FLAGS = frozenset('ms')
+
+# _literal_info() of nodes only matching the empty string, and of nodes
+# matching texts with no known literal
+EMPTY_INFO = ('', '', '', frozenset())
+UNKNOWN_INFO = (None, '', '', frozenset())
+
+# Groups whose bodies optimize() leaves alone: lookbehinds are matched
+# backwards, and branch resets number their groups per branch
+OPAQUE_GROUPS = frozenset(['lookbehind', 'neg_lookbehind', 'branch_reset'])
+
+# Groups matching what their body matches, whose first character is thus
+# the first character of the body
+TRANSPARENT_GROUPS = frozenset(['capture', 'named', 'group', 'atomic'])
+
+
+def parse(source):
+    '''
+    Parse a regex source into an Alternation.
+    '''
+    parser = _Parser(source)
+    tree = parser.parse_alternation()
+    if parser.pos != len(source):
+        raise RegexSyntaxError(
+            'Unbalanced parenthesis at {0} in {1}'.format(parser.pos, source))
+    return tree
+
+
+def unparse(node):
+    '''
+    Return the regex source of a tree or node.
+    '''
+    if isinstance(node, Alternation):
+        return '|'.join(
+            ''.join(unparse(item) for item in branch)
+            for branch in node.branches)
+    if isinstance(node, Group):
+        return node.source + unparse(node.body) + ')'
+    if isinstance(node, Repeat):
+        return unparse(node.item) + node.source
+    return node.source
+
+
+def walk(node):
+    '''
+    Yield node and all the nodes below it, depth first.
+    '''
+    yield node
+    if isinstance(node, Alternation):
+        for branch in node.branches:
+            for item in branch:
+                for child in walk(item):
+                    yield child
+    elif isinstance(node, Group):
+        for child in walk(node.body):
+            yield child
+    elif isinstance(node, Repeat):
+        for child in walk(node.item):
+            yield child
+
+
+def prune_captures(node, keep):
+    '''
+    Return node with its capturing groups made non-capturing, except the
+    named groups whose name keep() accepts.
+    '''
+    if isinstance(node, Alternation):
+        return Alternation(tuple(
+            tuple(prune_captures(item, keep) for item in branch)
+            for branch in node.branches))
+    if isinstance(node, Group):
+        body = prune_captures(node.body, keep)
+        if node.kind == 'capture' or (node.kind == 'named' and
+                                      not keep(node.name)):
+            return Group('group', None, body, '(?:')
+        return node._replace(body=body)
+    if isinstance(node, Repeat):
+        return node._replace(item=prune_captures(node.item, keep))
+    return node
+
+
+def optimize(tree):
+    '''
+    Return tree rewritten to find the same matches with less
+    backtracking.
+
+    - Branches of alternations starting with the same literal text are
+      merged into one, followed by an alternation of what remains of
+      them: Deny|Denied|denied becomes Den(?:y|ied)|denied. A branch is
+      only moved ahead of branches starting with other characters, which
+      can not match where it does, so the branches are still tried in
+      an order giving the same matches.
+    - Unnamed capturing groups, such as those of unnamed grok
+      references, are made non-capturing unless the pattern uses back
+      references.
+    - Non-capturing groups which do not group anything are removed.
+
+    Patterns with inline flags changing how literals match, such as
+    (?i), are returned unchanged, as are trees whose rewrite would not
+    parse back to itself.
+    '''
+    drop_captures = True
+    for node in walk(tree):
+        if isinstance(node, (Atom, Group)) and node.kind == 'flags' and \
+                not _literal_safe_flags(node.source):
+            return tree
+        if isinstance(node, Atom) and node.kind == 'backref':
+            drop_captures = False
+
+    optimized = _optimize(tree, drop_captures)
+    try:
+        if parse(unparse(optimized)) != optimized:
+            return tree
+    except RegexSyntaxError:
+        return tree
+    return optimized
+
+
+def _optimize(node, drop_captures):
+    '''
+    optimize() of node.
+    '''
+    if isinstance(node, Alternation):
+        branches = []
+        for branch in node.branches:
+            items = _optimize_sequence(branch, drop_captures)
+            if len(items) == 1 and _plain_group(items[0]):
+                branches.extend(items[0].body.branches)
+            else:
+                branches.append(items)
+        return Alternation(_factor(branches))
+    if isinstance(node, Group):
+        if node.kind in OPAQUE_GROUPS:
+            return node
+        body = _optimize(node.body, drop_captures)
+        if node.kind == 'capture' and drop_captures:
+            return Group('group', None, body, '(?:')
+        return node._replace(body=body)
+    if isinstance(node, Repeat):
+        item = _optimize(node.item, drop_captures)
+        if _plain_group(item) and len(item.body.branches) == 1 and \
+                len(item.body.branches[0]) == 1 and \
+                _repeatable(item.body.branches[0][0]):
+            item = item.body.branches[0][0]
+        return node._replace(item=item)
+    return node
+
+
+def _optimize_sequence(items, drop_captures):
+    '''
+    optimize() of the items of a branch, splicing in the groups of a
+    single branch.
+    '''
+    sequence = []
+    for item in items:
+        item = _optimize(item, drop_captures)
+        if _plain_group(item) and len(item.body.branches) == 1:
+            sequence.extend(item.body.branches[0])
+        else:
+            sequence.append(item)
+    return tuple(sequence)
+
+
+def _plain_group(node):
+    '''
+    True if node is a non-capturing group without flags.
+    '''
+    return isinstance(node, Group) and node.kind == 'group'
+
+
+def _repeatable(node):
+    '''
+    True if node can be quantified without being grouped.
+    '''
+    if isinstance(node, Atom):
+        return node.kind not in ZERO_WIDTH
+    return isinstance(node, (Char, Group))
+
+
+def _first_chars(items):
+    '''
+    Set of the characters every match of a sequence can start with, None
+    if it can not be told or the sequence can match nothing.
+    '''
+    if not items:
+        return None
+    item = items[0]
+    if isinstance(item, Char):
+        return frozenset([item.char])
+    if isinstance(item, Repeat) and item.min > 0:
+        return _first_chars((item.item,))
+    if isinstance(item, Group) and item.kind in TRANSPARENT_GROUPS:
+        chars = set()
+        for branch in item.body.branches:
+            branch_chars = _first_chars(branch)
+            if branch_chars is None:
+                return None
+            chars.update(branch_chars)
+        return frozenset(chars)
+    return None
+
+
+def _factor(branches):
+    '''
+    Merge the branches starting with the same literal character, keeping
+    the order of the branches which can match at the same position.
+    '''
+    # [leading character, branches, first characters of each branch]
+    clusters = []
+    for branch in branches:
+        lead = branch[0].char if branch and isinstance(branch[0], Char) \
+            else None
+        target = None
+        if lead is not None:
+            for cluster in reversed(clusters):
+                if cluster[0] == lead:
+                    target = cluster
+                    break
+                if any(chars is None or lead in chars
+                       for chars in cluster[2]):
+                    break
+        if target is None:
+            clusters.append((lead, [branch], [_first_chars(branch)]))
+        else:
+            target[1].append(branch)
+            target[2].append(_first_chars(branch))
+    return tuple(members[0] if len(members) == 1 else _merge(members)
+                 for _, members, _ in clusters)
+
+
+def _merge(branches):
+    '''
+    Merge branches starting with the same literal character into a
+    single branch.
+    '''
+    first = branches[0]
+    length = 1
+    while all(len(branch) > length and isinstance(branch[length], Char) and
+              branch[length].char == first[length].char
+              for branch in branches):
+        length += 1
+    prefix = first[:length]
+    rests = _factor([branch[length:] for branch in branches])
+    if len(rests) == 1:
+        return prefix + rests[0]
+    if len(rests) == 2 and (not rests[0]) != (not rests[1]):
+        rest = rests[0] or rests[1]
+        if len(rest) == 1 and _repeatable(rest[0]):
+            item = rest[0]
+        else:
+            item = Group('group', None, Alternation((rest,)), '(?:')
+        return prefix + (Repeat(item, 0, 1, '?' if rests[0] else '??'),)
+    return prefix + (Group('group', None, Alternation(rests), '(?:'),)
+
+
+def required_literals(tree):
+    '''
+    Return literal substrings every match of the parsed pattern contains.
+
+    The result is conservative: it may miss literals but never lists one
+    a match can lack. Literals contained in a longer one are dropped and
+    the longest come first. Patterns using inline flags that change
+    literal matching, such as (?i), give no literals.
+    '''
+    for node in walk(tree):
+        if isinstance(node, Atom) and node.kind == 'flags' and \
+                not _literal_safe_flags(node.source):
+            return ()
+        if isinstance(node, Atom) and node.kind == 'backref':
+            return ()
+
+    literals = set(_literal_info(tree)[3])
+    literals.discard('')
+    longest = sorted(literals, key=lambda lit: (-len(lit), lit))
+    kept = []
+    for literal in longest:
+        if not any(literal in other for other in kept):
+            kept.append(literal)
+    return tuple(kept)
+
+
+def anchored_start(tree):
+    '''
+    Return True if every match of the parsed pattern starts at the
+    beginning of the searched text, so that matching it at the start
+    only finds the same matches as searching it.
+
+    ^ only counts when the pattern does not turn on multi-line mode.
+    '''
+    multiline = any(
+        isinstance(node, (Atom, Group)) and node.kind == 'flags' and
+        'm' in node.source[2:].split('-')[0]
+        for node in walk(tree))
+    return _anchored(tree, multiline)
+
+
+def _anchored(node, multiline):
+    '''
+    anchored_start() of node.
+    '''
+    if isinstance(node, Alternation):
+        return all(_sequence_anchored(branch, multiline)
+                   for branch in node.branches)
+    if isinstance(node, Group):
+        return node.kind not in LOOKAROUNDS and \
+            _anchored(node.body, multiline)
+    if isinstance(node, Repeat):
+        return node.min > 0 and _anchored(node.item, multiline)
+    if isinstance(node, Atom) and node.kind == 'anchor':
+        return node.source == '\\A' or (
+            node.source == '^' and not multiline)
+    return False
+
+
+def _sequence_anchored(items, multiline):
+    '''
+    anchored_start() of a sequence of nodes: the first one anchored
+    before anything matching text.
+    '''
+    for item in items:
+        if _anchored(item, multiline):
+            return True
+        if isinstance(item, Atom) and item.kind in ZERO_WIDTH:
+            continue
+        if isinstance(item, Group) and item.kind in LOOKAROUNDS:
+            continue
+        return False
+    return False
+
+
+def _literal_safe_flags(source):
+    '''
+    True if the inline flags of source, like '(?s)' or '(?s-m:', do not
+    change how literal characters match.
+    '''
+    flags = source[2:].rstrip(':)').replace('-', '')
+    return set(flags) <= LITERAL_SAFE_FLAGS
+
+
+def _literal_info(node):
+    '''
+    Return (exact, prefix, suffix, required) for node.
+
+    exact is the only string node can match or None, prefix and suffix
+    are literals every match starts or ends with and required is the set
+    of literals every match contains.
+    '''
+    if isinstance(node, Char):
+        return node.char, node.char, node.char, frozenset([node.char])
+    if isinstance(node, Atom):
+        return EMPTY_INFO if node.kind in ZERO_WIDTH else UNKNOWN_INFO
+    if isinstance(node, Group):
+        return _group_info(node)
+    if isinstance(node, Repeat):
+        return _repeat_info(node)
+    return _alternation_info(node)
+
+
+def _group_info(node):
+    '''
+    _literal_info() of a Group node.
+    '''
+    if node.kind in LOOKAROUNDS:
+        return EMPTY_INFO
+    if node.kind == 'flags' and not _literal_safe_flags(node.source):
+        return UNKNOWN_INFO
+    return _literal_info(node.body)
+
+
+def _repeat_info(node):
+    '''
+    _literal_info() of a Repeat node.
+    '''
+    if node.min == 0:
+        return UNKNOWN_INFO
+    exact, prefix, suffix, required = _literal_info(node.item)
+    if exact is not None and node.min == node.max:
+        exact = exact * node.min
+        return exact, exact, exact, required | frozenset([exact])
+    return None, prefix, suffix, required
+
+
+def _alternation_info(node):
+    '''
+    _literal_info() of an Alternation node.
+    '''
+    infos = [_sequence_info(branch) for branch in node.branches]
+    if len(infos) == 1:
+        return infos[0]
+    exacts = set(info[0] for info in infos)
+    exact = exacts.pop() if len(exacts) == 1 else None
+    prefix = _common_prefix([info[1] for info in infos])
+    suffix = _common_prefix([info[2][::-1] for info in infos])[::-1]
+    required = frozenset.intersection(*[info[3] for info in infos])
+    return exact, prefix, suffix, required | frozenset([prefix, suffix])
+
+
+def _sequence_info(items):
+    '''
+    _literal_info() of a sequence of nodes, joining adjacent literals.
+    '''
+    required = set()
+    run = ''
+    prefix = None
+    exact = True
+    for item in items:
+        item_exact, item_prefix, item_suffix, item_required = \
+            _literal_info(item)
+        required.update(item_required)
+        if item_exact is not None:
+            run += item_exact
+            continue
+        exact = False
+        run += item_prefix
+        if prefix is None:
+            prefix = run
+        required.add(run)
+        run = item_suffix
+    required.add(run)
+    if exact:
+        return run, run, run, frozenset(required)
+    return None, prefix, run, frozenset(required)
+
+
+def _common_prefix(strings):
+    '''
+    Longest common prefix of strings.
+    '''
+    first, last = min(strings), max(strings)
+    for index, char in enumerate(first):
+        if char != last[index]:
+            return first[:index]
+    return first
+
+
+class _Parser(object):
+    '''
+    Recursive descent parser over a regex source.
+    '''
+
+    def __init__(self, source):
+        self.source = source
+        self.pos = 0
+
+    def error(self, message):
+        ''' Raise a RegexSyntaxError about the current position '''
+        raise RegexSyntaxError('{0} at {1} in {2}'.format(
+            message, self.pos, self.source))
+
+    def parse_alternation(self):
+        ''' Parse branches until the end or a closing parenthesis '''
+        branches = [self.parse_sequence()]
+        while self.source.startswith('|', self.pos):
+            self.pos += 1
+            branches.append(self.parse_sequence())
+        return Alternation(tuple(branches))
+
+    def parse_sequence(self):
+        ''' Parse quantified items until |, ) or the end '''
+        items = []
+        source = self.source
+        while self.pos < len(source) and source[self.pos] not in '|)':
+            item = self.parse_item()
+            quantifier = self.parse_quantifier()
+            if quantifier is not None:
+                if isinstance(item, Atom) and item.kind in ZERO_WIDTH:
+                    self.error('Nothing to repeat')
+                item = Repeat(item, *quantifier)
+            items.append(item)
+        return tuple(items)
+
+    def parse_item(self):
+        ''' Parse one character, escape, set or group '''
+        source = self.source
+        char = source[self.pos]
+        if char == '(':
+            return self.parse_group()
+        if char == '[':
+            return self.parse_set()
+        if char == '\\':
+            return self.parse_escape()
+        if char in '*+?':
+            self.error('Nothing to repeat')
+        self.pos += 1
+        if char == '.':
+            return Atom('any', char)
+        if char in '^$':
+            return Atom('anchor', char)
+        return Char(char, char)
+
+    def parse_quantifier(self):
+        '''
+        Parse a quantifier, returning (min, max, source) or None.
+        '''
+        source = self.source
+        start = self.pos
+        if start >= len(source):
+            return None
+        char = source[start]
+        if char == '*':
+            bounds = (0, None)
+            self.pos += 1
+        elif char == '+':
+            bounds = (1, None)
+            self.pos += 1
+        elif char == '?':
+            bounds = (0, 1)
+            self.pos += 1
+        elif char == '{':
+            bounds = self.parse_braces()
+            if bounds is None:
+                if FUZZY_CONSTRAINT.match(source, start):
+                    self.error('Fuzzy matching is not supported')
+                return None
+        else:
+            return None
+        if self.pos < len(source) and source[self.pos] in '?+':
+            self.pos += 1
+        return bounds + (source[start:self.pos],)
+
+    def parse_braces(self):
+        '''
+        Parse {m}, {m,}, {,n} or {m,n}. Braces not forming a quantifier
+        are literals and give None.
+        '''
+        end = self.source.find('}', self.pos)
+        if end == -1:
+            return None
+        body = self.source[self.pos + 1:end]
+        low, comma, high = body.partition(',')
+        if not (low.isdigit() or (comma and low == '')) or \
+                not (high.isdigit() or high == ''):
+            return None
+        if not comma:
+            high = low
+        self.pos = end + 1
+        return int(low or 0), int(high) if high else None
+
+    def parse_set(self):
+        ''' Parse a [...] character set '''
+        source = self.source
+        start = self.pos
+        pos = start + 1
+        if source.startswith('^', pos):
+            pos += 1
+        if source.startswith(']', pos):
+            pos += 1
+        while pos < len(source) and source[pos] != ']':
+            if source[pos] == '\\':
+                pos += 2
+            elif source.startswith('[:', pos):
+                end = source.find(':]', pos + 2)
+                pos = end + 2 if end != -1 else pos + 1
+            else:
+                pos += 1
+        if pos >= len(source):
+            self.error('Unterminated character set')
+        self.pos = pos + 1
+        return Atom('set', source[start:self.pos])
+
+    def parse_escape(self):
+        ''' Parse a backslash escape '''
+        source = self.source
+        start = self.pos
+        if start + 1 >= len(source):
+            self.error('Trailing backslash')
+        char = source[start + 1]
+        self.pos = start + 2
+
+        if char in LITERAL_ESCAPES:
+            return Char(LITERAL_ESCAPES[char], source[start:self.pos])
+        if char in CLASS_ESCAPES:
+            return Atom('class', source[start:self.pos])
+        if char in ANCHOR_ESCAPES:
+            return Atom('anchor', source[start:self.pos])
+        if char.isalnum():
+            return self.parse_long_escape(start, char)
+        return Char(char, source[start:self.pos])
+
+    def parse_long_escape(self, start, char):
+        '''
+        Parse an escape running past its letter or digit: a property, a
+        code point, a back reference or an octal escape.
+        '''
+        source = self.source
+        if char in 'pP':
+            if source.startswith('{', self.pos):
+                self.pos = self.closing(self.pos, '}') + 1
+            else:
+                self.pos += 1
+            return Atom('class', source[start:self.pos])
+        if char in 'xuU':
+            width = {'x': 2, 'u': 4, 'U': 8}[char]
+            digits = source[self.pos:self.pos + width]
+            try:
+                value = int(digits, 16)
+            except ValueError:
+                self.error('Bad escape')
+            self.pos += width
+            return Char(_unichr(value), source[start:self.pos])
+        if char in 'gk':
+            if not source.startswith('<', self.pos):
+                self.error('Bad escape')
+            self.pos = self.closing(self.pos, '>') + 1
+            return Atom('backref', source[start:self.pos])
+        if not char.isdigit():
+            self.error('Unsupported escape')
+        return self.parse_numeric_escape(start)
+
+    def parse_numeric_escape(self, start):
+        ''' Parse an octal escape or a numbered back reference '''
+        source = self.source
+        digits = source[start + 1:start + 4]
+        octal = ''
+        for digit in digits:
+            if digit not in OCTAL:
+                break
+            octal += digit
+        if digits[0] == '0' or len(octal) == 3:
+            self.pos = start + 1 + len(octal)
+            return Char(_unichr(int(octal, 8)), source[start:self.pos])
+        self.pos = start + 2
+        if self.pos < len(source) and source[self.pos].isdigit():
+            self.pos += 1
+        return Atom('backref', source[start:self.pos])
+
+    def parse_group(self):
+        ''' Parse a parenthesised group '''
+        source = self.source
+        start = self.pos
+        if not source.startswith('(?', start):
+            self.pos += 1
+            return self.finish_group('capture', None, start)
+
+        for opening, kind in GROUP_OPENINGS:
+            if source.startswith(opening, start):
+                self.pos = start + len(opening)
+                return self.finish_group(kind, None, start)
+        if source.startswith('(?#', start):
+            self.pos = self.closing(start, ')') + 1
+            return Atom('comment', source[start:self.pos])
+        if source.startswith('(?P=', start):
+            self.pos = self.closing(start, ')') + 1
+            return Atom('backref', source[start:self.pos])
+        if source.startswith('(?P<', start) or source.startswith('(?<', start):
+            name_start = source.index('<', start) + 1
+            name_end = self.closing(name_start, '>')
+            self.pos = name_end + 1
+            return self.finish_group(
+                'named', source[name_start:name_end], start)
+        return self.parse_flags(start)
+
+    def parse_flags(self, start):
+        ''' Parse inline flags, alone or scoping a group '''
+        source = self.source
+        pos = start + 2
+        while pos < len(source) and (source[pos].isalpha() or
+                                     source[pos] == '-'):
+            pos += 1
+        flags = source[start + 2:pos]
+        if 'x' in flags:
+            self.error('Verbose patterns are not supported')
+        if not flags or not source.startswith((')', ':'), pos):
+            self.error('Unsupported group')
+        self.pos = pos + 1
+        if source[pos] == ')':
+            return Atom('flags', source[start:self.pos])
+        return self.finish_group('flags', None, start)
+
+    def finish_group(self, kind, name, start):
+        ''' Parse the body of a group whose opening has been consumed '''
+        opening = self.source[start:self.pos]
+        body = self.parse_alternation()
+        if not self.source.startswith(')', self.pos):
+            self.error('Missing closing parenthesis')
+        self.pos += 1
+        return Group(kind, name, body, opening)
+
+    def closing(self, pos, char):
+        ''' Return the position of the next char after pos '''
+        end = self.source.find(char, pos)
+        if end == -1:
+            self.error('Missing ' + char)
+        return end
+
+
+def _unichr(value):
+    '''
+    Character for a code point on both python 2 and 3.
+    '''
+    try:
+        return unichr(value)  # noqa pylint: disable=E0602
+    except NameError:
+        return chr(value)
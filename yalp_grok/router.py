@@ -0,0 +1,111 @@
+# vim: set et ts=4 sw=4 fileencoding=utf-8:
+'''
+yalp_grok.router
+================
+
+Match lines in two stages: a cheap header pattern first, then a single
+body pattern picked from the value of one of the header fields.
+
+Logs mixing many programs, such as syslog, share a header and differ in
+the rest of the line. Trying every full pattern in turn, or even all of
+them at once with a GrokSet, matches the header again for every
+candidate. A Router matches it once, looks up the body pattern of the
+value of a discriminator field, the program for syslog, and matches the
+body from the end of the header. The body is searched in the line
+itself from that offset, the remainder of the line is never copied.
+'''
+from . import exceptions
+from .yalp_grok import compile_pattern
+
+
+def compile_router(header, field, routes, fallback=(), custom_patterns=None,
+                   custom_patterns_dir=None, auto_map=False,
+                   body_mode='match'):
+    '''
+    Compile a header pattern and body patterns into a Router.
+
+    routes is either a mapping or an iterable of pairs of discriminator
+    values and body patterns. fallback is an iterable of (id, pattern)
+    pairs or of patterns, in which case every pattern is its own id.
+    Body patterns are compiled with body_mode as their match mode,
+    'match' by default so that they must start right where the header
+    ends. The other arguments are the same as for compile_pattern().
+    '''
+    def _compile(pattern, mode):
+        return compile_pattern(pattern, custom_patterns, custom_patterns_dir,
+                               auto_map=auto_map, mode=mode)
+
+    if hasattr(routes, 'items'):
+        routes = routes.items()
+    fallback_members = []
+    for item in fallback:
+        if isinstance(item, tuple):
+            route_id, pattern = item
+        else:
+            route_id, pattern = item, item
+        fallback_members.append((route_id, _compile(pattern, body_mode)))
+    return Router(_compile(header, None), field,
+                  [(value, _compile(pattern, body_mode))
+                   for value, pattern in routes],
+                  fallback_members)
+
+
+class Router(object):
+    '''
+    Header pattern and body patterns chosen by a field of the header.
+
+    header is a pattern compiled by compile_pattern() with a named group
+    field. routes maps the values of field to compiled body patterns and
+    fallback is a list of (id, compiled pattern) pairs tried in order
+    when the value has no route or its body pattern does not match.
+    '''
+
+    def __init__(self, header, field, routes, fallback=()):
+        if field not in header.regex.groupindex:
+            raise exceptions.GrokError(
+                'Header pattern has no field {0}: {1}'.format(
+                    field, header.regex.pattern))
+        self.header = header
+        self.field = field
+        self.routes = dict(routes)
+        self.fallback = list(fallback)
+        self._group = header.regex.groupindex[field]
+
+    def __len__(self):
+        return len(self.routes) + len(self.fallback)
+
+    def search(self, text):
+        '''
+        Search for the header and then for a body pattern in text.
+
+        Return a (route, dictionary) pair, route being the value of the
+        discriminator field or the id of the fallback pattern that
+        matched, and the dictionary holding the fields of both the
+        header and the body. Return None if the header or every body
+        pattern tried failed to match.
+        '''
+        header_match = self.header.search(text)
+        if header_match is None:
+            return None
+        end = header_match.end()
+
+        value = header_match.group(self._group)
+        body = self.routes.get(value)
+        if body is not None:
+            body_match = body.search(text, end)
+            if body_match is not None:
+                return value, self._merge(header_match, body, body_match)
+        for route_id, body in self.fallback:
+            body_match = body.search(text, end)
+            if body_match is not None:
+                return route_id, self._merge(header_match, body, body_match)
+        return None
+
+    def _merge(self, header_match, body, body_match):
+        '''
+        Dictionary of the fields of the header, updated with those of
+        the body.
+        '''
+        match_dict = self.header.convert(header_match)
+        match_dict.update(body.convert(body_match))
+        return match_dict
@@ -0,0 +1,145 @@
+# vim: set et ts=4 sw=4 fileencoding=utf-8:
+'''
+yalp_grok.stats
+===============
+
+Runtime statistics of instrumented patterns.
+
+Patterns compiled with instrument=True count their matches, misses,
+timed out searches and failed type conversions, time every search and
+keep the slowest texts they were searched in. Patterns compiled
+without it are not slowed down at all. An optional hook is called after
+every search, to feed the numbers to a metrics system.
+
+Counters are updated without locking, so they may be slightly off when
+a pattern is shared between threads.
+'''
+import heapq
+import itertools
+import threading
+import weakref
+from collections import namedtuple
+
+# Number of slowest searched texts kept per pattern
+DEFAULT_SLOWEST = 10
+
+# Search time histogram buckets: bucket n counts searches which took
+# less than 2 ** n microseconds, the last one everything slower
+HISTOGRAM_BUCKETS = 24
+
+StatsSnapshot = namedtuple(
+    'StatsSnapshot',
+    'name searches matches misses timeouts conversion_failures '
+    'search_time histogram slowest')
+
+try:
+    TEXT_TYPES = (unicode, bytes)  # noqa pylint: disable=E0602
+except NameError:  # pragma: no cover
+    TEXT_TYPES = (str, bytes)
+
+_REGISTRY = weakref.WeakSet()
+_REGISTRY_LOCK = threading.Lock()
+
+
+class PatternStats(object):
+    '''
+    Statistics of the searches of one pattern.
+
+    hook, if given, is called after every search with the stats, the
+    searched text, whether it matched and the time the search took.
+    '''
+
+    def __init__(self, name, hook=None, slowest=DEFAULT_SLOWEST):
+        self.name = name
+        self.hook = hook
+        self._max_slowest = slowest
+        self.reset()
+        with _REGISTRY_LOCK:
+            _REGISTRY.add(self)
+
+    def reset(self):
+        '''
+        Set every counter back to zero.
+        '''
+        self.matches = 0
+        self.misses = 0
+        self.timeouts = 0
+        self.search_time = 0.0
+        self.conversion_failures = {}
+        self.histogram = [0] * HISTOGRAM_BUCKETS
+        # Heap of (time, order, text), order breaking ties between texts
+        self._slowest = []
+        self._order = itertools.count()
+
+    def record(self, text, matched, elapsed, pos=0, endpos=None):
+        '''
+        Account for a search of text between pos and endpos which took
+        elapsed seconds.
+        '''
+        if matched:
+            self.matches += 1
+        else:
+            self.misses += 1
+        self.search_time += elapsed
+        bucket = int(elapsed * 1e6).bit_length()
+        self.histogram[min(bucket, HISTOGRAM_BUCKETS - 1)] += 1
+
+        slowest = self._slowest
+        if len(slowest) < self._max_slowest:
+            heapq.heappush(slowest, (elapsed, next(self._order),
+                                     _sample(text, pos, endpos)))
+        elif slowest and elapsed > slowest[0][0]:
+            heapq.heapreplace(slowest, (elapsed, next(self._order),
+                                        _sample(text, pos, endpos)))
+
+        if self.hook is not None:
+            self.hook(self, text, matched, elapsed)
+
+    def timed_out(self, text, elapsed, pos=0, endpos=None):
+        '''
+        Account for a search of text which was abandoned after elapsed
+        seconds. It counts as a miss too.
+        '''
+        self.timeouts += 1
+        self.record(text, False, elapsed, pos, endpos)
+
+    def conversion_failed(self, name, value):  # pylint: disable=W0613
+        '''
+        Account for a value of group name which could not be converted.
+        '''
+        self.conversion_failures[name] = \
+            self.conversion_failures.get(name, 0) + 1
+
+    def snapshot(self):
+        '''
+        Return the current statistics as a StatsSnapshot. slowest lists
+        (time, text) pairs, slowest first.
+        '''
+        return StatsSnapshot(
+            self.name, self.matches + self.misses, self.matches, self.misses,
+            self.timeouts, dict(self.conversion_failures), self.search_time,
+            list(self.histogram),
+            [(elapsed, text) for elapsed, _, text
+             in sorted(self._slowest, reverse=True)])
+
+
+def all_stats():
+    '''
+    Return snapshots of the statistics of every instrumented pattern
+    still in use, the ones which took the most time first.
+    '''
+    with _REGISTRY_LOCK:
+        stats = list(_REGISTRY)
+    return sorted((pattern_stats.snapshot() for pattern_stats in stats),
+                  key=lambda snapshot: snapshot.search_time, reverse=True)
+
+
+def _sample(text, pos, endpos):
+    '''
+    Copy of the searched part of text, which may be a memory map.
+    '''
+    if pos or endpos is not None or not isinstance(text, TEXT_TYPES):
+        text = text[pos:endpos]
+        if not isinstance(text, TEXT_TYPES):
+            text = bytes(text)
+    return text
@@ -0,0 +1,238 @@
+# vim: set et ts=4 sw=4 fileencoding=utf-8:
+'''
+yalp_grok.stream
+================
+
+Search a compiled pattern in a stream of lines.
+
+grok_iter() reads its source one line at a time and yields results as
+they are found, so a log file of any size is parsed in constant memory.
+Line endings are left out of the search by limiting it to the end of the
+line text rather than by stripping, which would copy every line.
+
+grok_iter_mmap() searches a pattern compiled with as_bytes set directly
+in a memory map of a file, so lines are neither read into memory nor
+decoded: only the captured fields are copied out of the map. Every line
+is searched through a view of its own bytes, so that anchors such as \\A
+and $ match at its bounds as they do for grok_iter().
+'''
+import io
+import mmap
+import timeit
+
+from . import exceptions
+from .yalp_grok import make_converter
+
+try:
+    STRING_TYPES = (basestring,)  # noqa pylint: disable=E0602
+except NameError:  # pragma: no cover
+    STRING_TYPES = (str,)
+
+
+def grok_iter(source, pattern, batch_size=None, on_miss=None,
+              encoding=None, errors=None):
+    '''
+    Search pattern in every line of source.
+
+    source is the path of a file, an open file or any iterable of lines,
+    with or without their line endings. pattern is a pattern compiled by
+    compile_pattern(). Paths are opened with encoding and errors, and
+    closed once exhausted. Patterns compiled with as_bytes set search
+    lines of bytes, and paths are then read in binary mode.
+
+    Yields the result of grok_search() for every line, None for lines
+    which do not match. If on_miss is given, it is called with the line
+    number (starting at 1) and the text of every line which does not
+    match, without its line ending, and those lines are not yielded. Any
+    callable works, for instance the append method of a bounded
+    collections.deque to keep the last misses around.
+
+    If batch_size is given, results are yielded in lists of up to
+    batch_size items instead of one by one.
+    '''
+    if isinstance(source, STRING_TYPES):
+        return _iter_path(source, pattern, batch_size, on_miss,
+                          encoding, errors)
+    results = _iter_lines(source, pattern, on_miss)
+    if batch_size:
+        return _batches(results, batch_size)
+    return results
+
+
+def grok_iter_mmap(path, pattern, batch_size=None, on_miss=None,
+                   encoding='utf-8', errors='strict'):
+    '''
+    Search pattern in every line of the file at path, through a memory
+    map of the file.
+
+    pattern must be compiled by compile_pattern() with as_bytes set.
+    Captured fields are decoded with encoding and errors, or left as
+    bytes if encoding is None. Otherwise behaves like grok_iter(), except
+    that on_miss is called with the offset in bytes of every line which
+    does not match rather than its line number.
+    '''
+    if not _is_bytes(pattern):
+        raise exceptions.GrokError(
+            'grok_iter_mmap() needs a pattern compiled with as_bytes set')
+    results = _iter_mmap(path, pattern, on_miss, encoding, errors)
+    if batch_size:
+        return _batches(results, batch_size)
+    return results
+
+
+def _iter_path(path, pattern, batch_size, on_miss, encoding, errors):
+    '''
+    Search pattern in the lines of the file at path.
+    '''
+    if _is_bytes(pattern):
+        lines = io.open(path, 'rb')
+    else:
+        lines = io.open(path, 'r', encoding=encoding, errors=errors)
+    with lines:
+        results = _iter_lines(lines, pattern, on_miss)
+        if batch_size:
+            results = _batches(results, batch_size)
+        for result in results:
+            yield result
+
+
+def _iter_lines(lines, pattern, on_miss):
+    '''
+    Search pattern in every line, ignoring line endings.
+    '''
+    search = getattr(pattern, 'search', None) or pattern[0].search
+    convert = getattr(pattern, 'convert', None) or \
+        make_converter(pattern[0], pattern[1])
+    newline, crlf = (b'\n', b'\r\n') if _is_bytes(pattern) else \
+        ('\n', '\r\n')
+    for number, line in enumerate(lines, 1):
+        end = len(line)
+        if line.endswith(newline):
+            end -= 2 if line.endswith(crlf) else 1
+        match_obj = search(line, 0, end)
+        if match_obj is not None:
+            yield convert(match_obj)
+        elif on_miss is None:
+            yield None
+        else:
+            on_miss(number, line[:end])
+
+
+def _iter_mmap(path, pattern, on_miss, encoding, errors):
+    '''
+    Search pattern in every line of a memory map of the file at path.
+    '''
+    search_line = _line_searcher(pattern)
+    pattern_stats = getattr(pattern, 'stats', None)
+    convert = make_converter(
+        pattern[0], pattern[1], encoding, errors,
+        pattern_stats.conversion_failed if pattern_stats else None,
+        getattr(pattern, 'output', 'dict'), getattr(pattern, 'intern', None),
+        getattr(pattern, 'intern_table', None))
+    for lines, start, end, line in _mapped_lines(path):
+        match_obj = search_line(lines, start, end, line)
+        if match_obj is not None:
+            yield convert(match_obj)
+        elif on_miss is None:
+            yield None
+        else:
+            text = lines[start:end]
+            if encoding is not None:
+                text = text.decode(encoding, errors)
+            on_miss(start, text)
+
+
+def _line_searcher(pattern):
+    '''
+    Function searching pattern in a line of a memory map, given the map,
+    the offsets of the line text and a view of it, and recording the
+    search in the statistics of instrumented patterns.
+    '''
+    search = getattr(pattern[0], getattr(pattern, 'mode', 'search'))
+    literals = getattr(pattern, 'literals', ())
+    pattern_stats = getattr(pattern, 'stats', None)
+
+    def _search(lines, start, end, line):
+        for literal in literals:
+            if lines.find(literal, start, end) < 0:
+                return None
+        return search(line)
+
+    if pattern_stats is None:
+        return _search
+
+    def _recorded_search(lines, start, end, line):
+        started = timeit.default_timer()
+        match_obj = _search(lines, start, end, line)
+        pattern_stats.record(lines, match_obj is not None,
+                             timeit.default_timer() - started, start, end)
+        return match_obj
+
+    return _recorded_search
+
+
+def _mapped_lines(path):
+    '''
+    Yield the memory map of the file at path, the offsets of the text of
+    every line, line ending excluded, and a view of that text, valid
+    until the next line is read.
+    '''
+    with io.open(path, 'rb') as lfh:
+        if not lfh.seek(0, io.SEEK_END):
+            return
+        lines = mmap.mmap(lfh.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        view = memoryview(lines)
+    except TypeError:  # pragma: no cover
+        # Python 2 maps only have the old buffer interface
+        view = None
+    try:
+        find = lines.find
+        size = len(lines)
+        start = 0
+        while start < size:
+            end = find(b'\n', start)
+            if end == -1:
+                end = size
+            line_end = end
+            if line_end > start and lines[line_end - 1:line_end] == b'\r':
+                line_end -= 1
+            if view is None:  # pragma: no cover
+                line = buffer(  # noqa pylint: disable=E0602
+                    lines, start, line_end - start)
+                yield lines, start, line_end, line
+            else:
+                line = view[start:line_end]
+                try:
+                    yield lines, start, line_end, line
+                finally:
+                    # The map can not be closed while views of it remain
+                    line.release()
+            start = end + 1
+    finally:
+        if view is not None:
+            view.release()
+        lines.close()
+
+
+def _is_bytes(pattern):
+    '''
+    True if pattern was compiled with as_bytes set.
+    '''
+    return isinstance(pattern[0].pattern, bytes)
+
+
+def _batches(results, batch_size):
+    '''
+    Group results in lists of up to batch_size items.
+    '''
+    batch = []
+    append = batch.append
+    for result in results:
+        append(result)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+            append = batch.append
+    if batch:
+        yield batch
@@ -0,0 +1,266 @@
+# vim: set et ts=4 sw=4 fileencoding=utf-8:
+'''
+yalp_grok.timestamps
+====================
+
+Conversions of the timestamps matched by HTTPDATE, SYSLOGTIMESTAMP and
+TIMESTAMP_ISO8601 to datetime objects or to seconds since the epoch,
+the datetime and epoch types of grok patterns.
+
+The format of a timestamp is told from its first characters and every
+format is split with a dedicated regex, several times faster than
+trying strptime() formats. Lines of dense logs share their timestamp
+with the lines logged in the same second, so the latest conversions are
+kept in an LRU cache of TIMESTAMP_CACHE_SIZE entries and repeated
+timestamps are not parsed again.
+
+Timestamps with a time zone give aware datetime objects, others naive
+ones, which are taken as UTC when converted to seconds since the epoch.
+SYSLOGTIMESTAMP has no year, the current year is used and is part of
+their cache keys, so that cached conversions do not outlive the year.
+'''
+import datetime
+import functools
+import re
+import time
+
+from .cache import LRUCache
+
+# Distinct timestamps whose conversions are kept
+TIMESTAMP_CACHE_SIZE = 256
+
+HTTPDATE = re.compile(
+    r'(\d\d?)/([A-Za-z]+)/(\d+):(\d\d?):(\d\d):(\d\d)(?:[:.,](\d+))? '
+    r'([+-]\d+)\Z')
+SYSLOGTIMESTAMP = re.compile(
+    r'([A-Za-z]+) +(\d\d?) (\d\d?):(\d\d):(\d\d)(?:[:.,](\d+))?\Z')
+TIMESTAMP_ISO8601 = re.compile(
+    r'(\d+)-(\d\d?)-(\d\d?)[T ](\d\d?):?(\d\d)(?::?(\d\d)(?:[:.,](\d+))?)?'
+    r'(Z|[+-]\d\d?(?::?\d\d)?)?\Z')
+
+MONTHS = dict((name, number) for number, name in enumerate(
+    ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct',
+     'Nov', 'Dec'), 1))
+
+try:
+    TIMEZONE = datetime.timezone
+except AttributeError:  # pragma: no cover
+    class TIMEZONE(datetime.tzinfo):
+        '''
+        Time zone at a fixed offset from UTC, for Python 2 which lacks
+        datetime.timezone.
+        '''
+
+        def __init__(self, offset):
+            super(TIMEZONE, self).__init__()
+            self._offset = offset
+
+        def __getinitargs__(self):
+            return (self._offset,)
+
+        def __eq__(self, other):
+            return isinstance(other, TIMEZONE) and \
+                self._offset == other._offset
+
+        def __ne__(self, other):
+            return not self == other
+
+        def __hash__(self):
+            return hash(self._offset)
+
+        def utcoffset(self, _):
+            return self._offset
+
+        def dst(self, _):
+            return datetime.timedelta(0)
+
+        def tzname(self, _):
+            minutes = int(self._offset.total_seconds()) // 60
+            return 'UTC{0}{1:02d}:{2:02d}'.format(
+                '-' if minutes < 0 else '+', abs(minutes) // 60,
+                abs(minutes) % 60)
+
+UTC = TIMEZONE(datetime.timedelta(0))
+
+EPOCH = datetime.datetime(1970, 1, 1)
+
+# Current year and the seconds since the epoch it starts and ends at
+_YEAR = [None, 0.0, 0.0]
+
+
+def _memoize(func):
+    '''
+    Wrap func in an LRU cache of TIMESTAMP_CACHE_SIZE entries.
+    '''
+    if hasattr(functools, 'lru_cache'):
+        return functools.lru_cache(TIMESTAMP_CACHE_SIZE)(func)
+    cache = LRUCache(TIMESTAMP_CACHE_SIZE)  # pragma: no cover
+
+    @functools.wraps(func)
+    def _cached(*args):  # pragma: no cover
+        result = cache.get(args)
+        if result is None:
+            result = func(*args)
+            cache.put(args, result)
+        return result
+    return _cached  # pragma: no cover
+
+
+def to_datetime(value):
+    '''
+    Return the datetime of a timestamp matched by HTTPDATE,
+    SYSLOGTIMESTAMP or TIMESTAMP_ISO8601.
+
+    Raises ValueError for other texts.
+    '''
+    # Timestamps which do not start with a digit are SYSLOGTIMESTAMP ones,
+    # taken in the current year
+    return _datetime(value, None if value[:1].isdigit() else _this_year())
+
+
+def _this_year():
+    '''
+    Current year in UTC, only worked out again once the time is past the
+    year it was last worked out for.
+    '''
+    now = time.time()
+    if not _YEAR[1] <= now < _YEAR[2]:
+        year = time.gmtime(now).tm_year
+        _YEAR[:] = [year, _seconds(datetime.datetime(year, 1, 1)),
+                    _seconds(datetime.datetime(year + 1, 1, 1))]
+    return _YEAR[0]
+
+
+def _seconds(naive):
+    '''
+    Seconds since the epoch of a naive UTC datetime.
+    '''
+    return (naive - EPOCH).total_seconds()
+
+
+@_memoize
+def _datetime(value, year):
+    '''
+    to_datetime() of value, in year if it has none.
+    '''
+    if isinstance(value, bytes) and not isinstance(value, str):
+        value = value.decode('ascii')
+    if not value:
+        raise ValueError('Empty timestamp')
+    if not value[0].isdigit():
+        return _syslog(value, year)
+    if value[1:3].find('/') >= 0:
+        return _httpdate(value)
+    return _iso8601(value)
+
+
+def _match(regex, value):
+    '''
+    Groups of regex matching value, ValueError if it does not.
+    '''
+    match_obj = regex.match(value)
+    if match_obj is None:
+        raise ValueError('Unknown timestamp format: {0}'.format(value))
+    return match_obj.groups()
+
+
+def _month(name):
+    '''
+    Number of a month from its name, abbreviated or not.
+    '''
+    try:
+        return MONTHS[name[:3]]
+    except KeyError:
+        raise ValueError('Unknown month: {0}'.format(name))
+
+
+def _year(digits):
+    '''
+    Year of its digits, two digit years being taken in this century.
+    '''
+    year = int(digits)
+    return year + 2000 if len(digits) == 2 else year
+
+
+def _microseconds(fraction):
+    '''
+    Microseconds of the digits of a fraction of a second.
+    '''
+    if not fraction:
+        return 0
+    return int((fraction + '000000')[:6])
+
+
+def _zone(offset):
+    '''
+    tzinfo of an offset such as +0200, -07:00, +1 or Z.
+    '''
+    if offset == 'Z':
+        return UTC
+    sign = -1 if offset[0] == '-' else 1
+    digits = offset[1:].replace(':', '')
+    if len(digits) <= 2:
+        hours, minutes = int(digits), 0
+    else:
+        hours, minutes = int(digits[:-2]), int(digits[-2:])
+    return TIMEZONE(sign * datetime.timedelta(hours=hours, minutes=minutes))
+
+
+def _httpdate(value):
+    '''
+    Datetime of a HTTPDATE timestamp, 10/Oct/2000:13:55:36 -0700.
+    '''
+    day, month, year, hour, minute, second, fraction, offset = _match(
+        HTTPDATE, value)
+    return datetime.datetime(
+        _year(year), _month(month), int(day), int(hour), int(minute),
+        int(second), _microseconds(fraction), _zone(offset))
+
+
+def _syslog(value, year):
+    '''
+    Datetime of a SYSLOGTIMESTAMP timestamp, Oct 11 22:14:15, in year.
+    '''
+    month, day, hour, minute, second, fraction = _match(SYSLOGTIMESTAMP,
+                                                        value)
+    return datetime.datetime(
+        year, _month(month), int(day), int(hour), int(minute), int(second),
+        _microseconds(fraction))
+
+
+def _iso8601(value):
+    '''
+    Datetime of a TIMESTAMP_ISO8601 timestamp, 2016-03-25T05:55:32Z.
+    '''
+    year, month, day, hour, minute, second, fraction, offset = _match(
+        TIMESTAMP_ISO8601, value)
+    return datetime.datetime(
+        _year(year), int(month), int(day), int(hour), int(minute),
+        int(second or 0), _microseconds(fraction),
+        _zone(offset) if offset else None)
+
+
+def to_epoch(value):
+    '''
+    Return the seconds since the epoch of a timestamp as a float, naive
+    timestamps being taken as UTC.
+
+    Raises ValueError for other texts, and for timestamps whose offset
+    takes them past the range of datetime objects in UTC.
+    '''
+    return _epoch(value, None if value[:1].isdigit() else _this_year())
+
+
+@_memoize
+def _epoch(value, year):
+    '''
+    to_epoch() of value, in year if it has none.
+    '''
+    parsed = _datetime(value, year)
+    if parsed.tzinfo is not None:
+        try:
+            parsed = parsed.replace(tzinfo=None) - parsed.utcoffset()
+        except OverflowError:
+            raise ValueError('Timestamp out of range in UTC: {0}'.format(
+                value))
+    return _seconds(parsed)
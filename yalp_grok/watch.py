@@ -0,0 +1,200 @@
+# vim: set et ts=4 sw=4 fileencoding=utf-8:
+'''
+yalp_grok.watch
+===============
+
+Compiled patterns kept up to date with pattern files edited while a
+process runs.
+
+compile_pattern() reads custom_patterns_dir again on every call, and a
+pattern compiled earlier never sees later edits. A WatchedPatterns
+object reads its pattern directories once, compiles the patterns added
+to it, and remembers every pattern name each of them depends upon,
+directly or through other patterns. check() looks for pattern files
+whose size or modification time changed, reads only those, and compiles
+again only the patterns depending on a definition that changed.
+
+All the patterns concerned are compiled before any is replaced, and the
+compiled patterns are swapped in a single assignment, so lookups never
+see a mix of old and new definitions. Searches which already hold a
+compiled pattern finish with it.
+'''
+import os
+import threading
+
+from . import library
+from .yalp_grok import (
+    CompiledPattern, InstrumentedPattern, PREDEFINED_PATTERNS,
+    _check_interned, _compile, _compile_options,
+)
+
+
+class WatchedPatterns(object):
+    '''
+    Patterns compiled with the bundled patterns and those of the files
+    of patterns_dirs, files of later directories overriding those of
+    earlier ones.
+
+    Patterns are added with add() and looked up by key. The other
+    arguments, keyword only options such as output, intern and optimize
+    included, are the same as for compile_pattern() and apply to every
+    pattern.
+    '''
+
+    def __init__(self, patterns_dirs, auto_map=False, as_bytes=False,
+                 instrument=False, mode=None, captures=None, **options):
+        options = _compile_options(options, mode, captures)
+        self.patterns_dirs = list(patterns_dirs)
+        # Arguments of _compile() after the pattern and pattern library
+        self._options = (auto_map, as_bytes, options['prefilter'], mode,
+                         captures, options['optimize'])
+        self._instrument = instrument
+        self._output = options['output']
+        self._intern = options['intern']
+        self._lock = threading.Lock()
+        # Pattern files in the order they override each other, as
+        # (path, (size, modification time), patterns) tuples
+        self._files = []
+        self._sources = {}
+        self._deps = {}
+        self._compiled = {}
+
+        self._files = self._scan()[0]
+        self._definitions = _merge(self._files)
+        self._library = PREDEFINED_PATTERNS.layer(self._definitions)
+
+    def __getitem__(self, key):
+        return self._compiled[key]
+
+    def __contains__(self, key):
+        return key in self._compiled
+
+    def __iter__(self):
+        return iter(self._compiled)
+
+    def __len__(self):
+        return len(self._compiled)
+
+    def add(self, key, pattern=None):
+        '''
+        Compile pattern, key itself by default, and keep it under key.
+        Returns the compiled pattern.
+        '''
+        if pattern is None:
+            pattern = key
+        with self._lock:
+            compiled, deps = self._build(pattern, self._library)
+            self._sources[key] = pattern
+            self._deps[key] = deps
+            patterns = dict(self._compiled)
+            patterns[key] = compiled
+            self._compiled = patterns
+        return compiled
+
+    def remove(self, key):
+        '''
+        Stop keeping the pattern of key.
+        '''
+        with self._lock:
+            patterns = dict(self._compiled)
+            del patterns[key]
+            del self._sources[key]
+            del self._deps[key]
+            self._compiled = patterns
+
+    def check(self):
+        '''
+        Read the pattern files added, removed or modified since the last
+        check and compile again the patterns depending on definitions
+        they changed.
+
+        Returns the set of the keys of the patterns compiled again. If a
+        pattern fails to compile, the error is raised and every pattern
+        is left as it was, the files are read again by the next check.
+        '''
+        with self._lock:
+            files, modified = self._scan()
+            if not modified:
+                return set()
+            definitions = _merge(files)
+            changed = set(
+                name for name in set(definitions) | set(self._definitions)
+                if definitions.get(name) != self._definitions.get(name))
+            patterns = self._library
+            if changed:
+                patterns = PREDEFINED_PATTERNS.layer(definitions)
+
+            compiled = dict(self._compiled)
+            deps = dict(self._deps)
+            for key, pattern in self._sources.items():
+                if not changed.isdisjoint(self._deps[key]):
+                    compiled[key], deps[key] = self._build(pattern, patterns)
+
+            self._files = files
+            self._definitions = definitions
+            self._library = patterns
+            self._deps = deps
+            recompiled = set(key for key in compiled
+                             if compiled[key] is not self._compiled[key])
+            self._compiled = compiled
+        return recompiled
+
+    def _build(self, pattern, patterns):
+        '''
+        Compile pattern with the PatternLibrary patterns, returning the
+        compiled pattern and the names of the patterns it depends upon.
+        '''
+        deps = patterns.expand(pattern).deps
+        regex, type_map, literals, mode = _compile(pattern, patterns,
+                                                   *self._options)
+        _check_interned(self._intern, regex, pattern)
+        if self._instrument:
+            compiled = InstrumentedPattern(regex, type_map, literals,
+                                           pattern, mode, self._output,
+                                           self._intern)
+        else:
+            compiled = CompiledPattern(regex, type_map, literals, mode,
+                                       self._output, self._intern)
+        return compiled, deps
+
+    def _scan(self):
+        '''
+        Return the pattern files of patterns_dirs, reading those which
+        are new or modified, and whether any was added, removed or
+        modified.
+        '''
+        known = dict((path, (signature, patterns))
+                     for path, signature, patterns in self._files)
+        files = []
+        modified = False
+        for patterns_dir in self.patterns_dirs:
+            for name in os.listdir(patterns_dir):
+                path = os.path.join(patterns_dir, name)
+                if not os.path.isfile(path):
+                    continue
+                stat = os.stat(path)
+                signature = (stat.st_size,
+                             getattr(stat, 'st_mtime_ns', stat.st_mtime))
+                signature_patterns = known.get(path)
+                if signature_patterns is not None and \
+                        signature_patterns[0] == signature:
+                    patterns = signature_patterns[1]
+                else:
+                    patterns = library.load_patterns_from_file(path)
+                    modified = True
+                files.append((path, signature, patterns))
+        if [path for path, _, _ in files] != \
+                [path for path, _, _ in self._files]:
+            modified = True
+        return files, modified
+
+
+def _merge(files):
+    '''
+    Definitions of the pattern files, later files overriding earlier
+    ones.
+    '''
+    definitions = {}
+    for _, _, patterns in files:
+        definitions.update(patterns)
+    return definitions
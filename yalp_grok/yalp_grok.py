@@ -3,48 +3,118 @@
 yalp_grok.yalp_grok
 ===================
 '''
-import os
-import copy
+import timeit
 from collections import namedtuple
+
 import regex as re
 
+from . import exceptions, library
+from .cache import LRUCache
+from .interning import CardinalitySampler, InternTable
+from .library import (  # noqa pylint: disable=W0611
+    NAMED_PATTERN, UNNAMED_PATTERN, PATTERN_FORMATS, PatternLibrary,
+)
+
 
-DEFAULT_PATTERNS_DIRS = [
-    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'patterns')
-]
+DEFAULT_PATTERNS_DIRS = [library.BUNDLED_PATTERNS_DIR]
 
 # Attributes used to determine type on groupdict post processing
-# Just covering floats and ints
+# Covering floats, ints and timestamps
 INT = ('INT', 'POSINT', 'NONNEGINT')
 FLOAT = ('BASE10NUM')
-TYPES = {'int': INT, 'float': FLOAT}
+TIMESTAMP = ('HTTPDATE', 'SYSLOGTIMESTAMP', 'TIMESTAMP_ISO8601')
+TYPES = {'int': INT, 'float': FLOAT, 'datetime': TIMESTAMP,
+         'epoch': TIMESTAMP}
+
+# yalp_grok.timestamps, imported by the first timestamp conversion since
+# it pulls in datetime
+_TIMESTAMPS = None
+
+
+def _timestamps():
+    '''
+    Import yalp_grok.timestamps and return it.
+    '''
+    global _TIMESTAMPS  # pylint: disable=W0603
+    from . import timestamps
+    _TIMESTAMPS = timestamps
+    return timestamps
+
+
+def _to_datetime(value):
+    '''
+    yalp_grok.timestamps.to_datetime(), importing it on first use.
+    '''
+    return (_TIMESTAMPS or _timestamps()).to_datetime(value)
+
+
+def _to_epoch(value):
+    '''
+    yalp_grok.timestamps.to_epoch(), importing it on first use.
+    '''
+    return (_TIMESTAMPS or _timestamps()).to_epoch(value)
+
+
 CONVERSIONS = {
     'int': int,
     'float': float,
+    'datetime': _to_datetime,
+    'epoch': _to_epoch,
 }
 
-# GROK pattern/format data abstracted from logic
-NAMED_PATTERN = {
-    'pattern': r'%{(\w+):(\w+)(:\w+)?}',
-    'format': '(?P<{key}>{regex})'
+# Types detected by auto_map=True, in order of precedence
+AUTO_MAP_TYPES = ('int', 'float')
+
+Pattern = library.Pattern
+
+try:
+    TEXT_TYPES = (unicode, bytes)  # noqa pylint: disable=E0602
+except NameError:  # pragma: no cover
+    TEXT_TYPES = (str, bytes)
+
+try:
+    STRING_TYPES = (basestring,)  # noqa pylint: disable=E0602
+except NameError:  # pragma: no cover
+    STRING_TYPES = (str,)
+
+# Raised by the regex module when a search runs out of time
+try:
+    REGEX_TIMEOUT = TimeoutError
+except NameError:  # pragma: no cover
+    REGEX_TIMEOUT = RuntimeError
+
+# Ways of matching a compiled pattern, after the regex method used:
+# anywhere in the text, at its start, or the whole text
+MATCH_MODES = ('search', 'match', 'fullmatch')
+
+# Named groups kept by the capture policies of compile_pattern(): all of
+# them, or only those written in the compiled pattern itself
+CAPTURE_POLICIES = ('named', 'named-top-level')
+
+# Results of a compiled pattern: a dictionary of the named groups, an
+# instance of a namedtuple class with a field per named group, or a
+# plain tuple of the values in the order of CompiledPattern.fields
+OUTPUT_MODES = ('dict', 'record', 'tuple')
+
+# Keyword only options of compile_pattern() and their defaults
+COMPILE_OPTIONS = {
+    'prefilter': True, 'optimize': False, 'output': 'dict', 'intern': None,
 }
 
-UNNAMED_PATTERN = {'pattern': r'%{(\w+)}', 'format': '({regex})'}
-PATTERN_FORMATS = (UNNAMED_PATTERN, NAMED_PATTERN)
+# Named groups written by hand in a pattern
+NAMED_GROUP = re.compile(r'\(\?P<(\w+)>')
 
-# Magic pattern for capturing named grok keys in various states
-# of expansion to identify final grok key of named attributes
-NAMED_KEY_PATTERN = re.compile(
-    r'(?:%{(?P<grok>\w+):(?P<key>\w+)(?::(?P<type>\w+))?}'
-    r'|\(\?P<(?P<key>\w+)>(?:%{(?P<grok>\w+)}'
-    r'|\(\?:%{(?P<grok>\w+)}\))\))'
-)
+# Process wide cache of patterns compiled on behalf of grok_match()
+DEFAULT_PATTERN_CACHE_SIZE = 256
+PATTERN_CACHE = LRUCache(DEFAULT_PATTERN_CACHE_SIZE)
 
-Pattern = namedtuple('Pattern', 'name regex_str')
+# Record classes by field names, shared by the patterns with the same
+# named groups
+_RECORD_CLASSES = {}
 
 
 def grok_match(text, pattern, custom_patterns=None,
-               custom_patterns_dir=None, auto_map=False):
+               custom_patterns_dir=None, auto_map=False, timeout=None):
     '''
     Search for pattern in text.
 
@@ -55,22 +125,190 @@ def grok_match(text, pattern, custom_patterns=None,
     or custom_patterns_dir.
 
     Data type conversion supported. For example %{NUMBER:num:int} which
-    converts the num semantic from a string to an integer. Currently the
-    only supported conversions are int and float.
+    converts the num semantic from a string to an integer. The supported
+    conversions are int, float, and datetime and epoch for the
+    timestamps of HTTPDATE, SYSLOGTIMESTAMP and TIMESTAMP_ISO8601, see
+    yalp_grok.timestamps.
 
     If auto_map set to True then GROK key will be used to auto determine
     data type conversion. For example %{NUMBER:num} which converts the
-    num semantic from a string to a float. A data type defined in grok
+    num semantic from a string to a float. auto_map can also list the
+    types to detect, in order of precedence, such as ('int', 'float',
+    'datetime') to also convert timestamps. A data type defined in grok
     pattern will take precedence over auto determined type.
 
     If type conversion fails then value left as a string.
+
+    timeout is the time budget of the search in seconds, see
+    grok_search().
+
+    Compiled patterns are memoized in a process wide LRU cache, see
+    set_pattern_cache_size() and clear_pattern_cache(). Changes made to
+    the files of custom_patterns_dir are not seen until the cache is
+    cleared.
+    '''
+    return grok_search(text, _cached_compile_pattern(
+        pattern, custom_patterns, custom_patterns_dir, auto_map), timeout)
+
+
+def set_pattern_cache_size(maxsize):
+    '''
+    Set the maximum number of compiled patterns kept by grok_match().
+
+    None means unbounded and 0 disables caching.
+    '''
+    PATTERN_CACHE.maxsize = maxsize
+
+
+def pattern_cache_info():
     '''
-    return grok_search(text, compile_pattern(
-        pattern, custom_patterns, custom_patterns_dir, auto_map=auto_map))
+    Return (hits, misses, maxsize, currsize) of the grok_match() cache.
+    '''
+    return PATTERN_CACHE.info()
+
+
+def clear_pattern_cache():
+    '''
+    Drop all patterns compiled by grok_match() and reset the counters.
+    '''
+    PATTERN_CACHE.clear()
+
+
+def _cached_compile_pattern(pattern, custom_patterns, custom_patterns_dir,
+                            auto_map):
+    '''
+    Compile pattern or fetch it from the pattern cache.
+
+    Falls back to compiling without caching if the arguments can not be
+    used as a cache key.
+    '''
+    try:
+        key = (pattern,
+               tuple(sorted(custom_patterns.items()))
+               if custom_patterns else None,
+               custom_patterns_dir,
+               auto_map)
+        hash(key)
+    except TypeError:
+        return compile_pattern(pattern, custom_patterns,
+                               custom_patterns_dir, auto_map=auto_map)
+
+    compiled = PATTERN_CACHE.get(key)
+    if compiled is None:
+        compiled = compile_pattern(pattern, custom_patterns,
+                                   custom_patterns_dir, auto_map=auto_map)
+        PATTERN_CACHE.put(key, compiled)
+    return compiled
+
+
+class CompiledPattern(namedtuple('CompiledPattern', 'regex type_map')):
+    '''
+    Pattern compiled by compile_pattern(): the regex and the type map of
+    its named groups, along with the literals every match contains, the
+    match mode and the output mode.
+
+    convert() turns a match of the regex into the result returned by
+    grok_search(), and convert_values() the values of the named groups
+    into that result. fields holds the names of the named groups, in the
+    order of the values of tuple and record results, and record the
+    namedtuple class of record results, None for other output modes.
+    '''
+
+    def __new__(cls, regex, type_map, literals=(), mode='search',
+                output='dict', intern=None):
+        self = super(CompiledPattern, cls).__new__(cls, regex, type_map)
+        self.literals = literals
+        self.mode = mode
+        self.output = output
+        self.intern = intern
+        self.fields = _field_names(regex)
+        self.record = record_class(self.fields) if output == 'record' \
+            else None
+        self.intern_table = InternTable() if intern else None
+        self.convert_values = make_values_converter(
+            self.fields, type_map, output=output, intern=intern,
+            intern_table=self.intern_table)
+        self.convert = match_converter(regex, self.convert_values)
+        self._find = getattr(regex, mode)
+        return self
+
+    def __reduce__(self):
+        return self.__class__, (self.regex, self.type_map, self.literals,
+                                self.mode, self.output, self.intern)
+
+    def search(self, text, pos=0, endpos=None, timeout=None,
+               concurrent=None):
+        '''
+        Search the regex in text, between pos and endpos, or only at pos
+        or over the whole of it depending on the match mode.
+
+        Texts lacking one of the literals are rejected without running
+        the regex. If the search takes longer than timeout seconds it is
+        abandoned and SearchTimeout raised. If concurrent is set, the
+        regex runs without holding the GIL, so that other threads can
+        search meanwhile.
+        '''
+        if self.literals and isinstance(text, TEXT_TYPES):
+            if endpos is None and not pos:
+                for literal in self.literals:
+                    if literal not in text:
+                        return None
+            else:
+                for literal in self.literals:
+                    if text.find(literal, pos, endpos) < 0:
+                        return None
+        if timeout is None and concurrent is None:
+            return self._find(text, pos, endpos)
+        return _timed_search(self._find, text, pos, endpos, timeout,
+                             concurrent)
+
+
+class InstrumentedPattern(CompiledPattern):
+    '''
+    Compiled pattern keeping statistics of its searches in a PatternStats
+    instance, the stats attribute.
+    '''
+
+    def __new__(cls, regex, type_map, literals=(), name=None,
+                mode='search', output='dict', intern=None):
+        self = super(InstrumentedPattern, cls).__new__(
+            cls, regex, type_map, literals, mode, output, intern)
+        from . import stats
+        self.stats = stats.PatternStats(name or regex.pattern)
+        self.convert_values = make_values_converter(
+            self.fields, type_map, on_failure=self.stats.conversion_failed,
+            output=output, intern=intern, intern_table=self.intern_table)
+        self.convert = match_converter(regex, self.convert_values)
+        return self
+
+    def __reduce__(self):
+        return self.__class__, (self.regex, self.type_map, self.literals,
+                                self.stats.name, self.mode, self.output,
+                                self.intern)
+
+    def search(self, text, pos=0, endpos=None, timeout=None,
+               concurrent=None):
+        '''
+        Search the regex in text like CompiledPattern.search(), recording
+        the outcome and the time taken.
+        '''
+        start = timeit.default_timer()
+        try:
+            match_obj = super(InstrumentedPattern, self).search(
+                text, pos, endpos, timeout, concurrent)
+        except exceptions.SearchTimeout:
+            self.stats.timed_out(text, timeit.default_timer() - start,
+                                 pos, endpos)
+            raise
+        self.stats.record(text, match_obj is not None,
+                          timeit.default_timer() - start, pos, endpos)
+        return match_obj
 
 
 def compile_pattern(pattern, custom_patterns=None,
-                    custom_patterns_dir=None, auto_map=False):
+                    custom_patterns_dir=None, auto_map=False, as_bytes=False,
+                    instrument=False, mode=None, captures=None,
+                    cache_dir=None, **options):
     '''
     Compile pattern before use for better performance when matching.
 
@@ -79,158 +317,546 @@ def compile_pattern(pattern, custom_patterns=None,
     custom_patterns(pattern name, pattern regular expression pair) or
     custom_patterns_dir, and will then be used in addition to the
     built-in ones.
+
+    If as_bytes is set, the regex is compiled as a bytes pattern which
+    searches bytes, mmap or memoryview objects instead of strings, and
+    the matched fields are bytes.
+
+    prefilter, output, intern and optimize are keyword only options,
+    with the defaults of COMPILE_OPTIONS.
+
+    Unless prefilter is False, the literal substrings every match must
+    contain are extracted from the pattern, and grok_search() checks for
+    them before running the regex. This rejects most non-matching texts
+    much faster than the regex does.
+
+    If instrument is set, the compiled pattern keeps statistics of its
+    searches in its stats attribute, see yalp_grok.stats.
+
+    mode is one of MATCH_MODES: 'search' finds the pattern anywhere in
+    the text, 'match' only at its start and 'fullmatch' only if it spans
+    the whole text. Matching at the start fails much faster than
+    searching on texts which do not match, since the regex is not tried
+    again at every position. By default patterns anchored with ^ or \\A
+    use 'match', which finds the same matches, and others 'search'.
+
+    captures limits the groups the regex captures, every group of the
+    expanded pattern by default. Groups which are not captured are made
+    non-capturing, so that the regex engine does less work per match.
+    It is either one of CAPTURE_POLICIES, 'named' to keep the named
+    groups or 'named-top-level' to only keep those named in pattern
+    itself and not in the patterns it references, or an iterable of the
+    names of the groups to keep. Patterns using back references are not
+    pruned.
+
+    If cache_dir is given, the compiled pattern is kept in that
+    directory and loaded from there by later calls with the same
+    arguments, in this process or any other, as long as the pattern
+    files are unchanged. See yalp_grok.diskcache.
+
+    output is one of OUTPUT_MODES and decides what grok_search() returns
+    for matches: a dictionary by default, 'record' for an instance of a
+    namedtuple class generated for the named groups, or 'tuple' for a
+    plain tuple of their values, named by the fields attribute of the
+    compiled pattern. Records and tuples take a fraction of the memory
+    of dictionaries, which matters when many results are kept.
+
+    intern lists the fields whose values the results share, one string
+    object per distinct value, through the bounded table held in the
+    intern_table attribute, see yalp_grok.interning. With 'auto' the
+    fields with few distinct values over the first results are picked.
+    Fields converted to numbers are never interned.
+
+    If optimize is set, the expanded regex is rewritten to backtrack
+    less while finding the same matches: alternations of literals such
+    as the month names are merged on their common prefixes, and the
+    unnamed groups the expansion adds are made non-capturing, see
+    yalp_grok.regex_tree.optimize().
+    '''
+    options = _compile_options(options, mode, captures)
+    if cache_dir is None:
+        regex, type_map, literals, mode = _compile(
+            pattern, _pattern_library(custom_patterns, custom_patterns_dir),
+            auto_map, as_bytes, options['prefilter'], mode, captures,
+            options['optimize'])
+    else:
+        regex, type_map, literals, mode = _disk_cached_compile(
+            cache_dir, pattern, custom_patterns, custom_patterns_dir,
+            auto_map, as_bytes, options['prefilter'], mode, captures,
+            options['optimize'])
+    _check_interned(options['intern'], regex, pattern)
+    if instrument:
+        return InstrumentedPattern(regex, type_map, literals, pattern, mode,
+                                   options['output'], options['intern'])
+    return CompiledPattern(regex, type_map, literals, mode,
+                           options['output'], options['intern'])
+
+
+def _compile_options(options, mode, captures):
     '''
-    all_patterns = copy.deepcopy(PREDEFINED_PATTERNS)
+    Return the keyword only options of compile_pattern(), defaults
+    included, raising TypeError for unknown ones and GrokError for bad
+    values.
+    '''
+    unknown = sorted(set(options) - set(COMPILE_OPTIONS))
+    if unknown:
+        raise TypeError(
+            'Unexpected keyword argument {0!r}, compile options are '
+            '{1}'.format(unknown[0], ', '.join(sorted(COMPILE_OPTIONS))))
+    options = dict(COMPILE_OPTIONS, **options)
+    _check_options(mode, captures, options['output'], options['intern'])
+    if options['intern'] is not None and \
+            not isinstance(options['intern'], STRING_TYPES):
+        options['intern'] = tuple(options['intern'])
+    return options
+
+
+def _check_interned(intern, regex, pattern):
+    '''
+    Raise GrokError if intern lists fields regex does not capture.
+    '''
+    if intern is not None and not isinstance(intern, STRING_TYPES):
+        unknown = [name for name in intern if name not in regex.groupindex]
+        if unknown:
+            raise exceptions.GrokError(
+                'Can not intern {0}, not captured by {1}'.format(
+                    ', '.join(unknown), pattern))
 
-    custom_pats = {}
 
+def _check_options(mode, captures, output='dict', intern=None):
+    '''
+    Raise GrokError for an unknown match mode, capture policy, output
+    mode or interning policy.
+    '''
+    if mode is not None and mode not in MATCH_MODES:
+        raise exceptions.GrokError(
+            'Unknown match mode {0!r}, expected one of {1}'.format(
+                mode, ', '.join(MATCH_MODES)))
+    if isinstance(captures, STRING_TYPES) and \
+            captures not in CAPTURE_POLICIES:
+        raise exceptions.GrokError(
+            'Unknown capture policy {0!r}, expected one of {1} or a list '
+            'of names'.format(captures, ', '.join(CAPTURE_POLICIES)))
+    if output not in OUTPUT_MODES:
+        raise exceptions.GrokError(
+            'Unknown output mode {0!r}, expected one of {1}'.format(
+                output, ', '.join(OUTPUT_MODES)))
+    if isinstance(intern, STRING_TYPES) and intern != 'auto':
+        raise exceptions.GrokError(
+            "Unknown interning policy {0!r}, expected 'auto' or a list of "
+            "names".format(intern))
+
+
+def _compile(pattern, patterns, auto_map, as_bytes, prefilter, mode,
+             captures, optimize=False):
+    '''
+    Expand pattern with the PatternLibrary patterns and compile it,
+    returning the regex, its type map, the literals every match contains
+    and the match mode.
+    '''
+    expansion = patterns.expand(pattern)
+    type_map = _map_types(expansion.type_hints, auto_map)
+
+    regex_str = expansion.regex_str
+    if captures is not None:
+        regex_str = _prune_captures(regex_str, captures, pattern)
+    literals = ()
+    if prefilter or mode is None:
+        literals, anchored = _analyse(regex_str)
+        if mode is None:
+            mode = 'match' if anchored else 'search'
+        if not prefilter:
+            literals = ()
+    if optimize:
+        regex_str = _optimize(regex_str)
+    if as_bytes:
+        regex_str = regex_str.encode('utf-8')
+        # Non-ASCII literals may come from escapes such as \xe9, which
+        # match a single byte rather than the UTF-8 encoded character
+        literals = tuple(literal.encode('ascii') for literal in literals
+                         if all(ord(char) < 128 for char in literal))
+    regex = re.compile(regex_str)
+    if captures is not None:
+        type_map = dict((name, type_map[name]) for name in type_map
+                        if name in regex.groupindex)
+    return regex, type_map, literals, mode
+
+
+def _disk_cached_compile(cache_dir, pattern, custom_patterns,
+                         custom_patterns_dir, auto_map, as_bytes, prefilter,
+                         mode, captures, optimize=False):
+    '''
+    _compile() through the disk cache in cache_dir.
+    '''
+    # Only needed with a disk cache, keep it out of the import time
+    from . import diskcache
+
+    patterns_dirs = list(DEFAULT_PATTERNS_DIRS)
     if custom_patterns_dir is not None:
-        custom_pats = _reload_patterns([custom_patterns_dir])
+        patterns_dirs.append(custom_patterns_dir)
+    if captures is not None and not isinstance(captures, STRING_TYPES):
+        captures = tuple(sorted(captures))
+    key = diskcache.cache_key(pattern, custom_patterns, patterns_dirs, {
+        'auto_map': auto_map, 'as_bytes': as_bytes, 'prefilter': prefilter,
+        'mode': mode, 'captures': captures, 'optimize': optimize,
+    })
+    compiled = diskcache.load(cache_dir, key)
+    if compiled is None:
+        compiled = _compile(
+            pattern, _pattern_library(custom_patterns, custom_patterns_dir),
+            auto_map, as_bytes, prefilter, mode, captures, optimize)
+        diskcache.store(cache_dir, key, *compiled)
+    return compiled
+
+
+def grok_search(text, pattern, timeout=None):
+    '''
+    Search for pattern in text.
 
-    if custom_patterns:
-        for pat_name, regex_str in custom_patterns.items():
-            custom_pats[pat_name] = Pattern(pat_name, regex_str)
+    Return dictionary with named fields in pattern as keys, or None if
+    no match found.
 
-    all_patterns.update(custom_pats)
-    py_regex_pattern = pattern
-    type_map = _map_types(py_regex_pattern, auto_map)
+    If timeout is given, a search still running after timeout seconds
+    is abandoned and SearchTimeout raised. This bounds the time spent on
+    texts which make a badly written pattern backtrack for ages, see
+    yalp_grok.lint to find such patterns beforehand.
+    '''
+    if isinstance(pattern, CompiledPattern):
+        match_obj = pattern.search(text, timeout=timeout)
+        if match_obj is not None:
+            return pattern.convert(match_obj)
+        return None
 
-    while True:
+    if timeout is None:
+        match_obj = pattern[0].search(text)
+    else:
+        match_obj = _timed_search(pattern[0].search, text, 0, None,
+                                  timeout)
 
-        # replace %{pattern_name:custom_name} with regex and regex group name
-        # replace %{pattern_name} with regex
-        py_regex_pattern, type_map_temp = _sub_pattern_name(
-            py_regex_pattern, all_patterns, type_map, auto_map)
-        type_map.update(type_map_temp)
+    if match_obj is not None:
+        match_dict = match_obj.groupdict()
+        return _apply_map(match_dict, pattern[1])
+    return None
 
-        if re.search(r'%{\w+(:\w+)?}', py_regex_pattern) is None:
-            break
 
-    return re.compile(py_regex_pattern), type_map
+def _timed_search(find, text, pos, endpos, timeout, concurrent=None):
+    '''
+    Call find, a search method of a regex, on text, raising
+    SearchTimeout after timeout seconds.
+    '''
+    try:
+        return find(text, pos, endpos, concurrent=concurrent,
+                    timeout=timeout)
+    except REGEX_TIMEOUT:
+        raise exceptions.SearchTimeout(
+            'Search timed out after {0} s'.format(timeout))
 
 
-def grok_search(text, pattern):
+def make_converter(regex, type_map, encoding=None, errors='strict',
+                   on_failure=None, output='dict', intern=None,
+                   intern_table=None):
     '''
-    Search for pattern in text.
+    Build the function turning a match of regex into the dictionary of
+    its named groups, with values converted as type_map says, or into a
+    record or tuple of their values depending on output, one of
+    OUTPUT_MODES.
+
+    Groups are read by index, which is much faster than groupdict(), and
+    the conversions to apply are worked out once. The other arguments
+    are those of make_values_converter().
+    '''
+    return match_converter(regex, make_values_converter(
+        _field_names(regex), type_map, encoding, errors, on_failure, output,
+        intern, intern_table))
 
-    Return dictionary with named fields in pattern as keys, or None if
-    no match found.
+
+def match_converter(regex, convert_values):
     '''
-    match_obj = pattern[0].search(text)
+    Build the function passing the values of the named groups of a match
+    of regex, by group number, to convert_values.
+    '''
+    indexes = tuple(regex.groupindex[name] for name in _field_names(regex))
 
-    if match_obj is not None:
-        match_dict = match_obj.groupdict()
-        return _apply_map(match_dict, pattern[1])
-    return None
+    def _convert_match(match_obj):
+        if len(indexes) > 1:
+            return convert_values(match_obj.group(*indexes))
+        if indexes:
+            return convert_values((match_obj.group(indexes[0]),))
+        return convert_values(())
 
+    return _convert_match
 
-def _reload_patterns(patterns_dirs):
+
+def make_values_converter(names, type_map, encoding=None, errors='strict',
+                          on_failure=None, output='dict', intern=None,
+                          intern_table=None):
     '''
-    Load patters from all files in a directory.
+    Build the function turning the values of the fields names into the
+    result of a match: a dictionary, a record or a tuple depending on
+    output, one of OUTPUT_MODES, with values converted as type_map says.
+
+    If encoding is given, bytes values are decoded before being
+    converted. on_failure, if given, is called with the name and value
+    of every field which could not be converted. Values of the fields
+    listed in intern, or picked by sampling if it is 'auto', go through
+    intern_table.
+    '''
+    names = tuple(names)
+    conversions = tuple(
+        (position, CONVERSIONS[type_map[name]])
+        for position, name in enumerate(names)
+        if type_map and type_map.get(name) in CONVERSIONS)
+    # Positions of the fields interned, and the sampler picking them
+    interning = _interning(names, conversions, intern)
+    if intern and intern_table is None:
+        intern_table = InternTable()
+    build = _builder(names, output)
+
+    def _convert_values(values):
+        if encoding is not None:
+            values = [value if value is None else
+                      value.decode(encoding, errors) for value in values]
+        if conversions:
+            values = _apply_conversions(values, conversions, names,
+                                        on_failure)
+        if interning[0]:
+            values = _intern_values(values, interning[0], intern_table)
+        elif interning[1] is not None:
+            interned = interning[1].add(values)
+            if interned is not None:
+                interning[:] = [interned, None]
+        return build(values)
+
+    return _convert_values
+
+
+def _interning(names, conversions, intern):
     '''
-    all_patterns = {}
-    for dir_ in patterns_dirs:
-        for pat_file in os.listdir(dir_):
-            patterns = _load_patterns_from_file(os.path.join(dir_, pat_file))
-            all_patterns.update(patterns)
+    [positions of the fields to intern, sampler picking them] for the
+    interning policy intern. Fields converted to numbers are not
+    interned.
+    '''
+    converted = set(position for position, _ in conversions)
+    strings = tuple(position for position in range(len(names))
+                    if position not in converted)
+    if intern == 'auto':
+        return [(), CardinalitySampler(strings)]
+    if intern:
+        return [tuple(position for position in strings
+                      if names[position] in intern), None]
+    return [(), None]
+
+
+def _builder(names, output):
+    '''
+    Function building the result of output mode output from values.
+    '''
+    if output == 'record':
+        return record_class(names)._make
+    if output == 'tuple':
+        return tuple
+    return lambda values: dict(zip(names, values))
+
 
-    return all_patterns
+def _apply_conversions(values, conversions, names, on_failure):
+    '''
+    List of values with conversions applied, the values failing to
+    convert being kept and reported to on_failure.
+    '''
+    values = list(values)
+    for position, conversion in conversions:
+        value = values[position]
+        if value is not None:
+            try:
+                values[position] = conversion(value)
+            except (ValueError, OverflowError):
+                if on_failure is not None:
+                    on_failure(names[position], value)
+    return values
 
 
-def _load_patterns_from_file(pat_file):
+def _intern_values(values, positions, intern_table):
     '''
-    Load patterns from a text file.
+    List of values with those at positions interned in intern_table.
     '''
-    patterns = {}
-    with open(pat_file, 'r') as pfh:
-        for line in pfh:
-            line = line.strip()
-            if line == '' or line.startswith('#'):
-                continue
+    if not isinstance(values, list):
+        values = list(values)
+    intern_value = intern_table.intern
+    for position in positions:
+        value = values[position]
+        if value is not None:
+            values[position] = intern_value(value)
+    return values
 
-            sep = line.find(' ')
-            pat_name = line[:sep]
-            regex_str = line[sep:].strip()
-            pat = Pattern(pat_name, regex_str)
-            patterns[pat.name] = pat
 
-    return patterns
+def record_class(names):
+    '''
+    Return the namedtuple class of the records of a pattern with named
+    groups names, the same class for the same names.
+
+    Names which are not valid field names are replaced by _ and their
+    position. Records pickle by their field names, so that they can be
+    sent between processes like dictionaries.
+    '''
+    names = tuple(names)
+    cls = _RECORD_CLASSES.get(names)
+    if cls is None:
+        cls = namedtuple('Record', names, rename=True)
+        cls.__reduce__ = lambda self: (_make_record, (names, tuple(self)))
+        _RECORD_CLASSES[names] = cls
+    return cls
 
 
-def _sub_pattern_name(py_regex_pattern, all_patterns, type_map, auto_map):
+def _make_record(names, values):
     '''
-    Expand grok pattern with regex substitution
+    Unpickle a record.
     '''
-    for pattern_format in PATTERN_FORMATS:
-        pattern = pattern_format['pattern']
-        py_regex_pattern = re.sub(
-            pattern, lambda match, pat_format=pattern_format:
-            _format_pattern_name(
-                match, pat_format, all_patterns),
-            py_regex_pattern)
-        type_map.update(_map_types(py_regex_pattern, auto_map, type_map))
+    return record_class(names)._make(values)
 
-    return py_regex_pattern, type_map
 
+def _field_names(regex):
+    '''
+    Names of the named groups of regex, by group number.
+    '''
+    groupindex = regex.groupindex
+    return tuple(sorted(groupindex, key=groupindex.get))
 
-def _format_pattern_name(match, pattern_format, all_patterns):
+
+def _pattern_library(custom_patterns, custom_patterns_dir):
+    '''
+    The bundled patterns, layered with the custom ones if any.
+    '''
+    patterns = PREDEFINED_PATTERNS
+    custom_pats = {}
+
+    if custom_patterns_dir is not None:
+        custom_pats = _reload_patterns([custom_patterns_dir])
+
+    if custom_patterns:
+        for pat_name, regex_str in custom_patterns.items():
+            custom_pats[pat_name] = Pattern(pat_name, regex_str)
+
+    if custom_pats:
+        patterns = patterns.layer(custom_pats)
+    return patterns
+
+
+def _reload_patterns(patterns_dirs):
+    '''
+    Load patters from all files in a directory.
     '''
-    Generate a new pattern based on capture results
+    return library.load_patterns(patterns_dirs)
 
-    Expand keys with regex using generic string format
+
+def _required_literals(regex_str):
+    '''
+    Literals every match of regex_str contains, none if it can not be
+    analysed.
     '''
-    return pattern_format['format'].format(
-        key=_get_group_key(match),
-        regex=all_patterns[match.group(1)].regex_str
-    )
+    # Only needed when compiling, keep it out of the import time
+    from . import regex_tree
+
+    try:
+        return regex_tree.required_literals(regex_tree.parse(regex_str))
+    except regex_tree.RegexSyntaxError:
+        return ()
+
+
+def _prune_captures(regex_str, captures, pattern):
+    '''
+    Make the groups of regex_str which captures does not keep
+    non-capturing.
+    '''
+    from . import regex_tree
+
+    if captures == 'named':
+        keep = lambda name: True  # noqa: E731
+    elif captures == 'named-top-level':
+        keep = frozenset(
+            [match.group(2) for match in library.GROK_REFERENCE.finditer(
+                pattern) if match.group(2)] +
+            NAMED_GROUP.findall(pattern)).__contains__
+    else:
+        keep = frozenset(captures).__contains__
+
+    try:
+        tree = regex_tree.parse(regex_str)
+    except regex_tree.RegexSyntaxError:
+        return regex_str
+    if any(isinstance(node, regex_tree.Atom) and node.kind == 'backref'
+           for node in regex_tree.walk(tree)):
+        return regex_str
+    return regex_tree.unparse(regex_tree.prune_captures(tree, keep))
 
 
-def _get_group_key(match):
+def _optimize(regex_str):
+    '''
+    regex_str rewritten by regex_tree.optimize(), unchanged if it can
+    not be analysed.
     '''
-    Return None on IndexError
+    from . import regex_tree
+
+    try:
+        tree = regex_tree.parse(regex_str)
+    except regex_tree.RegexSyntaxError:
+        return regex_str
+    return regex_tree.unparse(regex_tree.optimize(tree))
+
 
-    Return None if no more than 1 index in group
-    Probably a better way to do this...
+def _analyse(regex_str):
     '''
+    Return the literals every match of regex_str contains and whether
+    it is anchored at the start, nothing and False if it can not be
+    analysed.
+    '''
+    from . import regex_tree
+
     try:
-        return match.group(2)
-    except IndexError:
-        return None
+        tree = regex_tree.parse(regex_str)
+    except regex_tree.RegexSyntaxError:
+        return (), False
+    return regex_tree.required_literals(tree), regex_tree.anchored_start(tree)
 
 
-def _map_types(py_regex_pattern, auto_map, type_map=None):
+def _map_types(type_hints, auto_map):
     '''
-    Generate type map against regex pattern
+    Generate type map from the type hints of an expanded pattern
 
     Follow conditions in correct order to assign data type for a named
-    Grok key. For now this will only affect Grok keys listed in INT and
-    FLOAT variables in order to assign int or float primitive types to
-    attribute names using matching Grok keys. A defined type using ES
+    Grok key. auto_map is True for AUTO_MAP_TYPES, or the types to
+    detect from the Grok keys listed in TYPES. A defined type using ES
     Grok type semantic takes precedence.
     '''
-    if not type_map:
-        type_map = {}
-
-    named_grok_keys = NAMED_KEY_PATTERN.findall(py_regex_pattern)
-    for grok_key, name, defined_type in named_grok_keys:
+    if auto_map is True:
+        auto_map = AUTO_MAP_TYPES
+    elif auto_map:
+        auto_map = tuple(auto_map)
+        unknown = [name for name in auto_map if name not in TYPES]
+        if unknown:
+            raise exceptions.GrokError(
+                'Unknown types to auto map {0}, expected some of {1}'.format(
+                    ', '.join(unknown), ', '.join(sorted(TYPES))))
+    type_map = {}
+    for name, grok_keys, defined_type in type_hints:
         if auto_map:
-            detected_type = _type_match(grok_key)
-            if detected_type and name not in type_map.keys():
+            detected_type = _type_match(grok_keys, auto_map)
+            if detected_type and name not in type_map:
                 type_map[name] = detected_type
 
-        if defined_type in TYPES.keys():
+        if defined_type in TYPES:
             type_map[name] = defined_type
 
     return type_map
 
 
-def _type_match(grok_key):
+def _type_match(grok_keys, types=AUTO_MAP_TYPES):
     '''
-    Attempt to match grok key with types associated with it
+    Attempt to match grok keys with types associated with them
     '''
-    for type_item, grok_keys in TYPES.items():
-        if grok_key in grok_keys:
-            return type_item
+    for grok_key in grok_keys:
+        for type_item in types:
+            if grok_key in TYPES[type_item]:
+                return type_item
     return None
 
 
@@ -245,7 +871,7 @@ def _apply_map(match_dict, type_map):
         for name, detected_type in type_map.items():
             try:
                 match_dict[name] = _convert(match_dict[name], detected_type)
-            except (ValueError, TypeError):
+            except (ValueError, TypeError, OverflowError):
                 pass
     return match_dict
 
@@ -257,4 +883,4 @@ def _convert(value, detected_type):
     return CONVERSIONS[detected_type](value)
 
 
-PREDEFINED_PATTERNS = _reload_patterns(DEFAULT_PATTERNS_DIRS)
+PREDEFINED_PATTERNS = PatternLibrary.from_dirs(DEFAULT_PATTERNS_DIRS)